@@ -12,15 +12,22 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 
 class PredictiveAgent:
     def __init__(self):
+        self._graph_base64 = None
         try:
             self.csv_loader = CSVLoader()
             self.df = self.csv_loader.df
-            self.graph_base64 = GraphLoader().get_base64_data_url()
             self.stock_analyzer = StockAnalyzer()
         except Exception as e:
             # Re-lanzar la excepción para que se maneje en el nivel superior
             raise Exception(f"Error al inicializar el agente: {str(e)}")
 
+    @property
+    def graph_base64(self) -> str:
+        """Data URL de la gráfica de predicciones; se lee del disco solo la primera vez que se pide."""
+        if self._graph_base64 is None:
+            self._graph_base64 = GraphLoader().get_base64_data_url()
+        return self._graph_base64
+
     def answer_question(self, question: str) -> str:
         """Interpreta preguntas en lenguaje natural sobre el CSV, la gráfica o stock"""
         try:
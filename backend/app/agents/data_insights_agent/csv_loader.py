@@ -1,5 +1,8 @@
 import pandas as pd
 import os
+from app.pipelines.build_master_dataset import add_time_dependent_columns
+from app.pipelines.ingest import normalize_descriptions
+from app.pipelines.product_dictionary import ensure_product_ids, lookup_product_id, optimize_dtypes
 
 DATA_PATH = os.path.join("output", "master_dataset.csv")
 
@@ -7,6 +10,8 @@ class CSVLoader:
     def __init__(self, path: str = DATA_PATH):
         self.path = path
         self.df = self.load_csv()
+        # Posiciones de cada producto para búsquedas O(1) por ID
+        self.positions = self.df.groupby('product_id').indices
 
     def load_csv(self) -> pd.DataFrame:
         try:
@@ -18,7 +23,9 @@ class CSVLoader:
                 raise ValueError("El archivo CSV está vacío.")
                 
             df.columns = df.columns.str.strip().str.lower()
-            return df
+            # Las columnas que dependen de la fecha actual no se guardan en el CSV
+            df = add_time_dependent_columns(df)
+            return optimize_dtypes(ensure_product_ids(df))
         except FileNotFoundError:
             # Re-lanzar FileNotFoundError para que se maneje apropiadamente
             raise
@@ -29,13 +36,15 @@ class CSVLoader:
 
     def get_product_info(self, product_name: str) -> dict:
         try:
-            product_name = product_name.strip().lower()
-            match = self.df[self.df['descripcion_normalizada'].str.lower() == product_name]
+            # Misma normalización con la que se construyeron las claves del diccionario
+            product_name = normalize_descriptions(pd.Series([product_name])).iloc[0]
+            product_id = lookup_product_id(product_name)
+            positions = self.positions.get(product_id) if product_id is not None else None
 
-            if match.empty:
+            if positions is None:
                 return {"error": f"No se encontraron datos para el producto: {product_name}"}
 
-            return match.iloc[0].to_dict()
+            return self.df.iloc[positions[0]].to_dict()
         except Exception as e:
             return {"error": f"Error al buscar información del producto: {str(e)}"}
 
@@ -7,6 +7,14 @@ class GraphLoader:
     def __init__(self, path: str = GRAPH_PATH):
         self.path = path
 
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def version(self) -> str:
+        """Versión de la gráfica: hash del PNG (memoizado por tamaño y fecha), cambia con cada corrida del modelo."""
+        from app.pipelines.ingest import file_fingerprint
+        return file_fingerprint(self.path)[:24]
+
     def get_base64_graph(self) -> str:
         """Convierte la gráfica PNG a string base64"""
         try:
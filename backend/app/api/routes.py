@@ -1,29 +1,31 @@
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import JSONResponse
-import shutil
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import json
 import os
-from typing import List
-from app.pipelines.merge_files import merge_excel_files
 import tempfile
-from app.pipelines.process_imports import process_imports
-from app.pipelines.process_stock import process_stock
-from app.models.predictor import run_model
-from fastapi import APIRouter, HTTPException
+import time
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel
-from app.agents.data_insights_agent.agent import PredictiveAgent
-from app.agents.data_insights_agent.graph_loader import GraphLoader
-from app.models import descriptive_analysis
-
+from app.api import startup
+from app.pipelines.jobs import manager as job_manager
 
+# pandas, los pipelines, el modelo (xgboost, sklearn, mapie), las gráficas
+# (matplotlib, seaborn) y el agente (openai) se importan dentro de cada
+# endpoint, como las etapas del runner: un worker nuevo arranca y responde
+# /health sin cargarlos. startup.warm_up() puede precargarlos en segundo plano.
 
 router = APIRouter()
 
 UPLOAD_DIR = "data"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
 
 def get_agent():
     """Crea una instancia del agente bajo demanda"""
     try:
+        from app.agents.data_insights_agent.agent import PredictiveAgent
         return PredictiveAgent()
     except FileNotFoundError as e:
         raise HTTPException(
@@ -40,15 +42,91 @@ def get_agent():
 def read_root():
     return {"message": "¡Bienvenido a la API de American Tactical!"}
 
+@router.get("/health")
+def health():
+    """Estado del worker con su reporte de arranque; no carga pandas ni el modelo."""
+    return {"status": "ok", "startup": startup.startup_report()}
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+_umask: Optional[int] = None
+
+def _upload_mode(dest_path: str) -> int:
+    global _umask
+    if os.path.exists(dest_path):
+        return os.stat(dest_path).st_mode & 0o777
+    if _umask is None:
+        # os.umask solo se puede leer cambiándolo; se lee una vez y se restaura
+        _umask = os.umask(0o022)
+        os.umask(_umask)
+    return 0o666 & ~_umask
+
+async def _store_upload(file: UploadFile, dest_path: str) -> dict:
+    """
+    Guarda el archivo por bloques en un temporal del mismo directorio, calculando
+    su sha256 al vuelo, y lo renombra atómicamente sobre el destino.
+    """
+    from app.pipelines.ingest import file_fingerprint, register_fingerprint
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path) or ".", prefix=".upload-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+
+        sha256 = digest.hexdigest()
+        # Si el contenido es idéntico se conserva el archivo actual (y su mtime)
+        unchanged = os.path.exists(dest_path) and await run_in_threadpool(file_fingerprint, dest_path) == sha256
+        if unchanged:
+            os.unlink(tmp_path)
+        else:
+            # mkstemp crea el temporal con permisos 0600; se dejan los del archivo
+            # reemplazado o, si es nuevo, los que daría un open() normal
+            os.chmod(tmp_path, _upload_mode(dest_path))
+            os.replace(tmp_path, dest_path)
+            register_fingerprint(dest_path, sha256)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return {"sha256": sha256, "size": size, "unchanged": unchanged}
+
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    return JSONResponse(content={"message": f"{file.filename} cargado exitosamente."})
+    filename = os.path.basename(file.filename)
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    stored = await _store_upload(file, file_path)
+    return JSONResponse(content={
+        "message": f"{filename} cargado exitosamente.",
+        "sha256": stored["sha256"],
+        "size": stored["size"],
+        "unchanged": stored["unchanged"]
+    })
+
+async def _save_upload_to_temp(file: UploadFile, suffix: str, temp_paths: List[str]) -> str:
+    """Copia el archivo subido a un temporal por bloques, sin cargarlo completo en memoria."""
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    temp_paths.append(temp_file.name)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            await run_in_threadpool(temp_file.write, chunk)
+    finally:
+        temp_file.close()
+    return temp_file.name
 
 @router.post("/merge-excel/")
-async def merge_excel(files: List[UploadFile] = File(...)):
+async def merge_excel(files: List[UploadFile] = File(...), output_format: str = "csv"):
     if len(files) < 2:
         return {"error": "At least 2 Excel files are required to merge."}
 
@@ -60,19 +138,16 @@ async def merge_excel(files: List[UploadFile] = File(...)):
             suffix = os.path.splitext(file.filename)[1]
             name_no_ext = os.path.splitext(file.filename)[0]
             original_names.append(name_no_ext)
-
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-            temp_file.write(await file.read())
-            temp_file.close()
-            temp_paths.append(temp_file.name)
+            await _save_upload_to_temp(file, suffix, temp_paths)
 
         short_name = "_and_".join(original_names[:2])[:50]
-        output_filename = f"merged_{short_name}.csv"
+        output_filename = f"merged_{short_name}.{output_format}"
         output_path = os.path.join("output", output_filename)
         os.makedirs("output", exist_ok=True)
 
-        # Aquí sí se llama correctamente la función de procesamiento
-        merged_file = merge_excel_files(temp_paths, output_path)
+        # La lectura de los libros corre en un pool de procesos, fuera del event loop
+        from app.pipelines.merge_files import merge_excel_files
+        merged_file = await run_in_threadpool(merge_excel_files, temp_paths, output_path, output_format)
 
         return JSONResponse(content={
             "message": "Files merged successfully.",
@@ -87,53 +162,170 @@ async def merge_excel(files: List[UploadFile] = File(...)):
             os.unlink(path)
 
 @router.get("/process-imports/")
-def run_process_imports():
+def run_process_imports(chunksize: Optional[int] = None):
+    from app.pipelines.parsing import load_report
+    from app.pipelines.process_imports import process_imports
     try:
-        output_file = process_imports()
+        output_file = process_imports(chunksize=chunksize)
         return {
             "message": "Imports processed successfully.",
-            "output_file": output_file
+            "output_file": output_file,
+            "parse_report": load_report("imports")
         }
     except Exception as e:
         return {"error": str(e)}
-    
-from app.pipelines.process_sales import process_sales
 
 @router.get("/process-sales/")
-def run_process_sales():
+def run_process_sales(incremental: bool = False, chunksize: Optional[int] = None):
+    from app.pipelines.parsing import load_report
+    from app.pipelines.process_sales import process_sales
     try:
-        output_file = process_sales()
+        output_file = process_sales(incremental=incremental, chunksize=chunksize)
         return {
             "message": "Sales processed successfully.",
-            "output_file": output_file
+            "output_file": output_file,
+            "parse_report": load_report("sales")
         }
     except Exception as e:
         return {"error": str(e)}
 
 @router.get("/process-stock/")
-def run_process_stock():
+def run_process_stock(chunksize: Optional[int] = None):
+    from app.pipelines.parsing import load_report
+    from app.pipelines.process_stock import process_stock
     try:
-        output_file = process_stock()
+        output_file = process_stock(chunksize=chunksize)
         return {
             "message": "Stock processed successfully.",
-            "output_file": output_file
+            "output_file": output_file,
+            "parse_report": load_report("stock")
         }
     except Exception as e:
         return {"error": str(e)}
     
+@router.get("/stock/simulate")
+def run_stock_simulation(n_scenarios: int = 5000, service_level: float = 0.95, top: int = 20):
+    """Simulación Monte Carlo de quiebres de stock; devuelve los productos con mayor riesgo."""
+    import pandas as pd
+    from app.pipelines.simulate_stock import simulate_stock
+    try:
+        output_file = simulate_stock(n_scenarios=n_scenarios, service_level=service_level)
+        result = pd.read_csv(output_file)
+        at_risk = result.sort_values('stockout_probability', ascending=False).head(top)
+        return {
+            "message": "Stock simulation completed.",
+            "output_file": output_file,
+            "n_products": len(result),
+            "reorder_now": int(result['reorder_now'].sum()),
+            "at_risk": at_risk.to_dict(orient="records")
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        return {"error": str(e)}
+
+@router.get("/pipeline/run")
+def run_full_pipeline(force: bool = False):
+    """Ejecuta el pipeline completo como grafo de dependencias y devuelve los tiempos por etapa."""
+    from app.pipelines.runner import run_pipeline
+    try:
+        result = run_pipeline(force=force)
+        return {
+            "message": "Pipeline executed.",
+            "stages": result["stages"],
+            "total_seconds": result["total_seconds"]
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
 @router.get("/run-model/")
-def run_forecasting_model():
+def run_forecasting_model(conformal: Optional[str] = None, tune: bool = False, n_trials: int = 20,
+                          incremental: bool = False):
+    """
+    Entrena el modelo. Sin `conformal` usa cv_plus en un entrenamiento completo y
+    prefit en modo incremental (el único que permite recalibrar el modelo actualizado).
+    """
+    from app.models.predictor import run_model
     try:
-        result = run_model()
+        result = run_model(conformal_strategy=conformal, tune=tune, n_trials=n_trials, incremental=incremental)
         return {
             "message": "Model executed successfully.",
             "mae": result["mae"],
             "rmse": result["rmse"],
             "csv_file": result["csv"],
-            "plot_image": result["image"]
+            "plot_image": result["image"],
+            "model_version": result["model_version"],
+            "mode": result["mode"],
+            "fallback_reason": result["fallback_reason"],
+            "update": result["update"],
+            "training": result["training"],
+            "params": result["params"],
+            "tuning": result["tuning"],
+            "conformal": result["conformal"]
         }
     except Exception as e:
         return {"error": str(e)}
+
+@router.get("/model/training-history")
+def get_training_history(limit: int = 50):
+    """Historial de entrenamientos completos e incrementales con sus tiempos."""
+    from app.models.artifacts import load_training_history
+    return {"history": load_training_history(limit=limit)}
+
+@router.get("/model/conformal-benchmark")
+def run_conformal_benchmark(strategies: Optional[str] = None, alpha: float = 0.1):
+    """
+    Compara tiempo de ajuste y cobertura de las estrategias conformales (separadas
+    por comas). Por defecto cv_plus, split y prefit; jackknife_plus tarda minutos,
+    así que solo corre si se pide, idealmente con POST /jobs/conformal_benchmark.
+    """
+    from app.models.predictor import benchmark_conformal_strategies
+    try:
+        selected = [s.strip() for s in strategies.split(",") if s.strip()] if strategies else None
+        return {"results": benchmark_conformal_strategies(strategies=selected, alpha=alpha)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        return {"error": str(e)}
+
+class PredictRequest(BaseModel):
+    products: List[Union[int, str]] = []
+    rows: List[Dict[str, Optional[float]]] = []
+    alpha: Optional[float] = None
+
+@router.post("/predict")
+def predict_products(request: PredictRequest):
+    """Predice con el modelo ya entrenado (sin reentrenar) para productos o filas de features."""
+    if not request.products and not request.rows:
+        raise HTTPException(status_code=400, detail="Envía al menos un producto o una fila de features.")
+    from app.models.inference import predict
+    try:
+        return predict(products=request.products, rows=request.rows, alpha=request.alpha)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al predecir: {str(e)}")
+
+@router.post("/predict/batch")
+async def predict_batch(request: PredictRequest):
+    """
+    Puntúa muchos productos o filas a la vez. Las solicitudes concurrentes se
+    agrupan en micro-lotes y se puntúan con una sola llamada por modelo y alpha.
+    """
+    if not request.products and not request.rows:
+        raise HTTPException(status_code=400, detail="Envía al menos un producto o una fila de features.")
+    from app.models.inference import batcher
+    try:
+        future = batcher.submit(products=request.products, rows=request.rows, alpha=request.alpha)
+        return await asyncio.wrap_future(future)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al predecir: {str(e)}")
     
 # Clase para recibir la pregunta en el body del request
 class QuestionRequest(BaseModel):
@@ -155,6 +347,7 @@ def ask_agent(request: QuestionRequest):
 @router.get("/graph")
 def get_prediction_graph():
     """Obtiene la gráfica de predicciones en formato base64"""
+    from app.agents.data_insights_agent.graph_loader import GraphLoader
     try:
         graph_loader = GraphLoader()
         base64_data_url = graph_loader.get_base64_data_url()
@@ -168,45 +361,200 @@ def get_prediction_graph():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener la gráfica: {str(e)}")
 
+# Sin ?v= el cliente revalida cada vez (304 si no cambió); con ?v= igual a la versión vigente la URL es inmutable
+PNG_CACHE_CONTROL = "no-cache"
+PNG_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match usa comparación débil: W/"x" equivale a "x"
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+def png_response(request: Request, version: str, get_path) -> Response:
+    """
+    PNG binario servido directo desde disco con ETag fuerte. Si el cliente ya
+    tiene esa versión responde 304 sin tocar el archivo; `get_path` solo se
+    llama (y la gráfica solo se genera) cuando hay que enviar el cuerpo.
+    """
+    etag = f'"{version}"'
+    immutable = request.query_params.get("v") == version
+    headers = {"ETag": etag, "Cache-Control": PNG_IMMUTABLE_CACHE_CONTROL if immutable else PNG_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    # get_path puede generar la gráfica: sus errores se responden como los del modo de datos
+    try:
+        path = get_path()
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Faltan datos para la gráfica: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al generar la gráfica: {e}")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Gráfica no encontrada.")
+    return FileResponse(path, media_type="image/png", headers=headers)
+
+@router.get("/graph/png")
+def get_prediction_graph_png(request: Request):
+    """Gráfica de predicciones como image/png, con ETag y soporte de 304."""
+    from app.agents.data_insights_agent.graph_loader import GraphLoader
+    graph_loader = GraphLoader()
+    if not graph_loader.exists():
+        raise HTTPException(status_code=404, detail="Gráfica no encontrada. Ejecuta primero el modelo predictivo.")
+    return png_response(request, graph_loader.version(), lambda: graph_loader.path)
+
 @router.get("/descriptive/graphs")
 def get_descriptive_graphs():
     """Devuelve el catálogo de gráficas descriptivas disponibles."""
+    from app.models import descriptive_analysis
     return descriptive_analysis.get_descriptive_graphs_catalog()
 
 @router.get("/descriptive/graph/{graph_id}")
 def get_descriptive_graph(graph_id: str):
     """Devuelve la imagen base64 de la gráfica descriptiva solicitada."""
+    from app.models import descriptive_analysis
     try:
         graph_base64 = descriptive_analysis.get_graph_by_id(graph_id)
         return {"graph_id": graph_id, "image_base64": graph_base64}
     except Exception as e:
         return {"error": str(e)}
 
+@router.get("/descriptive/graph/{graph_id}/png")
+def get_descriptive_graph_png(graph_id: str, request: Request):
+    """Gráfica descriptiva como image/png; el ETag es la versión de los datos de la gráfica."""
+    from app.models import descriptive_analysis
+    try:
+        version = descriptive_analysis.graph_version(graph_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Faltan datos para la gráfica: {e}")
+    return png_response(request, version, lambda: descriptive_analysis.render_graph(graph_id)[2])
+
+@router.get("/descriptive/graph/{graph_id}/data")
+def get_descriptive_graph_data(graph_id: str):
+    """Modo de datos: la serie agregada de la gráfica en JSON, para dibujarla en el cliente."""
+    from app.models import descriptive_analysis
+    try:
+        return descriptive_analysis.get_graph_series(graph_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Faltan datos para la gráfica: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/descriptive/data")
+def get_descriptive_data():
+    """Series de todas las gráficas del catálogo en una sola respuesta."""
+    from app.models import descriptive_analysis
+    return {"graphs": descriptive_analysis.get_all_graph_series()}
+
+def _split_param(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+@router.get("/descriptive/query")
+def query_descriptive_cube(measures: Optional[str] = None, group_by: Optional[str] = None,
+                           product: Optional[List[str]] = Query(None), category: Optional[List[str]] = Query(None),
+                           brand: Optional[List[str]] = Query(None), start: Optional[str] = None,
+                           end: Optional[str] = None, granularity: str = "month",
+                           sort: Optional[str] = None, top: Optional[int] = Query(None, ge=1)):
+    """
+    Consulta el cubo mes x producto x categoría x marca. measures y group_by van
+    separados por comas; product, category y brand se repiten una vez por valor
+    (?product=A&product=B), porque hay descripciones que llevan comas. start y
+    end son meses AAAA-MM.
+    """
+    from app.models import descriptive_analysis
+    try:
+        start_time = time.perf_counter()
+        filters = {name: values for name, values in
+                   (("product", product), ("category", category), ("brand", brand)) if values}
+        result = descriptive_analysis.query_cube(
+            measures=_split_param(measures), group_by=_split_param(group_by), filters=filters,
+            start=start, end=end, granularity=granularity, sort=sort, top=top,
+        )
+        for column in result.columns:
+            if column in descriptive_analysis.CUBE_DIMENSIONS:
+                result[column] = result[column].astype(str)
+        return {
+            "data_version": descriptive_analysis.cube_data_version(),
+            "row_count": len(result),
+            "rows": result.to_dict(orient="records"),
+            "seconds": round(time.perf_counter() - start_time, 4)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        return {"error": str(e)}
+
 @router.get("/descriptive/run-analysis")
 def run_descriptive_analysis():
     """Ejecuta el análisis descriptivo completo y genera todas las gráficas."""
+    from app.models import descriptive_analysis
     try:
-        # Generar todas las gráficas del catálogo
-        graphs_generated = []
-        for graph in descriptive_analysis.get_descriptive_graphs_catalog():
-            try:
-                graph_base64 = descriptive_analysis.get_graph_by_id(graph['id'])
-                graphs_generated.append({
-                    "id": graph['id'],
-                    "name": graph['name'],
-                    "status": "success"
-                })
-            except Exception as e:
-                graphs_generated.append({
-                    "id": graph['id'],
-                    "name": graph['name'],
-                    "status": "error",
-                    "error": str(e)
-                })
-        
+        start = time.perf_counter()
+        graphs_generated = descriptive_analysis.run_descriptive_analysis()
         return {
             "message": "Análisis descriptivo ejecutado",
-            "graphs_generated": graphs_generated
+            "graphs_generated": graphs_generated,
+            "total_seconds": round(time.perf_counter() - start, 4)
         }
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+@router.get("/descriptive/run-analysis/stream")
+def stream_descriptive_analysis():
+    """Igual que run-analysis, pero envía una línea NDJSON por gráfica en cuanto termina."""
+    from app.models import descriptive_analysis
+    def lines():
+        start = time.perf_counter()
+        try:
+            for status in descriptive_analysis.iter_descriptive_analysis():
+                yield json.dumps(status, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+            return
+        yield json.dumps({"done": True, "total_seconds": round(time.perf_counter() - start, 4)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+class JobRequest(BaseModel):
+    params: Dict[str, Any] = {}
+    backend: Optional[str] = None
+
+@router.post("/jobs/{kind}")
+def submit_job(kind: str, request: Optional[JobRequest] = None):
+    """
+    Encola un trabajo en segundo plano y devuelve su ID de inmediato. Si ya hay
+    uno idéntico en cola o en ejecución, devuelve ese mismo.
+    """
+    request = request or JobRequest()
+    try:
+        job, deduplicated = job_manager.submit(kind, request.params, backend=request.backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**job.to_dict(include_result=False), "deduplicated": deduplicated}
+
+@router.get("/jobs")
+def list_jobs():
+    """Lista los trabajos recientes (sin sus resultados)."""
+    return {"kinds": job_manager.kinds(), "jobs": [job.to_dict(include_result=False) for job in job_manager.list()]}
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Estado, avance, tiempos y resultado de un trabajo."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo {job_id} no encontrado.")
+    return job.to_dict()
+
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Cancela un trabajo en cola, o detiene uno en ejecución en su siguiente punto de control."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo {job_id} no encontrado.")
+    return {**job.to_dict(include_result=False), "cancel_requested": job.cancel_requested}
@@ -0,0 +1,89 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Bibliotecas pesadas que la API solo carga al usarse; el reporte indica cuáles ya están en memoria
+HEAVY_LIBRARIES = ('pandas', 'numpy', 'sklearn', 'xgboost', 'mapie', 'matplotlib', 'seaborn', 'openai')
+# Módulos que la precarga importa, en orden: el cubo y las gráficas primero, el modelo después
+WARMUP_MODULES = (
+    'app.models.descriptive_analysis',
+    'app.models.inference',
+    'app.models.predictor',
+    'app.agents.data_insights_agent.agent',
+)
+# API_WARMUP=1 precarga los módulos en segundo plano al arrancar; por defecto los workers quedan livianos
+WARMUP_ENV = 'API_WARMUP'
+
+_report: Dict = {
+    'import_seconds': None,
+    'startup_seconds': None,
+    'warmup': {'enabled': False, 'status': 'disabled', 'seconds': None, 'modules': {}, 'error': None},
+}
+_started_at = time.time()
+
+
+def record_import(seconds: float) -> None:
+    _report['import_seconds'] = round(seconds, 4)
+
+
+def record_startup(seconds: float) -> None:
+    _report['startup_seconds'] = round(seconds, 4)
+
+
+def warmup_enabled() -> bool:
+    return os.getenv(WARMUP_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def warm_up(modules: Tuple[str, ...] = WARMUP_MODULES) -> None:
+    """Importa los módulos pesados uno por uno y registra cuánto tardó cada uno."""
+    warmup = _report['warmup']
+    warmup.update(status='running', modules={}, error=None)
+    start = time.perf_counter()
+    try:
+        for name in modules:
+            module_start = time.perf_counter()
+            importlib.import_module(name)
+            warmup['modules'][name] = round(time.perf_counter() - module_start, 4)
+        warmup['status'] = 'done'
+    except Exception as e:
+        warmup.update(status='failed', error=str(e))
+    finally:
+        warmup['seconds'] = round(time.perf_counter() - start, 4)
+
+
+def start_warm_up() -> Optional[threading.Thread]:
+    """Lanza la precarga en un hilo si API_WARMUP está activo; las peticiones se atienden mientras tanto."""
+    if not warmup_enabled():
+        return None
+    _report['warmup']['enabled'] = True
+    thread = threading.Thread(target=warm_up, name='api-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def _max_rss_mb() -> Optional[float]:
+    # resource solo existe en POSIX; en Windows no se reporta la memoria
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def startup_report() -> Dict:
+    """Tiempos de arranque, estado de la precarga y bibliotecas pesadas ya cargadas en este worker."""
+    warmup = {**_report['warmup'], 'modules': dict(_report['warmup']['modules'])}
+    return {
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.time() - _started_at, 1),
+        'import_seconds': _report['import_seconds'],
+        'startup_seconds': _report['startup_seconds'],
+        'max_rss_mb': _max_rss_mb(),
+        'loaded_libraries': [name for name in HEAVY_LIBRARIES if name in sys.modules],
+        'warmup': warmup,
+    }
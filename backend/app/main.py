@@ -1,8 +1,27 @@
+import time
+from contextlib import asynccontextmanager
+
+_import_start = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.api import startup
 from app.api.routes import router as api_router
 
-app = FastAPI(title="American Tactical API")
+startup.record_import(time.perf_counter() - _import_start)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.record_startup(time.perf_counter() - _import_start)
+    startup.start_warm_up()
+    report = startup.startup_report()
+    print(f"🚀 API lista en {report['startup_seconds']:.2f} s (imports {report['import_seconds']:.2f} s, "
+          f"{report['max_rss_mb']} MB, precarga: {report['warmup']['status']})")
+    yield
+
+
+app = FastAPI(title="American Tactical API", lifespan=lifespan)
 
 # Habilitar CORS (para permitir peticiones desde el frontend o Postman)
 app.add_middleware(
@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+
+ARTIFACTS_DIR = os.path.join("output", "models")
+LATEST_PATH = os.path.join(ARTIFACTS_DIR, "LATEST")
+TUNED_PARAMS_PATH = os.path.join(ARTIFACTS_DIR, "tuned_params.json")
+HISTORY_PATH = os.path.join(ARTIFACTS_DIR, "training_history.jsonl")
+METADATA_FILE = "metadata.json"
+KEEP_VERSIONS = 3
+
+_lock = threading.Lock()
+# (versión, artefactos cargados) en memoria
+_loaded: Optional[tuple] = None
+
+
+def _new_version() -> str:
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def save_artifacts(models: Dict[str, object], metadata: Dict) -> str:
+    """
+    Guarda los modelos entrenados (uno por archivo joblib) y su metadata
+    (features, métricas, parámetros) bajo una versión nueva y la marca como activa.
+    """
+    version = _new_version()
+    version_dir = os.path.join(ARTIFACTS_DIR, version)
+    tmp_dir = f"{version_dir}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    for name, model in models.items():
+        joblib.dump(model, os.path.join(tmp_dir, f"{name}.joblib"))
+    metadata = {
+        **metadata,
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "models": sorted(models),
+    }
+    with open(os.path.join(tmp_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.replace(tmp_dir, version_dir)
+
+    tmp_latest = f"{LATEST_PATH}.tmp"
+    with open(tmp_latest, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_latest, LATEST_PATH)
+
+    _prune_old_versions(keep=version)
+    return version
+
+
+def _prune_old_versions(keep: str) -> None:
+    versions = sorted(
+        name for name in os.listdir(ARTIFACTS_DIR)
+        if os.path.isdir(os.path.join(ARTIFACTS_DIR, name)) and not name.endswith(".tmp")
+    )
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(ARTIFACTS_DIR, name), ignore_errors=True)
+
+
+def save_tuned_params(configs: Dict) -> None:
+    """Guarda la mejor configuración por target para que los entrenamientos siguientes la reutilicen."""
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    tmp_path = f"{TUNED_PARAMS_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(configs, f, indent=2)
+    os.replace(tmp_path, TUNED_PARAMS_PATH)
+
+
+def load_tuned_params() -> Optional[Dict]:
+    if not os.path.exists(TUNED_PARAMS_PATH):
+        return None
+    with open(TUNED_PARAMS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def append_training_history(entry: Dict) -> None:
+    """Agrega una línea al historial de entrenamientos (completo o incremental) con sus tiempos."""
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    with open(HISTORY_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"at": datetime.now().isoformat(timespec="seconds"), **entry}, default=str) + "\n")
+
+
+def load_training_history(limit: int = 50) -> List[Dict]:
+    if not os.path.exists(HISTORY_PATH):
+        return []
+    with open(HISTORY_PATH, "r", encoding="utf-8") as f:
+        lines = f.readlines()[-limit:]
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def latest_version() -> Optional[str]:
+    if not os.path.exists(LATEST_PATH):
+        return None
+    with open(LATEST_PATH, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def load_metadata(version: Optional[str] = None) -> Optional[Dict]:
+    version = version or latest_version()
+    if version is None:
+        return None
+    path = os.path.join(ARTIFACTS_DIR, version, METADATA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_active_artifacts() -> Dict:
+    """
+    Devuelve los artefactos de la versión activa, cargándolos del disco solo la
+    primera vez (o cuando se entrena una versión nueva).
+    """
+    global _loaded
+    version = latest_version()
+    if version is None:
+        raise FileNotFoundError("No hay modelos entrenados. Ejecuta primero el modelo predictivo.")
+
+    with _lock:
+        if _loaded is None or _loaded[0] != version:
+            metadata = load_metadata(version)
+            if metadata is None:
+                raise FileNotFoundError(f"No se encontró la metadata del modelo {version}.")
+            version_dir = os.path.join(ARTIFACTS_DIR, version)
+            models = {
+                name: joblib.load(os.path.join(version_dir, f"{name}.joblib"))
+                for name in metadata["models"]
+            }
+            _loaded = (version, {"metadata": metadata, **models})
+        return _loaded[1]
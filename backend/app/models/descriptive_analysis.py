@@ -1,159 +1,625 @@
+import multiprocessing
 import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 import base64
+import hashlib
+import math
 from io import BytesIO
-import matplotlib
-matplotlib.use('Agg')
+from app.pipelines.parsing import NUMBER_FORMATS, DateFormat, parse_dates, parse_numeric
+from app.pipelines.ingest import file_fingerprint, normalize_descriptions, read_derived, read_source
+from app.pipelines.processes import process_context
+from app.models.graph_cache import GraphCache, graph_key
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'data')
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'output', 'descriptive')
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Catálogo de gráficas descriptivas
+# Gráficas renderizadas, en disco bajo OUTPUT_DIR y en memoria
+graph_cache = GraphCache(OUTPUT_DIR)
+
+# Formatos declarados de los archivos fuente
+IMPORTS_DATE_FORMAT = DateFormat('%m/%d/%Y')
+SALES_DATE_FORMAT = DateFormat('%d/%m/%Y')
+NUMBER_FORMAT = NUMBER_FORMATS['es_MX']
+
+# Catálogo de gráficas descriptivas. "generator" dibuja el PNG y "data" devuelve la serie que
+# grafica (modo de datos para el frontend). "inputs" son los archivos de data/ que lee cada
+# gráfica y "version" se sube cuando cambia cómo se calcula o se dibuja (ambos forman la clave de caché)
 DESCRIPTIVE_GRAPHS = [
     {
         "id": "trend_imports",
         "name": "Tendencia histórica de importaciones",
         "description": "Muestra la evolución de las importaciones a lo largo del tiempo.",
-        "generator": "generate_trend_imports"
+        "generator": "generate_trend_imports",
+        "data": "data_trend_imports",
+        "chart": {"type": "line", "label_axis": "Fecha", "value_axis": "Cantidad importada"},
+        "inputs": ["imports.csv"],
+        "version": 1
     },
     {
         "id": "top_imported_products",
         "name": "Top 5 productos más importados (último trimestre)",
         "description": "Presenta los productos más importados en el último trimestre.",
-        "generator": "generate_top_imported_products"
+        "generator": "generate_top_imported_products",
+        "data": "data_top_imported_products",
+        "chart": {"type": "bar", "label_axis": "Producto", "value_axis": "Cantidad importada"},
+        "inputs": ["imports.csv"],
+        "version": 2
     },
     {
         "id": "logistics_cost_trend",
         "name": "Tendencia del costo logístico",
         "description": "Evolución del costo logístico a lo largo del tiempo.",
-        "generator": "generate_logistics_cost_trend"
+        "generator": "generate_logistics_cost_trend",
+        "data": "data_logistics_cost_trend",
+        "chart": {"type": "line", "label_axis": "Fecha", "value_axis": "Costo logístico"},
+        "inputs": ["imports.csv"],
+        "version": 1
     },
     {
         "id": "low_rotation_high_margin",
         "name": "Producto con menor rotación y mayor margen",
         "description": "Identifica el producto con menor rotación pero mayor margen de ganancia.",
-        "generator": "generate_low_rotation_high_margin"
+        "generator": "generate_low_rotation_high_margin",
+        "data": "data_low_rotation_high_margin",
+        "chart": {"type": "bar", "label_axis": "Producto", "value_axis": "Margen"},
+        "inputs": ["stock.csv", "sales.csv"],
+        "version": 1
     },
 ]
 
+# Pool de procesos para renderizar: pyplot tiene estado global, así que no se usan hilos
+RENDER_WORKERS = max(1, min(len(DESCRIPTIVE_GRAPHS), os.cpu_count() or 1))
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+# Columnas que usan las gráficas, por archivo: nombre lógico -> candidatos (como en find_column),
+# y cuáles se convierten a fecha o a número al cargar
+FRAME_SPECS = {
+    'imports.csv': {
+        'columns': {
+            'fecha': ['fecha', 'Fecha', 'FECHA', 'date', 'Date'],
+            'cantidad': ['cantidad', 'Cantidad', 'CANTIDAD'],
+            'producto': ['producto', 'Producto', 'PRODUCTO', 'Descripcion producto'],
+            'costo_logistico': ['costo_logistico', 'Costo_logistico', 'CostoLogistico', 'costo', 'Costo', 'GASTOS LOGISTICOS MXN'],
+            'costo_total': ['COSTO TOTAL EN MEX'],
+            'categoria': ['CATEGORIA'],
+            'marca': ['MARCA'],
+        },
+        'dates': {'fecha': IMPORTS_DATE_FORMAT},
+        'numeric': ['cantidad', 'costo_logistico', 'costo_total'],
+    },
+    'stock.csv': {
+        'columns': {
+            'producto': ['producto', 'Producto', 'PRODUCTO', 'Descripcion producto'],
+            'existencias': ['cantidad', 'Cantidad', 'CANTIDAD', 'Existencias '],
+            'costo_promedio': ['Costo promedio '],
+            'marca': ['Marca  ', 'Marca ', 'Marca', 'MARCA'],
+        },
+        'dates': {},
+        'numeric': ['existencias', 'costo_promedio'],
+    },
+    'sales.csv': {
+        'columns': {
+            'fecha': ['Fecha elab', 'fecha', 'Fecha'],
+            'producto': ['producto', 'Producto', 'PRODUCTO', 'Descripcion producto'],
+            'piezas': ['Piezas'],
+            'precio': ['Precio'],
+            'costo': ['Costo'],
+        },
+        'dates': {'fecha': SALES_DATE_FORMAT},
+        'numeric': ['piezas', 'precio', 'costo'],
+    },
+}
+
+@dataclass
+class ParsedFrame:
+    """Archivo de data/ ya leído, con sus columnas resueltas y convertidas. Es compartido: no modificar."""
+    df: pd.DataFrame
+    columns: Dict[str, Optional[str]]
+    candidates: Dict[str, List[str]]
+
+    def col(self, name: str) -> str:
+        if self.columns.get(name) is None:
+            raise ValueError(f"No se encontró ninguna de las columnas: {self.candidates[name]}")
+        return self.columns[name]
+
+    def has(self, name: str) -> bool:
+        return self.columns.get(name) is not None
+
 def load_data(filename: str) -> pd.DataFrame:
-    path = os.path.join(DATA_DIR, filename)
-    return pd.read_csv(path)
+    # Detección de separador y codificación, y caché por hash del contenido, compartidas con los pipelines
+    return read_source(os.path.join(DATA_DIR, filename))
 
-def save_plot_to_base64(fig) -> str:
+def _parse_frame(filename: str, df: pd.DataFrame) -> ParsedFrame:
+    spec = FRAME_SPECS.get(filename, {'columns': {}, 'dates': {}, 'numeric': []})
+    columns = {}
+    for name, candidates in spec['columns'].items():
+        try:
+            columns[name] = find_column(df, candidates)
+        except ValueError:
+            columns[name] = None
+    for name, date_format in spec['dates'].items():
+        if columns[name] is not None:
+            df[columns[name]] = parse_dates(df[columns[name]], date_format)
+    for name in spec['numeric']:
+        if columns[name] is not None:
+            df[columns[name]] = parse_numeric(df[columns[name]], NUMBER_FORMAT)
+    return ParsedFrame(df, columns, spec['columns'])
+
+def load_frame(filename: str) -> ParsedFrame:
+    """
+    Devuelve el archivo de data/ parseado una sola vez mientras su contenido no
+    cambie, compartido por todas las gráficas. Se guarda en la caché de
+    ingest, junto al DataFrame crudo del mismo hash.
+    """
+    return read_derived(os.path.join(DATA_DIR, filename), f"descriptive:{filename}",
+                        lambda df: _parse_frame(filename, df))
+
+def _pyplot():
+    """
+    matplotlib y seaborn se importan solo al renderizar: el catálogo, el modo
+    de datos y el cubo no los necesitan.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+def save_plot_to_png(fig) -> bytes:
+    plt, _ = _pyplot()
     buf = BytesIO()
     fig.savefig(buf, format='png', bbox_inches='tight')
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
     plt.close(fig)
+    return buf.getvalue()
+
+def png_to_data_url(png: bytes) -> str:
+    img_base64 = base64.b64encode(png).decode('utf-8')
     return f"data:image/png;base64,{img_base64}"
 
+def save_plot_to_base64(fig) -> str:
+    return png_to_data_url(save_plot_to_png(fig))
+
 def find_column(df, candidates):
     for col in df.columns:
         if col.lower() in [c.lower() for c in candidates]:
             return col
     raise ValueError(f"No se encontró ninguna de las columnas: {candidates}")
 
+# --- Cubo de agregados ---
+# Mes x producto x categoría x marca con las medidas de importaciones y ventas. Se construye
+# una vez por versión de los datos y las gráficas y /descriptive/query leen de él.
+CUBE_DIMENSIONS = ['month', 'product', 'category', 'brand']
+CUBE_MEASURES = ['quantity_imported', 'logistics_cost', 'landed_cost', 'import_lines',
+                 'units_sold', 'revenue', 'margin', 'sales_lines']
+CUBE_INPUTS = ['imports.csv', 'sales.csv', 'stock.csv']
+# Se sube cuando cambia cómo se construye el cubo
+CUBE_VERSION = 1
+CUBE_DIR = os.path.join(os.path.dirname(OUTPUT_DIR), '.cache')
+GRANULARITIES = {'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+NO_CATEGORY = 'SIN CATEGORIA'
+NO_BRAND = 'SIN MARCA'
+
+_cube: Optional[Tuple[str, pd.DataFrame]] = None
+_cube_lock = threading.Lock()
+
+def cube_data_version() -> str:
+    """Hash de la versión del cubo y del contenido de los archivos de entrada que existen."""
+    digest = hashlib.sha256(f"cube:{CUBE_VERSION}".encode('utf-8'))
+    for filename in CUBE_INPUTS:
+        path = os.path.join(DATA_DIR, filename)
+        if os.path.exists(path):
+            digest.update(f"{filename}:{file_fingerprint(path)}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _column_or(frame: ParsedFrame, name: str, default) -> pd.Series:
+    if frame.has(name):
+        return frame.df[frame.col(name)]
+    return pd.Series(default, index=frame.df.index)
+
+def _build_cube() -> pd.DataFrame:
+    imports = load_frame('imports.csv')
+    df = imports.df
+    parts = [pd.DataFrame({
+        'month': df[imports.col('fecha')].dt.to_period('M'),
+        'product': df[imports.col('producto')],
+        'category': _column_or(imports, 'categoria', pd.NA),
+        'brand': _column_or(imports, 'marca', pd.NA),
+        'quantity_imported': df[imports.col('cantidad')],
+        'logistics_cost': _column_or(imports, 'costo_logistico', 0.0),
+        'landed_cost': _column_or(imports, 'costo_total', 0.0),
+        'import_lines': 1,
+    })]
+
+    if os.path.exists(os.path.join(DATA_DIR, 'sales.csv')):
+        sales = load_frame('sales.csv')
+        sdf = sales.df
+        # Las ventas no traen categoría ni marca: se toman de las importaciones del mismo producto
+        # y, para la marca, del inventario si el producto no se ha importado
+        attributes = parts[0][['category', 'brand']].groupby(normalize_descriptions(parts[0]['product'])).first()
+        if os.path.exists(os.path.join(DATA_DIR, 'stock.csv')):
+            stock = load_frame('stock.csv')
+            if stock.has('producto') and stock.has('marca'):
+                stock_brands = stock.df[stock.col('marca')].groupby(
+                    normalize_descriptions(stock.df[stock.col('producto')])).first()
+                attributes = attributes.reindex(attributes.index.union(stock_brands.index))
+                attributes['brand'] = attributes['brand'].fillna(stock_brands.reindex(attributes.index))
+        keys = normalize_descriptions(sdf[sales.col('producto')])
+        piezas, precio, costo = sdf[sales.col('piezas')], sdf[sales.col('precio')], _column_or(sales, 'costo', 0.0)
+        parts.append(pd.DataFrame({
+            'month': sdf[sales.col('fecha')].dt.to_period('M'),
+            'product': sdf[sales.col('producto')],
+            'category': keys.map(attributes['category']),
+            'brand': keys.map(attributes['brand']),
+            'units_sold': piezas,
+            'revenue': piezas * precio,
+            'margin': piezas * (precio - costo),
+            'sales_lines': 1,
+        }))
+
+    rows = pd.concat(parts, ignore_index=True)
+    rows = rows[rows['month'].notna()]
+    rows['category'] = rows['category'].fillna(NO_CATEGORY).astype(str).str.strip()
+    rows['brand'] = rows['brand'].fillna(NO_BRAND).astype(str).str.strip()
+    for measure in CUBE_MEASURES:
+        if measure not in rows:
+            rows[measure] = 0.0
+    cube = rows.groupby(CUBE_DIMENSIONS, sort=True)[CUBE_MEASURES].sum().reset_index()
+    for dimension in ['product', 'category', 'brand']:
+        cube[dimension] = cube[dimension].astype('category')
+    return cube
+
+def _cube_path(version: str) -> str:
+    return os.path.join(CUBE_DIR, f"descriptive_cube-{version}.pkl")
+
+def load_cube() -> pd.DataFrame:
+    """
+    Devuelve el cubo de la versión actual de los datos: desde memoria, desde
+    output/.cache o construyéndolo (y guardándolo) si los datos cambiaron.
+    Es compartido: no modificar.
+    """
+    global _cube
+    version = cube_data_version()
+    with _cube_lock:
+        if _cube is not None and _cube[0] == version:
+            return _cube[1]
+        path = _cube_path(version)
+        if os.path.exists(path):
+            cube = pd.read_pickle(path)
+        else:
+            cube = _build_cube()
+            os.makedirs(CUBE_DIR, exist_ok=True)
+            # Solo se conserva la versión más reciente del cubo
+            for name in os.listdir(CUBE_DIR):
+                if name.startswith('descriptive_cube-') and name.endswith('.pkl'):
+                    os.remove(os.path.join(CUBE_DIR, name))
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            cube.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        _cube = (version, cube)
+        return cube
+
+def _to_period(value, label: str) -> pd.Period:
+    try:
+        return pd.Period(value, freq='M')
+    except (ValueError, TypeError):
+        raise ValueError(f"Fecha inválida para '{label}': {value}. Usa el formato AAAA-MM.")
+
+def query_cube(measures: Optional[List[str]] = None, group_by: Optional[List[str]] = None,
+               filters: Optional[Dict[str, List[str]]] = None, start=None, end=None,
+               granularity: str = 'month', sort: Optional[str] = None,
+               top: Optional[int] = None) -> pd.DataFrame:
+    """
+    Corte del cubo: filtra por dimensiones y rango de meses (AAAA-MM, inclusivo),
+    agrupa por las dimensiones pedidas (el mes se puede llevar a trimestre o año)
+    y suma las medidas. Con `sort` ordena de mayor a menor y `top` limita las filas.
+    """
+    measures = measures or CUBE_MEASURES
+    group_by = group_by or []
+    for name in measures:
+        if name not in CUBE_MEASURES:
+            raise ValueError(f"Medida desconocida: {name}. Opciones: {CUBE_MEASURES}")
+    for name in list(group_by) + list(filters or {}):
+        if name not in CUBE_DIMENSIONS:
+            raise ValueError(f"Dimensión desconocida: {name}. Opciones: {CUBE_DIMENSIONS}")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidad desconocida: {granularity}. Opciones: {list(GRANULARITIES)}")
+    if sort is not None and sort not in measures:
+        raise ValueError(f"Solo se puede ordenar por una de las medidas pedidas: {measures}")
+    if top is not None and top < 1:
+        raise ValueError("top debe ser al menos 1.")
+
+    cube = load_cube()
+    mask = pd.Series(True, index=cube.index)
+    if start is not None:
+        mask &= cube['month'] >= _to_period(start, 'start')
+    if end is not None:
+        mask &= cube['month'] <= _to_period(end, 'end')
+    for dimension, values in (filters or {}).items():
+        if values:
+            mask &= cube[dimension].isin(values)
+    data = cube[mask] if not mask.all() else cube
+
+    if not group_by:
+        return data[measures].sum().to_frame().T
+    keys = [data['month'].dt.asfreq(GRANULARITIES[granularity]) if name == 'month' else data[name]
+            for name in group_by]
+    result = data.groupby(keys, observed=True, sort=True)[measures].sum().reset_index()
+    if sort is not None:
+        result = result.sort_values(sort, ascending=False, kind='stable')
+    if top is not None:
+        result = result.head(top)
+    return result.reset_index(drop=True)
+
+# --- Datos de cada gráfica ---
+# Cada función devuelve un DataFrame cuya primera columna son las etiquetas (eje de categorías
+# o de fechas) y la segunda los valores; lo usan tanto la imagen como el modo de datos JSON.
+def data_trend_imports() -> pd.DataFrame:
+    df_group = query_cube(['quantity_imported', 'import_lines'], ['month'])
+    df_group = df_group[df_group['import_lines'] > 0]
+    return pd.DataFrame({'month': df_group['month'].dt.to_timestamp(),
+                         'quantity_imported': df_group['quantity_imported']})
+
+def data_top_imported_products() -> pd.DataFrame:
+    cube = load_cube()
+    # Último trimestre: los tres últimos meses con importaciones
+    last_month = cube.loc[cube['import_lines'] > 0, 'month'].max()
+    top_products = query_cube(['quantity_imported'], ['product'], start=last_month - 2, end=last_month,
+                              sort='quantity_imported', top=5)
+    top_products['product'] = top_products['product'].astype(str)
+    return top_products
+
+def data_logistics_cost_trend() -> pd.DataFrame:
+    df_group = query_cube(['logistics_cost', 'import_lines'], ['month'])
+    df_group = df_group[df_group['import_lines'] > 0]
+    return pd.DataFrame({'month': df_group['month'].dt.to_timestamp(),
+                         'logistics_cost': df_group['logistics_cost']})
+
+def data_low_rotation_high_margin() -> pd.DataFrame:
+    stock_frame, sales_frame = load_frame('stock.csv'), load_frame('sales.csv')
+    stock, sales = stock_frame.df, sales_frame.df
+    producto_col, cantidad_col = stock_frame.col('producto'), stock_frame.col('existencias')
+    # Suponiendo columnas: 'rotacion', 'margen'; si no existen se calculan sin tocar el DataFrame compartido
+    if 'rotacion' in stock.columns:
+        rotacion = stock['rotacion']
+    else:
+        ventas = sales.groupby(producto_col)[sales_frame.col('piezas')].sum()
+        stock_prom = stock.groupby(producto_col)[cantidad_col].mean()
+        rotacion = stock[producto_col].map((ventas / stock_prom).fillna(0))
+    if 'margen' in stock.columns:
+        margen = stock['margen']
+    elif sales_frame.has('precio') and stock_frame.has('costo_promedio'):
+        costo = stock[stock_frame.col('costo_promedio')]
+        margen = (sales[sales_frame.col('precio')].mean() - costo) / costo
+    else:
+        margen = 0
+    filtered = pd.DataFrame({'product': stock[producto_col], 'rotacion': rotacion, 'margen': margen}).dropna()
+    filtered = filtered.sort_values(['rotacion', 'margen'], ascending=[True, False]).head(1)
+    return filtered[['product', 'margen']]
+
 # --- Funciones de generación de gráficas ---
-def generate_trend_imports() -> str:
+def generate_trend_imports() -> bytes:
     """Genera la gráfica de tendencia histórica de importaciones."""
-    df = load_data('imports.csv')
-    fecha_col = find_column(df, ['fecha', 'Fecha', 'FECHA', 'date', 'Date'])
-    cantidad_col = find_column(df, ['cantidad', 'Cantidad', 'CANTIDAD'])
-    # Adaptar a tus columnas reales
-    fecha_col = find_column(df, [fecha_col, 'Date'])
-    cantidad_col = find_column(df, [cantidad_col, 'CANTIDAD'])
-    df[fecha_col] = pd.to_datetime(df[fecha_col])
-    df_group = df.groupby(df[fecha_col].dt.to_period('M'))[cantidad_col].sum().reset_index()
-    df_group[fecha_col] = df_group[fecha_col].dt.to_timestamp()
+    df_group = data_trend_imports()
+    plt, sns = _pyplot()
     fig, ax = plt.subplots(figsize=(8,4))
-    sns.lineplot(data=df_group, x=fecha_col, y=cantidad_col, marker='o', ax=ax)
+    sns.lineplot(data=df_group, x='month', y='quantity_imported', marker='o', ax=ax)
     ax.set_title('Tendencia histórica de importaciones')
     ax.set_xlabel('Fecha')
     ax.set_ylabel('Cantidad importada')
-    return save_plot_to_base64(fig)
+    return save_plot_to_png(fig)
 
-def generate_top_imported_products() -> str:
+def generate_top_imported_products() -> bytes:
     """Genera la gráfica de top 5 productos más importados en el último trimestre."""
-    df = load_data('imports.csv')
-    fecha_col = find_column(df, ['fecha', 'Fecha', 'FECHA', 'date', 'Date'])
-    cantidad_col = find_column(df, ['cantidad', 'Cantidad', 'CANTIDAD'])
-    producto_col = find_column(df, ['producto', 'Producto', 'PRODUCTO', 'Descripcion producto'])
-    # Adaptar a tus columnas reales
-    fecha_col = find_column(df, [fecha_col, 'Date'])
-    cantidad_col = find_column(df, [cantidad_col, 'CANTIDAD'])
-    producto_col = find_column(df, [producto_col, 'Descripcion producto'])
-    df[fecha_col] = pd.to_datetime(df[fecha_col])
-    last_quarter = df[fecha_col].max() - pd.DateOffset(months=3)
-    df_recent = df[df[fecha_col] >= last_quarter]
-    top_products = df_recent.groupby(producto_col)[cantidad_col].sum().nlargest(5).reset_index()
+    top_products = data_top_imported_products()
+    plt, sns = _pyplot()
     fig, ax = plt.subplots(figsize=(8,4))
-    sns.barplot(data=top_products, x=cantidad_col, y=producto_col, ax=ax, palette='Blues_d')
+    sns.barplot(data=top_products, x='quantity_imported', y='product', ax=ax, palette='Blues_d')
     ax.set_title('Top 5 productos más importados (último trimestre)')
     ax.set_xlabel('Cantidad importada')
     ax.set_ylabel('Producto')
-    return save_plot_to_base64(fig)
+    return save_plot_to_png(fig)
 
-def generate_logistics_cost_trend() -> str:
+def generate_logistics_cost_trend() -> bytes:
     """Genera la gráfica de tendencia del costo logístico."""
-    df = load_data('imports.csv')
-    fecha_col = find_column(df, ['fecha', 'Fecha', 'FECHA', 'date', 'Date'])
-    costo_col = find_column(df, ['costo_logistico', 'Costo_logistico', 'CostoLogistico', 'costo', 'Costo', 'GASTOS LOGISTICOS MXN'])
-    # Adaptar a tus columnas reales
-    fecha_col = find_column(df, [fecha_col, 'Date'])
-    costo_col = find_column(df, [costo_col, 'GASTOS LOGISTICOS MXN'])
-    df[fecha_col] = pd.to_datetime(df[fecha_col])
-    df_group = df.groupby(df[fecha_col].dt.to_period('M'))[costo_col].sum().reset_index()
-    df_group[fecha_col] = df_group[fecha_col].dt.to_timestamp()
+    df_group = data_logistics_cost_trend()
+    plt, sns = _pyplot()
     fig, ax = plt.subplots(figsize=(8,4))
-    sns.lineplot(data=df_group, x=fecha_col, y=costo_col, marker='o', ax=ax, color='orange')
+    sns.lineplot(data=df_group, x='month', y='logistics_cost', marker='o', ax=ax, color='orange')
     ax.set_title('Tendencia del costo logístico')
     ax.set_xlabel('Fecha')
     ax.set_ylabel('Costo logístico')
-    return save_plot_to_base64(fig)
+    return save_plot_to_png(fig)
 
-def generate_low_rotation_high_margin() -> str:
+def generate_low_rotation_high_margin() -> bytes:
     """Genera la gráfica del producto con menor rotación y mayor margen."""
-    stock = load_data('stock.csv')
-    sales = load_data('sales.csv')
-    producto_col = find_column(stock, ['producto', 'Producto', 'PRODUCTO', 'Descripcion producto'])
-    cantidad_col = find_column(stock, ['cantidad', 'Cantidad', 'CANTIDAD', 'Existencias '])
-    # Adaptar a tus columnas reales
-    producto_col = find_column(stock, [producto_col, 'Descripcion producto'])
-    cantidad_col = find_column(stock, [cantidad_col, 'Existencias '])
-    # Suponiendo columnas: 'rotacion', 'margen'
-    if 'rotacion' not in stock.columns:
-        ventas = sales.groupby(producto_col)['Piezas'].sum()
-        stock_prom = stock.groupby(producto_col)[cantidad_col].mean()
-        rotacion = (ventas / stock_prom).fillna(0)
-        stock['rotacion'] = stock[producto_col].map(rotacion)
-    if 'margen' not in stock.columns:
-        if 'Precio' in sales.columns and 'Costo promedio ' in stock.columns:
-            stock['margen'] = (sales['Precio'].mean() - stock['Costo promedio ']) / stock['Costo promedio ']
-        else:
-            stock['margen'] = 0
-    filtered = stock[[producto_col, 'rotacion', 'margen']].dropna()
-    filtered = filtered.sort_values(['rotacion', 'margen'], ascending=[True, False]).head(1)
+    filtered = data_low_rotation_high_margin()
+    plt, sns = _pyplot()
     fig, ax = plt.subplots(figsize=(6,2))
-    sns.barplot(data=filtered, x='margen', y=producto_col, ax=ax, color='green')
+    sns.barplot(data=filtered, x='margen', y='product', ax=ax, color='green')
     ax.set_title('Producto con menor rotación y mayor margen')
     ax.set_xlabel('Margen')
     ax.set_ylabel('Producto')
-    return save_plot_to_base64(fig)
+    return save_plot_to_png(fig)
 
 def get_descriptive_graphs_catalog() -> List[Dict]:
     """Devuelve el catálogo de gráficas descriptivas disponibles."""
     return DESCRIPTIVE_GRAPHS
 
-def get_graph_by_id(graph_id: str) -> str:
-    """Genera y devuelve la gráfica correspondiente al id."""
+def find_graph(graph_id: str) -> Dict:
     for graph in DESCRIPTIVE_GRAPHS:
         if graph['id'] == graph_id:
-            func = globals()[graph['generator']]
-            return func()
-    raise ValueError(f"Gráfica con id '{graph_id}' no encontrada.") 
\ No newline at end of file
+            return graph
+    raise ValueError(f"Gráfica con id '{graph_id}' no encontrada.")
+
+def graph_version(graph_id: str) -> str:
+    """Clave de contenido de la gráfica (id + versión del generador + hash de sus entradas)."""
+    graph = find_graph(graph_id)
+    return graph_key(graph_id, [os.path.join(DATA_DIR, f) for f in graph['inputs']], graph['version'])
+
+def render_graph(graph_id: str) -> Tuple[bytes, str, str]:
+    """
+    Devuelve (png, origen, ruta) de la gráfica. Solo se vuelve a generar si
+    cambiaron sus archivos de entrada o la versión del generador; origen es
+    'memory', 'disk' o 'miss'.
+    """
+    graph = find_graph(graph_id)
+    inputs = [os.path.join(DATA_DIR, filename) for filename in graph['inputs']]
+    return graph_cache.get_or_render(graph_id, inputs, graph['version'], globals()[graph['generator']])
+
+def get_graph_png(graph_id: str) -> bytes:
+    return render_graph(graph_id)[0]
+
+def get_graph_by_id(graph_id: str) -> str:
+    """Devuelve la gráfica correspondiente al id como data URL base64."""
+    return png_to_data_url(get_graph_png(graph_id))
+
+# Series ya calculadas por clave de gráfica (id + versión + hash de las entradas)
+_series: "OrderedDict[str, Dict]" = OrderedDict()
+_series_lock = threading.Lock()
+
+def _json_labels(values: pd.Series) -> List:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime('%Y-%m').tolist()
+    return values.astype(str).tolist()
+
+def get_graph_series(graph_id: str) -> Dict:
+    """
+    Modo de datos: la serie agregada de la gráfica en arreglos por columna, con
+    la metadata para dibujarla en el cliente. No usa matplotlib; se recalcula
+    solo cuando cambian las entradas.
+    """
+    graph = find_graph(graph_id)
+    key = graph_version(graph_id)
+    with _series_lock:
+        if key in _series:
+            _series.move_to_end(key)
+            return _series[key]
+
+    data = globals()[graph['data']]()
+    labels, values = data.iloc[:, 0], data.iloc[:, 1]
+    series = {
+        "graph_id": graph_id,
+        "title": graph['name'],
+        "description": graph['description'],
+        "chart": graph['chart'],
+        "labels": _json_labels(labels),
+        "values": [round(float(v), 4) if pd.notna(v) and math.isfinite(v) else None for v in values],
+        "data_version": key,
+    }
+    with _series_lock:
+        _series[key] = series
+        while len(_series) > 4 * len(DESCRIPTIVE_GRAPHS):
+            _series.popitem(last=False)
+    return series
+
+def get_all_graph_series() -> List[Dict]:
+    """Series de todo el catálogo; las que fallan se devuelven con su error."""
+    result = []
+    for graph in DESCRIPTIVE_GRAPHS:
+        try:
+            result.append(get_graph_series(graph['id']))
+        except Exception as e:
+            result.append({"graph_id": graph['id'], "title": graph['name'], "error": str(e)})
+    return result
+
+# --- Renderizado en paralelo ---
+def _init_render_worker(filenames: List[str]) -> None:
+    """Inicializa cada proceso del pool con matplotlib (backend Agg) y los archivos de entrada ya parseados."""
+    _pyplot()
+    for filename in filenames:
+        if os.path.exists(os.path.join(DATA_DIR, filename)):
+            load_frame(filename)
+
+def _render_worker(graph_id: str) -> Tuple[Optional[bytes], float, Optional[str]]:
+    start = time.perf_counter()
+    try:
+        png = globals()[find_graph(graph_id)['generator']]()
+        return png, time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, str(e)
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            filenames = sorted({filename for graph in DESCRIPTIVE_GRAPHS for filename in graph['inputs']})
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                               mp_context=process_context(),
+                                               initializer=_init_render_worker, initargs=(filenames,))
+        return _render_pool
+
+def _reset_render_pool() -> None:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+def _graph_status(graph: Dict, started: float, error: Optional[str] = None, **fields) -> Dict:
+    status = {"id": graph['id'], "name": graph['name'], "status": "error" if error else "success"}
+    status.update(fields)
+    status["elapsed_seconds"] = round(time.perf_counter() - started, 4)
+    if error:
+        status["error"] = error
+    return status
+
+def iter_descriptive_analysis() -> Iterator[Dict]:
+    """
+    Genera todas las gráficas del catálogo y devuelve el estado de cada una en
+    cuanto termina. Las que están en caché salen de inmediato; el resto se
+    renderiza en paralelo en el pool de procesos, así que el tiempo total se
+    acerca al de la gráfica más lenta.
+    """
+    started = time.perf_counter()
+    # Dentro de un proceso worker (trabajo en el backend de procesos) no se anida otro pool:
+    # ya corre aparte del servidor y al salir quedaría esperando a los hijos del pool
+    in_worker = multiprocessing.parent_process() is not None
+    pending = {}
+    for graph in DESCRIPTIVE_GRAPHS:
+        try:
+            key = graph_key(graph['id'], [os.path.join(DATA_DIR, f) for f in graph['inputs']], graph['version'])
+            png, source = graph_cache.get(graph['id'], key)
+        except Exception as e:
+            yield _graph_status(graph, started, error=str(e))
+            continue
+        if png is not None:
+            yield _graph_status(graph, started, cache=source, render_seconds=0.0)
+        elif in_worker:
+            png, seconds, error = _render_worker(graph['id'])
+            if png is not None:
+                graph_cache.put(graph['id'], key, png)
+            yield _graph_status(graph, started, error=error, cache='miss', render_seconds=round(seconds, 4))
+        else:
+            pending[_get_render_pool().submit(_render_worker, graph['id'])] = (graph, key)
+
+    for future in as_completed(pending):
+        graph, key = pending[future]
+        try:
+            png, seconds, error = future.result()
+        except BrokenProcessPool as e:
+            _reset_render_pool()
+            png, seconds, error = None, None, f"El proceso de renderizado terminó inesperadamente: {e}"
+        except Exception as e:
+            png, seconds, error = None, None, str(e)
+        if png is not None:
+            graph_cache.put(graph['id'], key, png)
+        yield _graph_status(graph, started, error=error, cache='miss',
+                            render_seconds=round(seconds, 4) if seconds is not None else None)
+
+def run_descriptive_analysis(progress: Optional[Callable[[float, str], None]] = None) -> List[Dict]:
+    """Genera todas las gráficas del catálogo y devuelve el estado de cada una, en el orden del catálogo."""
+    results = {}
+    for status in iter_descriptive_analysis():
+        results[status['id']] = status
+        if progress is not None:
+            progress(len(results) / len(DESCRIPTIVE_GRAPHS), status['name'])
+    return [results[graph['id']] for graph in DESCRIPTIVE_GRAPHS]
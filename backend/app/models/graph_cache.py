@@ -0,0 +1,129 @@
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from app.pipelines.ingest import file_fingerprint
+
+MAX_MEMORY_BYTES = 16 * 1024 * 1024
+MAX_DISK_BYTES = 64 * 1024 * 1024
+
+
+def graph_key(graph_id: str, input_paths: List[str], version: int) -> str:
+    """Clave de contenido: id de la gráfica, versión del generador y hash de cada archivo de entrada."""
+    digest = hashlib.sha256(f"{graph_id}:{version}".encode('utf-8'))
+    for path in input_paths:
+        digest.update(file_fingerprint(path).encode('utf-8'))
+    return digest.hexdigest()[:24]
+
+
+class GraphCache:
+    """
+    PNGs renderizados, direccionados por contenido. Los aciertos se sirven
+    desde memoria (LRU acotado en bytes) o desde disco; si cambian las
+    entradas o la versión del generador cambia la clave, así que la imagen
+    vieja nunca se sirve. El directorio se mantiene bajo un tope de tamaño
+    eliminando primero los archivos usados hace más tiempo.
+    """
+
+    def __init__(self, directory: str, max_memory_bytes: int = MAX_MEMORY_BYTES,
+                 max_disk_bytes: int = MAX_DISK_BYTES):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def path(self, graph_id: str, key: str) -> str:
+        return os.path.join(self.directory, f"{graph_id}-{key}.png")
+
+    def _remember(self, path: str, png: bytes) -> None:
+        with self._lock:
+            if path in self._memory:
+                self._memory.move_to_end(path)
+                return
+            self._memory[path] = png
+            self._memory_bytes += len(png)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, graph_id: str, key: str) -> Tuple[Optional[bytes], str]:
+        """Devuelve (png, origen) con origen 'memory', 'disk' o 'miss'."""
+        path = self.path(graph_id, key)
+        with self._lock:
+            png = self._memory.get(path)
+            if png is not None:
+                self._memory.move_to_end(path)
+        if png is not None:
+            # La fecha de modificación hace de marca de último uso para el LRU en disco
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self._write(path, png)
+            return png, 'memory'
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+        except FileNotFoundError:
+            return None, 'miss'
+        os.utime(path)
+        self._remember(path, png)
+        return png, 'disk'
+
+    def _write(self, path: str, png: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+
+    def put(self, graph_id: str, key: str, png: bytes) -> str:
+        path = self.path(graph_id, key)
+        self._write(path, png)
+        self._remember(path, png)
+
+        # Las versiones anteriores de la misma gráfica ya no se pueden pedir
+        for stale in glob.glob(os.path.join(self.directory, f"{graph_id}-*.png")):
+            if stale != path:
+                self._discard(stale)
+        self._enforce_disk_cap()
+        return path
+
+    def _discard(self, path: str) -> None:
+        with self._lock:
+            png = self._memory.pop(path, None)
+            if png is not None:
+                self._memory_bytes -= len(png)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _enforce_disk_cap(self) -> None:
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.png")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    def get_or_render(self, graph_id: str, input_paths: List[str], version: int,
+                      render: Callable[[], bytes]) -> Tuple[bytes, str, str]:
+        """Devuelve (png, origen, ruta), renderizando solo si la clave no está en caché."""
+        key = graph_key(graph_id, input_paths, version)
+        png, source = self.get(graph_id, key)
+        if png is None:
+            png = render()
+            self.put(graph_id, key, png)
+        return png, source, self.path(graph_id, key)
@@ -0,0 +1,231 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from app.models.artifacts import get_active_artifacts
+from app.pipelines.build_master_dataset import lookup_products
+from app.pipelines.ingest import normalize_descriptions
+from app.pipelines.product_dictionary import load_product_dictionary
+
+Product = Union[int, str]
+
+# Límites de cada micro-lote: se junta lo que llegue en MAX_WAIT_MS o hasta MAX_BATCH_ROWS filas
+MAX_BATCH_ROWS = 4096
+MAX_WAIT_MS = 5
+
+
+def validate_alpha(alpha: Optional[float]) -> None:
+    """alpha es el nivel de error del intervalo conformal; MAPIE solo acepta valores en (0, 1)."""
+    if alpha is not None and not 0 < alpha < 1:
+        raise ValueError(f"alpha debe estar entre 0 y 1 (sin incluirlos); se recibió {alpha}.")
+
+
+def _resolve_products(products: Sequence[Product]) -> pd.Series:
+    """
+    Convierte product_ids y/o descripciones a product_id en un solo paso (NA si
+    no existe). Los enteros son IDs; el texto se normaliza igual que las claves
+    del diccionario y se busca como descripción, y solo si no es una descripción
+    conocida y son puros dígitos se toma como ID.
+    """
+    values = pd.Series(list(products), dtype=object)
+    is_int = values.map(lambda v: isinstance(v, (int, np.integer)) and not isinstance(v, bool)).astype(bool)
+    ids = pd.Series(pd.NA, index=values.index, dtype='Int64')
+    ids[is_int] = values[is_int].astype('int64')
+    if (~is_int).any():
+        dictionary = load_product_dictionary()
+        by_description = pd.Series(
+            dictionary['product_id'].to_numpy(),
+            index=normalize_descriptions(dictionary['normalized_description'].astype(str)),
+        )
+        by_description = by_description[~by_description.index.duplicated()]
+        text = normalize_descriptions(values[~is_int])
+        ids[~is_int] = text.map(by_description).astype('Int64')
+        as_id = text.str.fullmatch(r'\d+') & ids[~is_int].isna()
+        ids[as_id[as_id].index] = pd.to_numeric(text[as_id]).astype('Int64')
+    return ids
+
+
+def build_feature_frame(products: Optional[Sequence[Product]], rows: Optional[List[Dict[str, float]]],
+                        features: List[str]) -> Tuple[pd.DataFrame, List[Product]]:
+    """
+    Arma la matriz de features de una sola vez: los productos se toman del
+    dataset maestro en memoria y las filas se validan contra el esquema del modelo.
+    """
+    columns = ['product_id', 'normalized_description'] + features
+    frames, missing = [], []
+    if products:
+        ids = _resolve_products(products)
+        master_rows = lookup_products(ids.dropna().astype('int64'))
+        found = set(master_rows['product_id'].astype('int64'))
+        missing = [product for product, product_id in zip(products, ids)
+                   if pd.isna(product_id) or int(product_id) not in found]
+        frames.append(master_rows[columns])
+    if rows:
+        feature_rows = pd.DataFrame(rows)
+        unknown = sorted(set(feature_rows.columns) - set(features))
+        if unknown:
+            raise ValueError(f"Features desconocidas: {unknown}. Esperadas: {features}")
+        frames.append(feature_rows.reindex(columns=features))
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns), missing
+    return pd.concat(frames, ignore_index=True).reindex(columns=columns), missing
+
+
+def score(data: pd.DataFrame, artifacts: Dict, alphas: Sequence[float]) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Una sola llamada por modelo para todas las filas. Devuelve las predicciones
+    puntuales y los intervalos conformales con forma (n, 2, len(alphas)).
+    """
+    X = data[artifacts["metadata"]["features"]].to_numpy(dtype='float64')
+    pred_conformal, intervals = artifacts["mapie"].predict(X, alpha=list(alphas))
+    result = pd.DataFrame({
+        'product_id': data['product_id'].astype('Int64'),
+        'normalized_description': data['normalized_description'].astype(object),
+        'pred_cantidad': artifacts["modelo_cant"].predict(X),
+        'pred_cantidad_conformal': pred_conformal,
+        'pred_dias': artifacts["modelo_dias"].predict(X),
+    })
+    return result, intervals.reshape(len(X), 2, len(alphas))
+
+
+def _records(result: pd.DataFrame, intervals: np.ndarray) -> List[Dict]:
+    result = result.copy()
+    result.insert(4, 'pred_cantidad_lower', intervals[:, 0])
+    result.insert(5, 'pred_cantidad_upper', intervals[:, 1])
+    return result.astype(object).where(result.notna(), None).to_dict(orient='records')
+
+
+def predict(products: Optional[List[Product]] = None,
+            rows: Optional[List[Dict[str, float]]] = None,
+            alpha: Optional[float] = None) -> Dict:
+    """
+    Calcula las predicciones con los modelos ya entrenados (sin reentrenar)
+    para una lista de productos y/o filas de features.
+    """
+    validate_alpha(alpha)
+    artifacts = get_active_artifacts()
+    metadata = artifacts["metadata"]
+    alpha = metadata["alpha"] if alpha is None else alpha
+
+    data, missing = build_feature_frame(products, rows, metadata["features"])
+    predictions = []
+    if not data.empty:
+        result, intervals = score(data, artifacts, [alpha])
+        predictions = _records(result, intervals[:, :, 0])
+
+    return {
+        "model_version": metadata["version"],
+        "alpha": alpha,
+        "predictions": predictions,
+        "not_found": missing,
+    }
+
+
+class MicroBatcher:
+    """
+    Junta las solicitudes pequeñas que llegan al mismo tiempo y las puntúa en
+    un solo lote, repartiendo después los resultados a cada solicitud.
+    """
+
+    def __init__(self, max_batch_rows: int = MAX_BATCH_ROWS, max_wait_ms: float = MAX_WAIT_MS):
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, products: Optional[List[Product]] = None,
+               rows: Optional[List[Dict[str, float]]] = None,
+               alpha: Optional[float] = None) -> Future:
+        # Se valida antes de entrar al lote: un alpha inválido haría fallar a todo el micro-lote
+        validate_alpha(alpha)
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+        future: Future = Future()
+        self._queue.put((products or [], rows or [], alpha, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        size = len(batch[0][0]) + len(batch[0][1])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0]) + len(item[1])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._score_batch(batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _score_batch(self, batch: list) -> None:
+        artifacts = get_active_artifacts()
+        metadata = artifacts["metadata"]
+
+        pending = []
+        for products, rows, alpha, future in batch:
+            try:
+                data, missing = build_feature_frame(products, rows, metadata["features"])
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            pending.append((future, metadata["alpha"] if alpha is None else alpha, data, missing))
+        if not pending:
+            return
+
+        # Una llamada por alpha con todas las filas que lo piden; si falla, solo
+        # fallan las solicitudes de ese alpha
+        groups: Dict[float, list] = {}
+        for item in pending:
+            groups.setdefault(item[1], []).append(item)
+        for alpha, group in groups.items():
+            try:
+                self._score_group(group, alpha, artifacts)
+            except Exception as e:
+                for future, *_ in group:
+                    if not future.done():
+                        future.set_exception(e)
+
+    @staticmethod
+    def _score_group(group: list, alpha: float, artifacts: Dict) -> None:
+        frames = [data for _, _, data, _ in group if not data.empty]
+        if frames:
+            result, intervals = score(pd.concat(frames, ignore_index=True), artifacts, [alpha])
+
+        start = 0
+        for future, _, data, missing in group:
+            end = start + len(data)
+            predictions = []
+            if len(data):
+                predictions = _records(result.iloc[start:end], intervals[start:end, :, 0])
+            future.set_result({
+                "model_version": artifacts["metadata"]["version"],
+                "alpha": alpha,
+                "predictions": predictions,
+                "not_found": missing,
+            })
+            start = end
+
+
+batcher = MicroBatcher()
@@ -1,49 +1,248 @@
 import pandas as pd
 import numpy as np
 import os
+import time
 import matplotlib.pyplot as plt
-from xgboost import XGBRegressor
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error
-from mapie.regression import MapieRegressor
-from app.pipelines.build_master_dataset import build_master_dataset
-
-def run_model():
-    # 🧩 Unir datos procesados desde /output
-    df = build_master_dataset()
-
-    # ✅ Definir features y targets
-    features = [
-        'total_units_sold', 'avg_ticket_price', 'sale_frequency_days',
-        'cantidad_total_importada', 'costo_unitario_promedio_import',
-        'gastos_logisticos_promedio', 'tiempo_promedio_entrega',
-        'Existencias', 'coverage_days'
-    ]
-
-    X = df[features]
-    y_cantidad = df['cantidad_a_importar']
-    y_dias = df['dias_hasta_proxima_importacion']
-
-    # ✂️ Separar datos para entrenamiento y prueba
-    X_train, X_test, y_train_cant, y_test_cant = train_test_split(X, y_cantidad, test_size=0.2, random_state=42)
-    _, _, y_train_dias, y_test_dias = train_test_split(X, y_dias, test_size=0.2, random_state=42)
-
-    # ⚙️ Entrenar modelo para cantidad a importar
-    modelo_cant = XGBRegressor(n_estimators=100, learning_rate=0.1, random_state=42)
-    modelo_cant.fit(X_train, y_train_cant)
+from app.pipelines.build_master_dataset import add_time_dependent_columns, build_master_dataset
+from app.models.artifacts import append_training_history, get_active_artifacts, load_tuned_params, save_artifacts, save_tuned_params
+from app.models.conformal import CALIBRATION_SIZE, CONFORMAL_STRATEGIES, DEFAULT_STRATEGY, benchmark_conformal, fit_conformal, interval_stats
+from app.models.training import (
+    NUM_BOOST_ROUND, continue_training, drift_score, feature_stats, prepare_training_data, row_hashes, row_keys,
+    train_models, unfitted_regressor,
+)
+from app.models.tuning import N_TRIALS, tune_models
+
+# Features de entrada de ambos modelos (el orden forma parte del esquema guardado)
+FEATURES = [
+    'total_units_sold', 'avg_ticket_price', 'sale_frequency_days',
+    'cantidad_total_importada', 'costo_unitario_promedio_import',
+    'gastos_logisticos_promedio', 'tiempo_promedio_entrega',
+    'Existencias', 'coverage_days'
+]
+TARGET_CANT = 'cantidad_a_importar'
+TARGET_DIAS = 'dias_hasta_proxima_importacion'
+TARGETS = [TARGET_CANT, TARGET_DIAS]
+CONFORMAL_ALPHA = 0.1
+
+# Actualización incremental: árboles que se agregan por actualización y umbrales
+# a partir de los cuales se reentrena desde cero
+UPDATE_ROUNDS = 20
+MAX_CHANGED_FRACTION = 0.3
+DRIFT_THRESHOLD = 0.5
+ERROR_TOLERANCE = 0.2
+MAX_INCREMENTAL_UPDATES = 10
+# El modo incremental recalibra los intervalos sobre el modelo actualizado, y eso
+# solo es posible con un conjunto de calibración que el modelo nunca vio
+INCREMENTAL_STRATEGY = 'prefit'
+
+
+def _hash_columns(target):
+    """
+    Columnas que definen si una fila cambió para un target; cada modelo detecta
+    sus propios cambios. Los días se calculan contra la fecha de referencia del
+    último entrenamiento completo, así que no cambian solo porque pasó un día.
+    """
+    return FEATURES + [target]
+
+
+def _today():
+    return pd.Timestamp.today().normalize()
+
+
+def _training_rows(df, index):
+    return {target: row_hashes(df.loc[index], _hash_columns(target)) for target in TARGETS}
+
+
+def _rmse(model, X, y):
+    return float(np.sqrt(mean_squared_error(y, model.predict(X))))
+
+
+def benchmark_conformal_strategies(strategies=None, alpha=CONFORMAL_ALPHA):
+    """
+    Compara tiempo y cobertura de las estrategias conformales sobre el split de
+    run_model, con los hiperparámetros guardados (los mismos del modelo en uso).
+    """
+    data = prepare_training_data(build_master_dataset(), FEATURES, [TARGET_CANT])
+    config = (load_tuned_params() or {}).get(TARGET_CANT, {})
+    estimator = unfitted_regressor(config.get('params'), config.get('num_boost_round', NUM_BOOST_ROUND))
+    return benchmark_conformal(
+        estimator, data.X_train, data.y_train[TARGET_CANT], data.X_test, data.y_test[TARGET_CANT],
+        strategies=strategies, alpha=alpha,
+    )
+
+
+def _incremental_base(conformal_strategy):
+    """
+    Artefactos activos sobre los que se puede hacer una actualización incremental,
+    o (None, motivo) cuando hace falta un entrenamiento completo.
+    """
+    if conformal_strategy != INCREMENTAL_STRATEGY:
+        return None, f"El modo incremental recalibra con '{INCREMENTAL_STRATEGY}'; '{conformal_strategy}' requiere un entrenamiento completo."
+    try:
+        previous = get_active_artifacts()
+    except FileNotFoundError:
+        return None, "No hay un modelo previo."
+    metadata = previous["metadata"]
+    if (metadata["features"] != FEATURES or not isinstance(previous.get("training_rows"), dict)
+            or not isinstance(metadata.get("base_rmse"), dict) or "split_keys" not in previous
+            or "reference_date" not in metadata):
+        return None, "El modelo previo no tiene el esquema actual."
+    if previous["split_keys"]["calibration"] is None:
+        return None, (f"El modelo previo se calibró con '{metadata.get('conformal_strategy')}' y no tiene un conjunto "
+                      f"de calibración apartado; entrena una vez con conformal '{INCREMENTAL_STRATEGY}'.")
+    if metadata.get("incremental_updates", 0) >= MAX_INCREMENTAL_UPDATES:
+        return None, f"Se alcanzaron {MAX_INCREMENTAL_UPDATES} actualizaciones desde el último entrenamiento completo."
+    return previous, None
+
+
+def _frozen_split(df, split_keys):
+    """Filas de prueba y calibración del último entrenamiento completo; las filas nuevas van a entrenamiento."""
+    keys = row_keys(df)
+    return df.index[keys.isin(split_keys["test"])], df.index[keys.isin(split_keys["calibration"])]
+
+
+def _incremental_update(df, data, previous, configs, nthread=None):
+    """
+    Continúa el boosting de cada modelo activo solo con las filas de entrenamiento
+    cuyo contenido cambió para su target. Se evalúa sobre el mismo conjunto de
+    prueba del último entrenamiento completo. Devuelve (modelos, info) o
+    (None, motivo) cuando conviene reentrenar desde cero.
+    """
+    metadata = previous["metadata"]
+    drift = drift_score(metadata["feature_stats"], data.X_train)
+    if drift > DRIFT_THRESHOLD:
+        return None, f"Drift de features {drift:.2f} mayor a {DRIFT_THRESHOLD}."
+
+    hashes = _training_rows(df, data.X_train.index)
+    changed = {}
+    for target in TARGETS:
+        mask = ~hashes[target].isin(previous["training_rows"][target]).to_numpy()
+        if mask.mean() > MAX_CHANGED_FRACTION:
+            return None, f"Cambió el {mask.mean():.0%} de las filas de {target} (máximo {MAX_CHANGED_FRACTION:.0%})."
+        changed[target] = data.X_train.index[mask]
+
+    models = {TARGET_CANT: previous["modelo_cant"], TARGET_DIAS: previous["modelo_dias"]}
+    for target, changed_idx in changed.items():
+        if len(changed_idx):
+            models[target] = continue_training(
+                models[target], data.X_train.loc[changed_idx], data.y_train[target].loc[changed_idx],
+                configs.get(target, {}).get('params'), UPDATE_ROUNDS, nthread=nthread,
+            )
+
+    rmse, base_rmse = {}, metadata["base_rmse"]
+    for target in TARGETS:
+        rmse[target] = _rmse(models[target], data.X_test, data.y_test[target])
+        if rmse[target] > base_rmse[target] * (1 + ERROR_TOLERANCE):
+            return None, (f"RMSE de {target} {rmse[target]:.3f} supera en más de {ERROR_TOLERANCE:.0%} "
+                          f"al del último entrenamiento completo ({base_rmse[target]:.3f}).")
+
+    return models, {
+        "changed_rows": {target: int(len(idx)) for target, idx in changed.items()},
+        "drift": round(drift, 4),
+        "rmse": rmse,
+        "base_rmse": base_rmse,
+        "training_rows": hashes,
+    }
+
+
+def run_model(conformal_strategy=None, nthread=None, progress=None, tune=False, n_trials=N_TRIALS,
+              incremental=False):
+    # progress(fracción, mensaje) se llama entre etapas (lo usa la cola de trabajos)
+    report = progress or (lambda fraction, message=None: None)
+    # Sin estrategia explícita: 'prefit' en modo incremental (para poder recalibrar), cv_plus si no
+    if conformal_strategy is None:
+        conformal_strategy = INCREMENTAL_STRATEGY if incremental else DEFAULT_STRATEGY
+    if conformal_strategy not in CONFORMAL_STRATEGIES:
+        raise ValueError(f"Estrategia conformal desconocida: {conformal_strategy}. Opciones: {CONFORMAL_STRATEGIES}")
+
+    # ♻️ Modo incremental: se parte de los modelos activos y del mismo split de su
+    # último entrenamiento completo, para que la prueba no incluya filas ya vistas
+    previous, fallback_reason = None, None
+    if incremental and not tune:
+        previous, fallback_reason = _incremental_base(conformal_strategy)
+
+    # 🧩 Unir datos procesados desde /output. Los días hasta la próxima importación se
+    # calculan contra la fecha de referencia del modelo que se actualiza (hoy en un
+    # entrenamiento completo), para que las etiquetas no se muevan de un día a otro
+    today = _today()
+    reference_date = pd.Timestamp(previous["metadata"]["reference_date"]) if previous is not None else today
+    df = add_time_dependent_columns(build_master_dataset(), today=reference_date)
+
+    report(0.1, "Dataset maestro listo")
+
+    # ✂️ Un solo split y una sola matriz float32 para ambos targets
+    # (con 'prefit' se aparta además un conjunto de calibración del entrenamiento)
+    if previous is not None:
+        data = prepare_training_data(df, FEATURES, TARGETS, split=_frozen_split(df, previous["split_keys"]))
+    else:
+        calibration_size = CALIBRATION_SIZE if conformal_strategy == 'prefit' else None
+        data = prepare_training_data(df, FEATURES, TARGETS, calibration_size=calibration_size)
+    X_train, X_test = data.X_train, data.X_test
+    y_train_cant, y_test_cant = data.y_train[TARGET_CANT], data.y_test[TARGET_CANT]
+
+    # 🔍 Hiperparámetros: se buscan solo con tune=True; si no, se reutilizan los últimos guardados
+    tuning_summary = None
+    if tune:
+        report(0.15, "Buscando hiperparámetros")
+        tuning = tune_models(data, TARGETS, n_trials=n_trials, nthread=nthread)
+        configs = {
+            target: {key: result[key] for key in ('params', 'num_boost_round', 'valid_rmse')}
+            for target, result in tuning.items()
+        }
+        save_tuned_params(configs)
+        tuning_summary = {
+            target: {key: value for key, value in result.items() if key != 'trials'}
+            for target, result in tuning.items()
+        }
+    else:
+        configs = load_tuned_params() or {}
+
+    # Solo se agregan árboles con las filas cambiadas de cada target; si hay drift
+    # o el error de cualquiera de los dos modelos sube, se reentrena desde cero
+    mode, update = "full", None
+    if previous is not None:
+        report(0.3, "Actualizando modelos")
+        start = time.perf_counter()
+        models, outcome = _incremental_update(df, data, previous, configs, nthread=nthread)
+        if models is None:
+            fallback_reason = outcome
+        else:
+            mode, update = "incremental", outcome
+            training_report = {"seconds": round(time.perf_counter() - start, 3)}
+    if fallback_reason:
+        print(f"ℹ️ Reentrenamiento completo: {fallback_reason}")
+
+    if mode == "full":
+        report(0.3, "Entrenando modelos")
+        # ⚙️ Entrenar ambos modelos al mismo tiempo (hist, presupuesto de hilos explícito)
+        models, training_report = train_models(data, TARGETS, configs=configs, nthread=nthread)
+
+    modelo_cant, modelo_dias = models[TARGET_CANT], models[TARGET_DIAS]
     pred = modelo_cant.predict(X_test)
 
     # 📊 Métricas
     mae = mean_absolute_error(y_test_cant, pred)
     rmse = np.sqrt(mean_squared_error(y_test_cant, pred))
 
-    # 🧠 Conformal Prediction
-    mapie = MapieRegressor(estimator=modelo_cant, cv=-1, method="plus")
-    mapie.fit(X_train, y_train_cant)
-    pred_interval, intervalo = mapie.predict(X_test, alpha=0.1)
-    intervalo = intervalo.squeeze()
+    # 🧠 Conformal Prediction: con 'prefit' (siempre en modo incremental) se calibra
+    # el modelo recién entrenado o actualizado sobre el conjunto de calibración apartado
+    report(0.5, "Ajustando intervalos conformales")
+    start = time.perf_counter()
+    if conformal_strategy == 'prefit':
+        mapie = fit_conformal(conformal_strategy, modelo_cant, X_train, y_train_cant,
+                              calibration=(data.X_cal, data.y_cal[TARGET_CANT]))
+    else:
+        config_cant = configs.get(TARGET_CANT, {})
+        estimator = unfitted_regressor(config_cant.get('params'), config_cant.get('num_boost_round', NUM_BOOST_ROUND))
+        mapie = fit_conformal(conformal_strategy, estimator, X_train, y_train_cant)
+    conformal_seconds = time.perf_counter() - start
+    pred_interval, intervalo = mapie.predict(X_test, alpha=CONFORMAL_ALPHA)
+    intervalo = intervalo.reshape(len(X_test), 2)
+    conformal_stats = interval_stats(y_test_cant, intervalo)
 
     # 📈 Guardar gráfico
+    report(0.8, "Guardando gráfico y resultados")
     os.makedirs("output", exist_ok=True)
     plt.figure(figsize=(10, 5))
     plt.plot(y_test_cant.values, label="Real")
@@ -58,12 +257,10 @@ def run_model():
     plt.close()
 
     # 🔁 Predicción completa
+    X = df[FEATURES].astype('float32')
     df['pred_cantidad'] = modelo_cant.predict(X)
-
-    # Entrenar también para días hasta próxima importación
-    modelo_dias = XGBRegressor(n_estimators=100, learning_rate=0.1, random_state=42)
-    modelo_dias.fit(X_train, y_train_dias)
-    df['pred_dias'] = modelo_dias.predict(X)
+    # El modelo predice días respecto a la fecha de referencia; se llevan a hoy
+    df['pred_dias'] = modelo_dias.predict(X) + (today - reference_date).days
 
     # 📦 Filtrar productos recomendados
     productos = df[df['pred_cantidad'] > 0].copy()
@@ -71,11 +268,71 @@ def run_model():
 
     # 💾 Guardar CSV con resultados
     output_csv = "output/productos_recomendados.csv"
-    productos[['normalized_description', 'pred_cantidad', 'pred_dias']].to_csv(output_csv, index=False, encoding='utf-8')
+    productos[['product_id', 'normalized_description', 'pred_cantidad', 'pred_dias']].to_csv(output_csv, index=False, encoding='utf-8')
+
+    report(0.9, "Guardando modelos")
+    # 🗄️ Guardar modelos versionados para /predict, con lo necesario para la próxima actualización incremental
+    if mode == "full":
+        training_rows = _training_rows(df, X_train.index)
+        keys = row_keys(df)
+        # Las filas de prueba y calibración quedan fijas para las actualizaciones incrementales
+        split_keys = {
+            "test": keys.loc[X_test.index].to_numpy(),
+            "calibration": keys.loc[data.X_cal.index].to_numpy() if data.X_cal is not None else None,
+        }
+        base_rmse = {target: _rmse(models[target], X_test, data.y_test[target]) for target in TARGETS}
+        lineage = {"feature_stats": feature_stats(X_train), "base_rmse": base_rmse, "incremental_updates": 0}
+    else:
+        training_rows = update["training_rows"]
+        split_keys = previous["split_keys"]
+        previous_metadata = previous["metadata"]
+        lineage = {
+            "feature_stats": previous_metadata["feature_stats"],
+            "base_rmse": update["base_rmse"],
+            "incremental_updates": previous_metadata.get("incremental_updates", 0) + 1,
+        }
+    version = save_artifacts(
+        {"modelo_cant": modelo_cant, "modelo_dias": modelo_dias, "mapie": mapie,
+         "training_rows": training_rows, "split_keys": split_keys},
+        {
+            "mode": mode,
+            **lineage,
+            "features": FEATURES,
+            "targets": {"modelo_cant": TARGET_CANT, "modelo_dias": TARGET_DIAS},
+            "alpha": CONFORMAL_ALPHA,
+            "conformal_strategy": conformal_strategy,
+            "reference_date": reference_date.date().isoformat(),
+            "metrics": {"mae": float(mae), "rmse": float(rmse),
+                        "rmse_dias": _rmse(modelo_dias, X_test, data.y_test[TARGET_DIAS]), **conformal_stats},
+            "n_train": int(len(X_train)),
+            "training": training_report,
+            "params": configs,
+        },
+    )
+    append_training_history({
+        "version": version,
+        "mode": mode,
+        "seconds": round(training_report["seconds"] + conformal_seconds, 3),
+        "fallback_reason": fallback_reason,
+        "changed_rows": update["changed_rows"] if update else None,
+        "rmse": float(rmse),
+    })
 
     return {
         "mae": mae,
         "rmse": rmse,
         "csv": output_csv,
-        "image": "output/prediction_plot.png"
+        "image": "output/prediction_plot.png",
+        "model_version": version,
+        "mode": mode,
+        "fallback_reason": fallback_reason,
+        "update": {key: value for key, value in update.items() if key != "training_rows"} if update else None,
+        "training": training_report,
+        "params": configs,
+        "tuning": tuning_summary,
+        "conformal": {
+            "strategy": conformal_strategy,
+            "fit_seconds": round(conformal_seconds, 3),
+            **conformal_stats
+        }
     }
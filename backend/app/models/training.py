@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor
+
+# Parámetros base de los dos modelos (equivalentes a XGBRegressor(n_estimators=100, learning_rate=0.1))
+DEFAULT_PARAMS = {
+    'objective': 'reg:squarederror',
+    'eta': 0.1,
+    'max_depth': 6,
+    'tree_method': 'hist',
+    'seed': 42,
+}
+NUM_BOOST_ROUND = 100
+# Nombres nativos de XGBoost que el wrapper de sklearn llama distinto
+SKLEARN_NAMES = {'eta': 'learning_rate', 'seed': 'random_state', 'lambda': 'reg_lambda', 'alpha': 'reg_alpha'}
+TEST_SIZE = 0.2
+MAX_CACHED_DMATRICES = 8
+
+_dmatrix_lock = threading.Lock()
+# DMatrix nativos de XGBoost por (huella de los datos, partición, target)
+_dmatrices: "OrderedDict[tuple, xgb.DMatrix]" = OrderedDict()
+
+
+@dataclass
+class TrainingData:
+    """Split único y matrices float32 compartidas por todos los modelos de una corrida."""
+    features: List[str]
+    X_train: pd.DataFrame
+    X_test: pd.DataFrame
+    y_train: Dict[str, pd.Series]
+    y_test: Dict[str, pd.Series]
+    X_cal: Optional[pd.DataFrame] = None
+    y_cal: Dict[str, pd.Series] = field(default_factory=dict)
+    key: str = ''
+
+
+def _fingerprint(X: pd.DataFrame, y: Dict[str, pd.Series]) -> str:
+    frame = X.assign(**{f'__{name}': values for name, values in y.items()})
+    return format(int(pd.util.hash_pandas_object(frame, index=True).sum()) & (2**64 - 1), 'x')
+
+
+def prepare_training_data(df: pd.DataFrame, features: List[str], targets: List[str],
+                          test_size: float = TEST_SIZE,
+                          calibration_size: Optional[float] = None,
+                          split: Optional[Tuple[pd.Index, Optional[pd.Index]]] = None) -> TrainingData:
+    """
+    Separa los datos una sola vez para todos los targets. Con calibration_size,
+    además aparta una parte del entrenamiento para calibrar (conformal 'prefit').
+    `split` fija de antemano (prueba, calibración); el resto de las filas entrena.
+    """
+    X = df[features].astype('float32')
+    if split is not None:
+        test_idx, cal_idx = split
+        held_out = test_idx if cal_idx is None else test_idx.union(cal_idx)
+        train_idx = df.index[~df.index.isin(held_out)]
+    else:
+        train_idx, test_idx = train_test_split(df.index, test_size=test_size, random_state=42)
+        cal_idx = None
+        if calibration_size:
+            train_idx, cal_idx = train_test_split(train_idx, test_size=calibration_size, random_state=42)
+
+    y_train = {target: df.loc[train_idx, target] for target in targets}
+    data = TrainingData(
+        features=features,
+        X_train=X.loc[train_idx],
+        X_test=X.loc[test_idx],
+        y_train=y_train,
+        y_test={target: df.loc[test_idx, target] for target in targets},
+    )
+    if cal_idx is not None:
+        data.X_cal = X.loc[cal_idx]
+        data.y_cal = {target: df.loc[cal_idx, target] for target in targets}
+    data.key = _fingerprint(data.X_train, y_train)
+    return data
+
+
+def cached_dmatrix(cache_key: tuple, X: pd.DataFrame, y: pd.Series, nthread: int = -1) -> xgb.DMatrix:
+    """Crea el DMatrix una sola vez por clave y lo reutiliza (LRU acotado)."""
+    with _dmatrix_lock:
+        dmatrix = _dmatrices.get(cache_key)
+        if dmatrix is not None:
+            _dmatrices.move_to_end(cache_key)
+            return dmatrix
+
+    dmatrix = xgb.DMatrix(X, label=y, nthread=nthread)
+    with _dmatrix_lock:
+        _dmatrices[cache_key] = dmatrix
+        while len(_dmatrices) > MAX_CACHED_DMATRICES:
+            _dmatrices.popitem(last=False)
+    return dmatrix
+
+
+def get_dmatrix(data: TrainingData, target: str, nthread: int = -1) -> xgb.DMatrix:
+    """DMatrix de entrenamiento de un target, reutilizado mientras los datos no cambien."""
+    return cached_dmatrix((data.key, 'train', target), data.X_train, data.y_train[target], nthread=nthread)
+
+
+def thread_budget(nthread: Optional[int] = None) -> int:
+    return max(1, nthread or os.cpu_count() or 1)
+
+
+def unfitted_regressor(params: Optional[Dict] = None, num_boost_round: int = NUM_BOOST_ROUND,
+                       n_jobs: Optional[int] = None) -> XGBRegressor:
+    """XGBRegressor sin entrenar con los mismos parámetros (para los reentrenamientos de MAPIE)."""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    params.pop('nthread', None)
+    kwargs = {SKLEARN_NAMES.get(name, name): value for name, value in params.items()}
+    return XGBRegressor(n_estimators=num_boost_round, n_jobs=n_jobs, **kwargs)
+
+
+def to_regressor(booster: xgb.Booster, params: Dict, num_boost_round: int) -> XGBRegressor:
+    """Envuelve un Booster entrenado en un XGBRegressor (para MAPIE, joblib y predict)."""
+    model = unfitted_regressor(params, num_boost_round)
+    model.load_model(bytearray(booster.save_raw()))
+    return model
+
+
+def train_models(data: TrainingData, targets: List[str], configs: Optional[Dict[str, Dict]] = None,
+                 nthread: Optional[int] = None) -> tuple:
+    """
+    Entrena un modelo por target al mismo tiempo, repartiendo el presupuesto de
+    hilos entre ellos. `configs` puede traer, por target, {"params", "num_boost_round"}
+    (por ejemplo los encontrados por la búsqueda de hiperparámetros).
+    Devuelve los modelos y un reporte de tiempo y uso de CPU.
+    """
+    configs = configs or {}
+    budget = thread_budget(nthread)
+    per_model = max(1, budget // len(targets))
+    timings = {}
+
+    def train(target):
+        config = configs.get(target, {})
+        params = {**DEFAULT_PARAMS, **config.get('params', {})}
+        num_boost_round = config.get('num_boost_round', NUM_BOOST_ROUND)
+        start = time.perf_counter()
+        dmatrix = get_dmatrix(data, target, nthread=per_model)
+        booster = xgb.train({**params, 'nthread': per_model}, dmatrix, num_boost_round=num_boost_round)
+        timings[target] = round(time.perf_counter() - start, 3)
+        return to_regressor(booster, params, num_boost_round)
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        models = dict(zip(targets, executor.map(train, targets)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    report = {
+        'seconds': round(wall, 3),
+        'cpu_seconds': round(cpu, 3),
+        'cores_used': round(cpu / wall, 2) if wall > 0 else None,
+        'thread_budget': budget,
+        'threads_per_model': per_model,
+        'per_target_seconds': timings,
+    }
+    return models, report
+
+
+
+def row_hashes(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """Hash por fila de las columnas que alimentan al modelo, para detectar filas nuevas o cambiadas."""
+    # Se convierten a float64 para que un cambio de dtype (int -> float) no cuente como cambio
+    return pd.util.hash_pandas_object(df[columns].astype('float64'), index=False)
+
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    """
+    Identidad estable de cada fila: producto y número de aparición dentro del
+    producto (un producto puede tener varias filas de inventario). No depende
+    del contenido, así que una fila que cambia conserva su clave.
+    """
+    occurrence = df.groupby('product_id').cumcount()
+    return df['product_id'].astype('int64') * (1 << 16) + occurrence.astype('int64')
+
+
+def feature_stats(X: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    return {col: {'mean': float(X[col].mean()), 'std': float(X[col].std())} for col in X.columns}
+
+
+def drift_score(stats: Dict[str, Dict[str, float]], X: pd.DataFrame) -> float:
+    """Mayor desplazamiento de la media de una feature, medido en desviaciones estándar del entrenamiento."""
+    shifts = []
+    for col, reference in stats.items():
+        if col not in X:
+            continue
+        scale = reference['std'] if reference['std'] and np.isfinite(reference['std']) else 1.0
+        mean = X[col].mean()
+        if np.isfinite(mean) and np.isfinite(reference['mean']):
+            shifts.append(abs(mean - reference['mean']) / scale)
+    return float(max(shifts, default=0.0))
+
+
+def continue_training(model: XGBRegressor, X: pd.DataFrame, y: pd.Series, params: Optional[Dict],
+                      num_boost_round: int, nthread: Optional[int] = None) -> XGBRegressor:
+    """Sigue agregando árboles al modelo ya entrenado usando solo las filas indicadas."""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    dmatrix = xgb.DMatrix(X, label=y, nthread=thread_budget(nthread))
+    booster = xgb.train({**params, 'nthread': thread_budget(nthread)}, dmatrix,
+                        num_boost_round=num_boost_round, xgb_model=model.get_booster())
+    return to_regressor(booster, params, booster.num_boosted_rounds())
@@ -0,0 +1,94 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import xgboost as xgb
+
+from app.models.training import DEFAULT_PARAMS, TrainingData, get_dmatrix, thread_budget
+
+# Espacio de búsqueda (parámetros nativos de XGBoost)
+SEARCH_SPACE = {
+    'eta': [0.02, 0.05, 0.1, 0.2, 0.3],
+    'max_depth': [3, 4, 5, 6, 8],
+    'min_child_weight': [1, 3, 5, 10],
+    'subsample': [0.7, 0.85, 1.0],
+    'colsample_bytree': [0.7, 0.85, 1.0],
+    'lambda': [0.0, 1.0, 5.0, 10.0],
+    'alpha': [0.0, 0.1, 1.0],
+}
+# Configuración actual (la de XGBoost por defecto), siempre evaluada como referencia
+BASELINE_CONFIG = {
+    'eta': 0.1, 'max_depth': 6, 'min_child_weight': 1, 'subsample': 1.0,
+    'colsample_bytree': 1.0, 'lambda': 1.0, 'alpha': 0.0,
+}
+N_TRIALS = 20
+MAX_BOOST_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 25
+CV_FOLDS = 3
+
+
+def sample_configs(n_trials: int, seed: int = 42) -> List[Dict]:
+    """Configuraciones aleatorias distintas del espacio de búsqueda; la primera es la base."""
+    rng = np.random.default_rng(seed)
+    configs = [dict(BASELINE_CONFIG)]
+    seen = {tuple(sorted(BASELINE_CONFIG.items()))}
+    for _ in range(n_trials * 20):
+        if len(configs) >= n_trials:
+            break
+        config = {name: values[int(rng.integers(len(values)))] for name, values in SEARCH_SPACE.items()}
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def tune_target(data: TrainingData, target: str, n_trials: int = N_TRIALS,
+                nthread: Optional[int] = None, max_parallel: Optional[int] = None) -> Dict:
+    """
+    Búsqueda aleatoria con early stopping sobre folds de validación del conjunto
+    de entrenamiento (el de prueba no se toca). Los trials corren en paralelo
+    repartiendo el presupuesto de hilos, y todos usan el DMatrix de entrenamiento en caché.
+    """
+    dtrain = get_dmatrix(data, target)
+
+    budget = thread_budget(nthread)
+    parallel = max(1, min(max_parallel or budget, n_trials))
+    per_trial = max(1, budget // parallel)
+
+    def run_trial(config):
+        params = {**DEFAULT_PARAMS, **config, 'nthread': per_trial, 'eval_metric': 'rmse'}
+        start = time.perf_counter()
+        history = xgb.cv(
+            params, dtrain, num_boost_round=MAX_BOOST_ROUNDS, nfold=CV_FOLDS, seed=42,
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False,
+        )
+        return {
+            'params': config,
+            'num_boost_round': len(history),
+            'valid_rmse': float(history['test-rmse-mean'].iloc[-1]),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        trials = list(executor.map(run_trial, sample_configs(n_trials)))
+    best = min(trials, key=lambda trial: trial['valid_rmse'])
+
+    return {
+        'params': best['params'],
+        'num_boost_round': best['num_boost_round'],
+        'valid_rmse': best['valid_rmse'],
+        'baseline_rmse': trials[0]['valid_rmse'],
+        'n_trials': len(trials),
+        'parallel_trials': parallel,
+        'seconds': round(time.perf_counter() - start, 3),
+        'trials': sorted(trials, key=lambda trial: trial['valid_rmse']),
+    }
+
+
+def tune_models(data: TrainingData, targets: List[str], n_trials: int = N_TRIALS,
+                nthread: Optional[int] = None) -> Dict[str, Dict]:
+    """Mejor configuración por target, en el formato que recibe train_models."""
+    return {target: tune_target(data, target, n_trials=n_trials, nthread=nthread) for target in targets}
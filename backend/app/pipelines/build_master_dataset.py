@@ -1,17 +1,68 @@
+import os
+import threading
+from typing import Dict, Optional
+
 import pandas as pd
+from app.pipelines.ingest import file_fingerprint
+from app.pipelines.product_dictionary import (
+    ATTRIBUTE_COLUMNS, DICTIONARY_PATH, ensure_product_ids, load_product_dictionary, optimize_dtypes,
+)
+
+INPUT_PATHS = {
+    'sales': 'output/processed_sales.csv',
+    'imports': 'output/processed_imports.csv',
+    'stock': 'output/processed_stock.csv',
+    # Opcional: si todavía no existe, la demanda se estima como ventas / 90 días
+    'forecast': 'output/demand_forecast.csv',
+}
+OPTIONAL_INPUTS = {'forecast'}
+FORECAST_COLUMNS = ['forecast_daily_demand']
+MASTER_PATH = 'output/master_dataset.csv'
+DEFAULT_IMPORT_DATE = pd.Timestamp('2024-12-01')
+
+_lock = threading.Lock()
+# Estado en memoria: huellas de las entradas, entradas indexadas por product_id,
+# dataset maestro (sin columnas dependientes de la fecha) y posiciones por producto
+_cache: Dict = {}
+
+
+def _read_input(path: str) -> pd.DataFrame:
+    if path == INPUT_PATHS['forecast']:
+        if not os.path.exists(path):
+            return pd.DataFrame({col: pd.Series(dtype='float64') for col in FORECAST_COLUMNS},
+                                index=pd.Index([], dtype='int32', name='product_id'))
+        return pd.read_csv(path, usecols=['product_id'] + FORECAST_COLUMNS).set_index('product_id')
+    df = ensure_product_ids(pd.read_csv(path))
+    return df.drop(columns='normalized_description').set_index('product_id')
+
 
-def build_master_dataset():
-    # Cargar archivos ya procesados
-    sales = pd.read_csv('output/processed_sales.csv')
-    imports = pd.read_csv('output/processed_imports.csv')
-    stock = pd.read_csv('output/processed_stock.csv')
+def _changed_ids(old: pd.DataFrame, new: pd.DataFrame) -> pd.Index:
+    """Product IDs whose rows were added, removed or modified between two versions."""
+    def pairs(df):
+        return pd.MultiIndex.from_arrays(
+            [df.index, pd.util.hash_pandas_object(df, index=False).to_numpy()]
+        )
+    return pairs(old).symmetric_difference(pairs(new)).get_level_values(0).unique()
 
-     # Unificar por descripción normalizada
-    df = sales.merge(imports, on='normalized_description', how='left') \
-              .merge(stock, on='normalized_description', how='left')
 
-    # Demanda diaria estimada (ventas_totales / 90 días)
-    df['demanda_diaria_estimada'] = df['total_units_sold'] / 90
+def _join(sales: pd.DataFrame, imports: pd.DataFrame, stock: pd.DataFrame, forecast: pd.DataFrame) -> pd.DataFrame:
+    # Join por índice entero: pandas reutiliza la tabla hash del índice de la derecha
+    return sales.join(imports, how='left').join(forecast, how='left').join(stock, how='left')
+
+
+def _derive(base: pd.DataFrame) -> pd.DataFrame:
+    """Columns that depend only on the joined data (not on today's date)."""
+    df = base.reset_index()
+
+    # Atributos categóricos (marca, categoría, línea) desde el diccionario de productos
+    dictionary = load_product_dictionary().set_index('product_id')
+    for col in ATTRIBUTE_COLUMNS:
+        df[col] = df['product_id'].map(dictionary[col])
+    df.insert(1, 'normalized_description', df['product_id'].map(dictionary['normalized_description']))
+
+    # Demanda diaria estimada: pronóstico por SKU; sin pronóstico, ventas_totales / 90 días
+    df['demanda_diaria_estimada'] = df['forecast_daily_demand'].astype('float64').fillna(df['total_units_sold'] / 90)
+    df = df.drop(columns=FORECAST_COLUMNS)
 
     # Rellenar tiempos promedio de entrega si están vacíos
     avg_delivery_time = df['tiempo_promedio_entrega'].mean(skipna=True)
@@ -23,15 +74,97 @@ def build_master_dataset():
 
     # Asegurar formato de fecha y llenar valores faltantes
     df['ultima_fecha_importacion'] = pd.to_datetime(df['ultima_fecha_importacion'], errors='coerce')
-    df['ultima_fecha_importacion'] = df['ultima_fecha_importacion'].fillna(pd.Timestamp('2024-12-01'))
+    df['ultima_fecha_importacion'] = df['ultima_fecha_importacion'].fillna(DEFAULT_IMPORT_DATE)
+
+    return optimize_dtypes(df)
+
 
+def add_time_dependent_columns(df: pd.DataFrame, today: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Derive the columns that depend on today's date; they are never stored on disk."""
+    today = today if today is not None else pd.Timestamp.today()
+    fechas = pd.to_datetime(df['ultima_fecha_importacion'], errors='coerce')
     # Calcular días desde la última importación
-    df['dias_hasta_proxima_importacion'] = (
-        pd.Timestamp.today() - df['ultima_fecha_importacion']
-    ).dt.days
+    df['dias_hasta_proxima_importacion'] = (today - fechas).dt.days
+    return df
 
-    # Guardar dataset unificado
-    df.to_csv('output/master_dataset.csv', index=False)
+
+def _dictionary_version() -> Optional[str]:
+    return file_fingerprint(DICTIONARY_PATH) if os.path.exists(DICTIONARY_PATH) else None
+
+
+def _refresh() -> Dict:
+    """Bring the cache up to date with the processed files; only changed products are re-joined."""
+    fingerprints = {
+        name: file_fingerprint(path) if name not in OPTIONAL_INPUTS or os.path.exists(path) else None
+        for name, path in INPUT_PATHS.items()
+    }
+
+    if (_cache and _cache['fingerprints'] == fingerprints and _cache['dictionary'] == _dictionary_version()
+            and os.path.exists(MASTER_PATH)):
+        return _cache
+
+    if not _cache:
+        inputs = {name: _read_input(path) for name, path in INPUT_PATHS.items()}
+        base = _join(inputs['sales'], inputs['imports'], inputs['stock'], inputs['forecast']).sort_index(kind='mergesort')
+    else:
+        inputs = dict(_cache['inputs'])
+        changed = pd.Index([], dtype='int32')
+        for name, path in INPUT_PATHS.items():
+            if _cache['fingerprints'][name] != fingerprints[name]:
+                new = _read_input(path)
+                changed = changed.union(_changed_ids(inputs[name], new))
+                inputs[name] = new
+        base = _cache['base']
+        if len(changed):
+            sales = inputs['sales']
+            rebuilt = _join(sales[sales.index.isin(changed)], inputs['imports'], inputs['stock'], inputs['forecast'])
+            base = pd.concat([base[~base.index.isin(changed)], rebuilt]).sort_index(kind='mergesort')
+
+    master = _derive(base)
+    master.to_csv(MASTER_PATH, index=False)
     print("✅ Archivo generado: master_dataset.csv con valores completados.")
 
-    return df
\ No newline at end of file
+    _cache.update({
+        'fingerprints': fingerprints,
+        # Leer las entradas puede registrar productos nuevos, así que la versión
+        # del diccionario se toma al final
+        'dictionary': _dictionary_version(),
+        'inputs': inputs,
+        'base': base,
+        'master': master,
+        'positions': master.groupby('product_id').indices,
+        # Primera fila de cada producto, para tomar muchos productos de una vez
+        'first_position': pd.Series(range(len(master)), index=master['product_id']).groupby(level=0).first(),
+    })
+    return _cache
+
+
+def build_master_dataset() -> pd.DataFrame:
+    """
+    Return the master dataset, rebuilding it only when one of the processed
+    inputs changed. Time-dependent columns are computed on every call.
+    """
+    with _lock:
+        cache = _refresh()
+        master = cache['master'].copy()
+    return add_time_dependent_columns(master)
+
+
+def lookup_product(product_id: int) -> Optional[pd.DataFrame]:
+    """Master rows of one product, found through the in-memory index in O(1)."""
+    with _lock:
+        cache = _refresh()
+        positions = cache['positions'].get(product_id)
+        if positions is None:
+            return None
+        rows = cache['master'].iloc[positions].copy()
+    return add_time_dependent_columns(rows)
+
+
+def lookup_products(product_ids) -> pd.DataFrame:
+    """First master row of each requested product (in request order), in one vectorized take."""
+    with _lock:
+        cache = _refresh()
+        positions = cache['first_position'].reindex(pd.Index(product_ids, dtype='int64')).dropna()
+        rows = cache['master'].iloc[positions.astype('int64').to_numpy()].copy()
+    return add_time_dependent_columns(rows.reset_index(drop=True))
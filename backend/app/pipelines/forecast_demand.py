@@ -0,0 +1,123 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from app.pipelines.ingest import read_source
+from app.pipelines.process_sales import prepare_sales
+from app.pipelines.product_dictionary import encode_products
+
+OUTPUT_PATH = "output/demand_forecast.csv"
+HORIZON_WEEKS = 13
+SEASON_LENGTH = 52
+DAMPING = 0.9
+# Parámetros evaluados para todos los SKUs a la vez; cada SKU se queda con el de menor error
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.0, 0.1, 0.3)
+GAMMA = 0.2
+WARMUP_WEEKS = 2
+CHUNK_SKUS = 10000
+
+
+def weekly_demand_matrix(dates: pd.Series, product_ids: pd.Series, units: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dense SKU x week matrix of units sold, built with one bincount. The last
+    week is scaled up when the data ends part way through it.
+    """
+    valid = dates.notna() & units.notna()
+    if not valid.any():
+        raise ValueError("No sales with a valid date and units to build the weekly demand from.")
+    dates, product_ids, units = dates[valid], product_ids[valid], units[valid]
+    days = (dates - dates.min()).dt.days.to_numpy()
+    weeks = days // 7
+    n_weeks = int(weeks.max()) + 1
+
+    codes, skus = pd.factorize(product_ids, sort=True)
+    flat = codes * n_weeks + weeks
+    matrix = np.bincount(flat, weights=units.to_numpy(dtype='float64'), minlength=len(skus) * n_weeks)
+    matrix = matrix.reshape(len(skus), n_weeks)
+
+    days_in_last_week = int(days.max()) % 7 + 1
+    if days_in_last_week < 7:
+        matrix[:, -1] *= 7 / days_in_last_week
+    return matrix, np.asarray(skus)
+
+
+def _smooth(Y: np.ndarray, alphas: np.ndarray, betas: np.ndarray, season_length: int) -> Dict[str, np.ndarray]:
+    """
+    Damped-trend exponential smoothing (Holt, or additive Holt-Winters when there
+    are at least two seasons of history) for every SKU and every parameter pair
+    at once. State arrays have shape (parameter pairs, SKUs); the only Python loop
+    is over weeks.
+    """
+    n_params, (n_skus, n_weeks) = len(alphas), Y.shape
+    a, b = alphas[:, None], betas[:, None]
+    seasonal = n_weeks >= 2 * season_length
+
+    if seasonal:
+        first = Y[:, :season_length]
+        level = np.broadcast_to(first.mean(axis=1), (n_params, n_skus)).copy()
+        trend = np.broadcast_to((Y[:, season_length:2 * season_length].mean(axis=1) - first.mean(axis=1)) / season_length,
+                                (n_params, n_skus)).copy()
+        season = np.broadcast_to(first - first.mean(axis=1, keepdims=True), (n_params, n_skus, season_length)).copy()
+    else:
+        # Demanda intermitente: el nivel inicial es el promedio de la historia, no la primera semana
+        level = np.broadcast_to(Y.mean(axis=1), (n_params, n_skus)).copy()
+        trend = np.zeros((n_params, n_skus))
+        season = None
+
+    sse = np.zeros((n_params, n_skus))
+    for t in range(n_weeks):
+        y = Y[:, t]
+        s = season[:, :, t % season_length] if seasonal else 0.0
+        fitted = level + DAMPING * trend + s
+        if t >= WARMUP_WEEKS:
+            sse += (y - fitted) ** 2
+        new_level = a * (y - s) + (1 - a) * (level + DAMPING * trend)
+        trend = b * (new_level - level) + (1 - b) * DAMPING * trend
+        if seasonal:
+            season[:, :, t % season_length] = GAMMA * (y - new_level) + (1 - GAMMA) * s
+        level = new_level
+
+    # Pronóstico acumulado del horizonte con tendencia amortiguada
+    steps = np.arange(1, HORIZON_WEEKS + 1)
+    damped = np.cumsum(DAMPING ** steps)
+    horizon = level[:, :, None] + trend[:, :, None] * damped
+    if seasonal:
+        horizon = horizon + season[:, :, (n_weeks + steps - 1) % season_length]
+    return {'sse': sse, 'horizon': np.clip(horizon, 0, None).sum(axis=2), 'seasonal': seasonal}
+
+
+def forecast_matrix(Y: np.ndarray, season_length: int = SEASON_LENGTH) -> pd.DataFrame:
+    """Pick the best smoothing parameters per SKU and forecast the next HORIZON_WEEKS weeks."""
+    grid = np.array([(alpha, beta) for alpha in ALPHAS for beta in BETAS])
+    frames = []
+    for start in range(0, len(Y), CHUNK_SKUS):
+        chunk = Y[start:start + CHUNK_SKUS]
+        result = _smooth(chunk, grid[:, 0], grid[:, 1], season_length)
+        best = result['sse'].argmin(axis=0)
+        columns = np.arange(len(chunk))
+        horizon_units = result['horizon'][best, columns]
+        frames.append(pd.DataFrame({
+            'weeks_with_sales': (chunk > 0).sum(axis=1),
+            'forecast_horizon_units': horizon_units,
+            'forecast_daily_demand': horizon_units / (HORIZON_WEEKS * 7),
+            'alpha': grid[best, 0],
+            'beta': grid[best, 1],
+            'method': 'holt_winters' if result['seasonal'] else 'holt',
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def forecast_demand() -> str:
+    """
+    Forecast daily demand per product from the dated sales in data/sales.csv
+    and write it to output/demand_forecast.csv.
+    """
+    df, col_fecha, _ = prepare_sales(read_source("data/sales.csv"))
+    product_ids = encode_products(df['normalized_description'])
+
+    Y, skus = weekly_demand_matrix(df[col_fecha], product_ids, df['Piezas'])
+    forecast = forecast_matrix(Y)
+    forecast.insert(0, 'product_id', skus.astype('int32'))
+    forecast.to_csv(OUTPUT_PATH, index=False, encoding='utf-8')
+    return OUTPUT_PATH
@@ -0,0 +1,170 @@
+import codecs
+import csv
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+import pandas as pd
+
+CACHE_DIR = os.path.join("output", ".cache")
+SNIFF_BYTES = 64 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+MAX_CACHED_FRAMES = 8
+
+# (size, mtime_ns) -> sha256, para no volver a hashear un archivo que no cambió
+_fingerprints: Dict[str, Tuple[Tuple[int, int], str]] = {}
+# sha256 -> (encoding, separator)
+_formats: Dict[str, Tuple[str, str]] = {}
+# sha256 -> DataFrame ya parseado, y "sha256:tipo" -> valor derivado de ese DataFrame
+_frames: "OrderedDict[str, Any]" = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+def normalize_descriptions(values: pd.Series) -> pd.Series:
+    """Vectorized equivalent of str(text).strip().lower().replace('  ', ' ')."""
+    return (
+        values.astype(str)
+        .str.strip()
+        .str.lower()
+        .str.replace('  ', ' ', regex=False)
+    )
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Return the sha256 of the file contents. The digest is memoized per
+    (size, mtime) so unchanged files are not read again.
+    """
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cached = _fingerprints.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(block)
+    _fingerprints[key] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def sniff_format(path: str) -> Tuple[str, str]:
+    """Detect (encoding, separator) for a CSV file, cached per content hash."""
+    fingerprint = file_fingerprint(path)
+    if fingerprint in _formats:
+        return _formats[fingerprint]
+
+    with open(path, 'rb') as f:
+        raw = f.read(SNIFF_BYTES)
+    try:
+        # final=False tolera un carácter multibyte cortado al final de la muestra
+        sample = codecs.getincrementaldecoder('utf-8')().decode(raw, final=False)
+        encoding = 'utf-8'
+    except UnicodeDecodeError:
+        sample = raw.decode('latin1')
+        encoding = 'latin1'
+    if sample.startswith('\ufeff'):
+        sample = sample[1:]
+        encoding = 'utf-8-sig'
+
+    dialect = csv.Sniffer().sniff(sample[:2048])
+    _formats[fingerprint] = (encoding, dialect.delimiter)
+    return _formats[fingerprint]
+
+
+def _cache_path(path: str, fingerprint: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{fingerprint[:16]}.pkl")
+
+
+def _cached(key: str) -> Any:
+    with _frames_lock:
+        value = _frames.get(key)
+        if value is not None:
+            _frames.move_to_end(key)
+        return value
+
+
+def _remember(key: str, value: Any) -> None:
+    with _frames_lock:
+        _frames[key] = value
+        _frames.move_to_end(key)
+        while len(_frames) > MAX_CACHED_FRAMES:
+            _frames.popitem(last=False)
+
+
+def _store_on_disk(path: str, fingerprint: str, df: pd.DataFrame) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    target = _cache_path(path, fingerprint)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    # Solo se conserva la versión más reciente de cada archivo fuente
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(f"{stem}-") and name.endswith('.pkl'):
+            os.remove(os.path.join(CACHE_DIR, name))
+    tmp_path = f"{target}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, target)
+
+
+def read_source(path: str) -> pd.DataFrame:
+    """
+    Load a raw CSV from data/ using the parsed-frame cache. The file is only
+    parsed when its content hash is not already cached in memory or on disk.
+    Callers get their own copy and may mutate it freely.
+    """
+    fingerprint = file_fingerprint(path)
+
+    df = _cached(fingerprint)
+    if df is None:
+        cached_file = _cache_path(path, fingerprint)
+        if os.path.exists(cached_file):
+            df = pd.read_pickle(cached_file)
+        else:
+            encoding, sep = sniff_format(path)
+            try:
+                df = pd.read_csv(path, encoding=encoding, sep=sep)
+            except UnicodeDecodeError:
+                # La muestra era UTF-8 válido pero el resto del archivo no
+                _formats[fingerprint] = ('latin1', sep)
+                df = pd.read_csv(path, encoding='latin1', sep=sep)
+            _store_on_disk(path, fingerprint, df)
+        _remember(fingerprint, df)
+
+    return df.copy()
+
+
+def read_derived(path: str, kind: str, build: Callable[[pd.DataFrame], Any]) -> Any:
+    """
+    Return build(read_source(path)), computed once per content hash and `kind`
+    and kept in the same in-memory cache as the parsed frames. The value is
+    shared between callers and must not be mutated.
+    """
+    key = f"{file_fingerprint(path)}:{kind}"
+    value = _cached(key)
+    if value is None:
+        value = build(read_source(path))
+        _remember(key, value)
+    return value
+
+
+def iter_source_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream a raw CSV in frames of at most `chunksize` rows, bypassing the
+    parsed-frame cache so peak memory depends on the chunk size only.
+    """
+    if chunksize <= 0:
+        raise ValueError("chunksize must be a positive number of rows.")
+    encoding, sep = sniff_format(path)
+    with pd.read_csv(path, encoding=encoding, sep=sep, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def register_fingerprint(path: str, digest: str) -> None:
+    """Record a sha256 computed elsewhere (e.g. while streaming an upload) for path."""
+    stat = os.stat(path)
+    _fingerprints[os.path.abspath(path)] = ((stat.st_size, stat.st_mtime_ns), digest)
@@ -0,0 +1,256 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.pipelines.processes import process_context
+
+THREAD_WORKERS = 2
+PROCESS_WORKERS = 2
+MAX_FINISHED_JOBS = 100
+BACKENDS = ('thread', 'process')
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobCancelled(Exception):
+    """Raised inside a thread job when its cancellation was requested."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict
+    backend: str
+    status: str = 'queued'
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[object] = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_requested: bool = False
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{json.dumps(self.params, sort_keys=True, default=str)}"
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        now = time.time()
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'backend': self.backend,
+            'status': self.status,
+            'progress': round(self.progress, 4),
+            'message': self.message,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'queued_seconds': round((self.started_at or now) - self.submitted_at, 3),
+            'run_seconds': round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+@dataclass
+class JobType:
+    func: Callable
+    # Backend por defecto; las funciones del backend de procesos deben ser importables a nivel módulo
+    backend: str = 'thread'
+    process_capable: bool = False
+
+
+class JobManager:
+    """
+    In-process job queue. Thread jobs receive a `progress(fraction, message)`
+    callback, which also raises JobCancelled once cancellation is requested;
+    process jobs only report start and end, and can be cancelled while queued.
+    Submitting a job identical to one that is still queued or running returns
+    the existing job instead of starting a new one.
+    """
+
+    def __init__(self, thread_workers: int = THREAD_WORKERS, process_workers: int = PROCESS_WORKERS):
+        self._types: Dict[str, JobType] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread_workers = thread_workers
+        self._process_workers = process_workers
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def register(self, kind: str, func: Callable, backend: str = 'thread', process_capable: bool = False) -> None:
+        self._types[kind] = JobType(func, backend, process_capable or backend == 'process')
+
+    def kinds(self) -> List[str]:
+        return sorted(self._types)
+
+    def _pool(self, backend: str):
+        if backend == 'process':
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self._process_workers,
+                                                         mp_context=process_context())
+            return self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self._thread_workers, thread_name_prefix="job")
+        return self._thread_pool
+
+    def submit(self, kind: str, params: Optional[Dict] = None, backend: Optional[str] = None) -> tuple:
+        """Queue a job and return (job, deduplicated)."""
+        if kind not in self._types:
+            raise ValueError(f"Unknown job type: {kind}. Available: {self.kinds()}")
+        job_type = self._types[kind]
+        backend = backend or job_type.backend
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+        if backend == 'process' and not job_type.process_capable:
+            raise ValueError(f"Job type '{kind}' cannot run in the process backend.")
+
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, params=dict(params or {}), backend=backend)
+        with self._lock:
+            for existing in self._jobs.values():
+                if existing.status in ACTIVE_STATUSES and existing.key == job.key and not existing.cancel_requested:
+                    return existing, True
+            self._jobs[job.id] = job
+            self._prune()
+            pool = self._pool(backend)
+
+        if backend == 'process':
+            # Sin avance intermedio entre procesos: el trabajo figura en ejecución desde que se envía
+            job.status, job.started_at = 'running', time.time()
+            job.future = pool.submit(job_type.func, **job.params)
+            job.future.add_done_callback(lambda future: self._on_process_done(job, future))
+        else:
+            job.future = pool.submit(self._run_thread_job, job, job_type.func)
+        return job, False
+
+    def _run_thread_job(self, job: Job, func: Callable) -> None:
+        if job.cancel_requested:
+            self._finish(job, 'cancelled')
+            return
+        job.status, job.started_at = 'running', time.time()
+
+        def progress(fraction: float, message: Optional[str] = None) -> None:
+            if job.cancel_requested:
+                raise JobCancelled()
+            job.progress = max(job.progress, min(float(fraction), 1.0))
+            if message is not None:
+                job.message = message
+
+        try:
+            result = func(progress=progress, **job.params)
+            self._finish(job, 'succeeded', result=result)
+        except JobCancelled:
+            self._finish(job, 'cancelled')
+        except Exception as e:
+            self._finish(job, 'failed', error=str(e))
+
+    def _on_process_done(self, job: Job, future: Future) -> None:
+        if future.cancelled():
+            self._finish(job, 'cancelled')
+        elif future.exception() is not None:
+            self._finish(job, 'failed', error=str(future.exception()))
+        else:
+            self._finish(job, 'succeeded', result=future.result())
+
+    def _finish(self, job: Job, status: str, result=None, error: Optional[str] = None) -> None:
+        job.status, job.result, job.error = status, result, error
+        job.finished_at = time.time()
+        if status == 'succeeded':
+            job.progress = 1.0
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Request cancellation. Queued jobs never start; running thread jobs stop
+        at their next progress checkpoint.
+        """
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job
+        job.cancel_requested = True
+        if job.future is not None and job.future.cancel() and job.backend == 'thread':
+            self._finish(job, 'cancelled')
+        return job
+
+
+manager = JobManager()
+
+
+# Tipos de trabajo disponibles (imports diferidos, como las etapas del runner)
+
+def _process_imports_job(progress=None, chunksize=None):
+    from app.pipelines.parsing import load_report
+    from app.pipelines.process_imports import process_imports
+    return {"output_file": process_imports(chunksize=chunksize), "parse_report": load_report("imports")}
+
+
+def _process_sales_job(progress=None, incremental=False, chunksize=None):
+    from app.pipelines.parsing import load_report
+    from app.pipelines.process_sales import process_sales
+    output_file = process_sales(incremental=incremental, chunksize=chunksize)
+    return {"output_file": output_file, "parse_report": load_report("sales")}
+
+
+def _process_stock_job(progress=None, chunksize=None):
+    from app.pipelines.parsing import load_report
+    from app.pipelines.process_stock import process_stock
+    return {"output_file": process_stock(chunksize=chunksize), "parse_report": load_report("stock")}
+
+
+def _simulate_stock_job(progress=None, **params):
+    from app.pipelines.simulate_stock import simulate_stock
+    return {"output_file": simulate_stock(**params)}
+
+
+def _pipeline_job(progress=None, force=False):
+    from app.pipelines.runner import run_pipeline
+    return run_pipeline(force=force, progress=progress)
+
+
+def _run_model_job(progress=None, **params):
+    from app.models.predictor import run_model
+    return run_model(progress=progress, **params)
+
+
+def _conformal_benchmark_job(progress=None, strategies=None, alpha=0.1):
+    from app.models.predictor import benchmark_conformal_strategies
+    return {"results": benchmark_conformal_strategies(strategies=strategies, alpha=alpha)}
+
+
+def _descriptive_analysis_job(progress=None):
+    from app.models.descriptive_analysis import run_descriptive_analysis
+    return {"graphs_generated": run_descriptive_analysis(progress=progress)}
+
+
+manager.register("process_imports", _process_imports_job, process_capable=True)
+manager.register("process_sales", _process_sales_job, process_capable=True)
+manager.register("process_stock", _process_stock_job, process_capable=True)
+manager.register("simulate_stock", _simulate_stock_job, process_capable=True)
+# El pipeline ya reparte sus etapas en su propio pool de procesos
+manager.register("pipeline", _pipeline_job)
+manager.register("run_model", _run_model_job, process_capable=True)
+manager.register("descriptive_analysis", _descriptive_analysis_job, process_capable=True)
+manager.register("conformal_benchmark", _conformal_benchmark_job, process_capable=True)
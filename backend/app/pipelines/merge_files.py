@@ -1,15 +1,111 @@
 import pandas as pd
-from typing import List
+from typing import Iterator, List, Optional
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
-def merge_excel_files(file_paths: List[str], output_path: str) -> str:
+from app.pipelines.processes import process_context
+
+OUTPUT_FORMATS = ('csv', 'parquet')
+
+
+def _read_workbook(path: str) -> pd.DataFrame:
+    # El motor openpyxl de pandas abre los .xlsx en modo read_only (lectura en streaming)
+    return pd.read_excel(path)
+
+
+def _parse_workbook(path: str, spill_path: str) -> List[str]:
+    """Parse a workbook once, spill the frame to a pickle and return only its columns."""
+    frame = _read_workbook(path)
+    frame.to_pickle(spill_path)
+    return list(frame.columns)
+
+
+def _union_columns(headers: List[List[str]]) -> List[str]:
+    """Column union in order of appearance, as pd.concat would build it."""
+    columns = []
+    seen = set()
+    for header in headers:
+        for col in header:
+            if col not in seen:
+                seen.add(col)
+                columns.append(col)
+    return columns
+
+
+def _read_spilled(spill_paths: List[str]) -> Iterator[pd.DataFrame]:
+    """Yield the spilled frames in input order, deleting each one once read."""
+    for path in spill_paths:
+        frame = pd.read_pickle(path)
+        os.remove(path)
+        yield frame
+
+
+class _ParquetAppender:
+    def __init__(self, output_path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires the 'pyarrow' package.")
+        self._pa = pa
+        self._pq = pq
+        self._path = output_path
+        self._writer = None
+        self._schema = None
+
+    def append(self, frame: pd.DataFrame) -> None:
+        table = self._pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = self._pq.ParquetWriter(self._path, self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def merge_excel_files(file_paths: List[str], output_path: str,
+                      output_format: str = 'csv', max_workers: Optional[int] = None) -> str:
     """
-    Merge multiple Excel files into one CSV and save to output_path.
+    Merge multiple Excel files into one CSV (or Parquet) file and save to output_path.
+
+    Workbooks are parsed in a process pool, each one exactly once: the parsed
+    frame is spilled to a temporary pickle and only its columns go back, so
+    every part is written with the union of the parsed headers while the
+    merged table is never held in memory at once. Rows keep the order of
+    file_paths. The output is written to a temporary file that replaces
+    output_path only when the merge succeeds.
     """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}. Use one of {OUTPUT_FORMATS}.")
+
+    tmp_path = f"{output_path}.tmp"
     try:
-        dataframes = [pd.read_excel(path) for path in file_paths]
-        merged_df = pd.concat(dataframes, ignore_index=True)
-        merged_df.to_csv(output_path, index=False)
+        workers = max(1, max_workers or min(len(file_paths), os.cpu_count() or 1))
+        spill_root = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.TemporaryDirectory(dir=spill_root) as spill_dir:
+            spill_paths = [os.path.join(spill_dir, f"{i}.pkl") for i in range(len(file_paths))]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+                columns = _union_columns(list(pool.map(_parse_workbook, file_paths, spill_paths)))
+
+            if output_format == 'parquet':
+                appender = _ParquetAppender(tmp_path)
+                try:
+                    for frame in _read_spilled(spill_paths):
+                        appender.append(frame.reindex(columns=columns))
+                finally:
+                    appender.close()
+            else:
+                with open(tmp_path, 'w', encoding='utf-8', newline='') as out:
+                    for i, frame in enumerate(_read_spilled(spill_paths)):
+                        frame.reindex(columns=columns).to_csv(out, index=False, header=(i == 0))
+        # Una falla a mitad de camino no deja una salida truncada que parezca válida
+        os.replace(tmp_path, output_path)
         return output_path
     except Exception as e:
         raise RuntimeError(f"Error merging files: {str(e)}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
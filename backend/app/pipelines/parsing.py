@@ -0,0 +1,106 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Union
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+REPORT_DIR = os.path.join("output", ".state")
+
+
+@dataclass(frozen=True)
+class NumberFormat:
+    """How numbers are written in a source file."""
+    decimal: str = '.'
+    thousands: str = ','
+
+    def translation(self) -> dict:
+        # Una sola tabla de traducción: quita separadores de miles y espacios,
+        # y convierte el separador decimal a '.'
+        table = {' ': None, '\t': None, '\u00a0': None, '$': None, self.thousands: None}
+        table[self.decimal] = '.'
+        return str.maketrans(table)
+
+
+# Formatos numéricos por locale
+NUMBER_FORMATS = {
+    'es_MX': NumberFormat(decimal='.', thousands=','),
+    'en_US': NumberFormat(decimal='.', thousands=','),
+    'es_ES': NumberFormat(decimal=',', thousands='.'),
+}
+
+
+@dataclass(frozen=True)
+class DateFormat:
+    """A strptime format for a date column, e.g. '%d/%m/%Y'."""
+    pattern: str
+
+
+ColumnFormat = Union[NumberFormat, DateFormat]
+
+
+def parse_numeric(values: pd.Series, fmt: NumberFormat = NUMBER_FORMATS['es_MX']) -> pd.Series:
+    """Convert a column to float in one vectorized pass; unparseable values become NaN."""
+    if is_numeric_dtype(values):
+        return values
+    cleaned = values.astype('string').str.translate(fmt.translation())
+    numbers = pd.to_numeric(cleaned.to_numpy(dtype=object, na_value=None), errors='coerce')
+    return pd.Series(numbers, index=values.index, name=values.name, dtype='float64')
+
+
+def parse_dates(values: pd.Series, fmt: DateFormat) -> pd.Series:
+    """Parse a date column with its declared format instead of per-row inference."""
+    if is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, format=fmt.pattern, errors='coerce')
+
+
+def parse_columns(df: pd.DataFrame, schema: Dict[str, ColumnFormat]) -> Dict[str, Dict[str, int]]:
+    """
+    Convert every column declared in `schema` in place and report, per column,
+    how many non-empty values could not be parsed.
+    """
+    report = {}
+    for col, fmt in schema.items():
+        if col not in df.columns:
+            raise Exception(f"Missing required column: {col}")
+        raw = df[col]
+        present = raw.notna()
+        if raw.dtype == object:
+            present &= raw.astype('string').str.strip().ne('').fillna(False).astype(bool)
+        parsed = parse_dates(raw, fmt) if isinstance(fmt, DateFormat) else parse_numeric(raw, fmt)
+        df[col] = parsed
+        report[col] = {'total': int(present.sum()), 'failed': int((present & parsed.isna()).sum())}
+    return report
+
+
+def merge_reports(current: Dict[str, Dict[str, int]], new: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """Add up the counts of two reports (used when a file is parsed in chunks)."""
+    merged = {col: dict(counts) for col, counts in current.items()}
+    for col, counts in new.items():
+        entry = merged.setdefault(col, {'total': 0, 'failed': 0})
+        entry['total'] += counts['total']
+        entry['failed'] += counts['failed']
+    return merged
+
+
+def save_report(source: str, report: Dict[str, Dict[str, int]]) -> None:
+    """Persist the parse report of one source so the API can return it."""
+    failed = {col: counts['failed'] for col, counts in report.items() if counts['failed']}
+    if failed:
+        print(f"⚠️ {source}: valores que no se pudieron convertir por columna: {failed}")
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = os.path.join(REPORT_DIR, f"parse_{source}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_report(source: str) -> Dict[str, Dict[str, int]]:
+    path = os.path.join(REPORT_DIR, f"parse_{source}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -1,53 +1,124 @@
+from typing import Optional, Tuple
+
 import pandas as pd
-import csv
+from app.pipelines.ingest import iter_source_chunks, normalize_descriptions, read_source
+from app.pipelines.parsing import NUMBER_FORMATS, DateFormat, merge_reports, parse_columns, save_report
+from app.pipelines.product_dictionary import encode_products
 
-def normalize_description(text):
-    return str(text).strip().lower().replace('  ', ' ')
+# Columnas de atributos que se registran en el diccionario de productos
+ATTRIBUTE_SOURCES = {'brand': 'MARCA', 'category': 'CATEGORIA'}
 
-def detect_separator(path, encoding='latin1'):
-    with open(path, 'r', encoding=encoding) as f:
-        sample = f.read(2048)
-        dialect = csv.Sniffer().sniff(sample)
-        return dialect.delimiter
+IMPORTS_DATE_FORMAT = DateFormat('%m/%d/%Y')
+# Inicio del tiempo de entrega, en orden de preferencia: la recolección real o, si el
+# archivo no la trae, la fecha de la orden
+LEAD_TIME_START_COLUMNS = ('Actual Pickup Date', 'Date')
 
-def process_imports() -> str:
-    input_path = "data/imports.csv"
-    output_path = "output/processed_imports.csv"
+# Formato declarado de cada columna que se convierte
+IMPORTS_SCHEMA = {
+    'Actual Delivery Date': IMPORTS_DATE_FORMAT,
+    'CANTIDAD': NUMBER_FORMATS['es_MX'],
+    'COSTO UNITARIO EN MEX': NUMBER_FORMATS['es_MX'],
+    'GASTOS LOGISTICOS MXN': NUMBER_FORMATS['es_MX'],
+}
 
-    sep = detect_separator(input_path)
-    df = pd.read_csv(input_path, encoding='latin1', sep=sep)
 
+def prepare_imports(df: pd.DataFrame) -> Tuple[pd.DataFrame, dict]:
+    """
+    Normalize descriptions, parse dates and numbers and add the lead time in
+    days (`tiempo_entrega`), measured from the actual pickup date or, when
+    the file has none, from the order date. Returns the frame and the parse
+    report.
+    """
     col_desc = next((c for c in df.columns if 'descrip' in c.lower()), None)
     if not col_desc:
         raise Exception("No description column found.")
-    df[col_desc] = df[col_desc].apply(normalize_description)
+    col_start = next((c for c in LEAD_TIME_START_COLUMNS if c in df.columns), None)
+    if not col_start:
+        raise Exception(
+            f"Missing lead-time start column: imports need one of {', '.join(LEAD_TIME_START_COLUMNS)}."
+        )
+    df[col_desc] = normalize_descriptions(df[col_desc])
     df['normalized_description'] = df[col_desc]
 
-    df['Actual Pickup Date'] = pd.to_datetime(df['Actual Pickup Date'], errors='coerce')
-    df['Actual Delivery Date'] = pd.to_datetime(df['Actual Delivery Date'], errors='coerce')
-    df['tiempo_entrega'] = (df['Actual Delivery Date'] - df['Actual Pickup Date']).dt.days
-
-    numeric_cols = ['CANTIDAD', 'COSTO UNITARIO EN MEX', 'GASTOS LOGISTICOS MXN']
-    for col in numeric_cols:
-        if col not in df.columns:
-            raise Exception(f"Missing required column: {col}")
-        df[col] = (
-            df[col]
-            .astype(str)
-            .str.replace(',', '')
-            .str.replace('.', '', regex=False)
-            .str.replace(' ', '')
-            .str.replace(',', '.', regex=False)
-        )
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    report = parse_columns(df, {col_start: IMPORTS_DATE_FORMAT, **IMPORTS_SCHEMA})
+    df['tiempo_entrega'] = (df['Actual Delivery Date'] - df[col_start]).dt.days
+
+    for attribute, col in ATTRIBUTE_SOURCES.items():
+        df[attribute] = df[col].astype('string').str.strip() if col in df.columns else pd.NA
+    return df, report
+
+
+def _partial_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-product sums, counts and max date that can be combined across chunks."""
+    return df.groupby('normalized_description').agg(
+        cantidad_sum=('CANTIDAD', 'sum'),
+        costo_sum=('COSTO UNITARIO EN MEX', 'sum'),
+        costo_count=('COSTO UNITARIO EN MEX', 'count'),
+        gastos_sum=('GASTOS LOGISTICOS MXN', 'sum'),
+        gastos_count=('GASTOS LOGISTICOS MXN', 'count'),
+        tiempo_sum=('tiempo_entrega', 'sum'),
+        tiempo_count=('tiempo_entrega', 'count'),
+        ultima_fecha_importacion=('Actual Delivery Date', 'max'),
+        **{attribute: (attribute, 'first') for attribute in ATTRIBUTE_SOURCES},
+    )
+
+
+def _merge_partials(current: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    combined = pd.concat([current, new])
+    grouped = combined.groupby(level=0)
+    merged = grouped.sum(numeric_only=True)
+    merged['ultima_fecha_importacion'] = grouped['ultima_fecha_importacion'].max()
+    for attribute in ATTRIBUTE_SOURCES:
+        merged[attribute] = grouped[attribute].first()
+    return merged
+
+
+def _finalize(partials: pd.DataFrame) -> pd.DataFrame:
+    partials = partials.sort_index()
+
+    def mean(name):
+        return partials[f'{name}_sum'] / partials[f'{name}_count'].where(partials[f'{name}_count'] > 0)
+
+    resumen = pd.DataFrame({
+        'cantidad_total_importada': partials['cantidad_sum'],
+        'costo_unitario_promedio_import': mean('costo'),
+        'gastos_logisticos_promedio': mean('gastos'),
+        'tiempo_promedio_entrega': mean('tiempo'),
+        'ultima_fecha_importacion': partials['ultima_fecha_importacion'],
+    })
+    resumen.index.name = 'normalized_description'
+    resumen = resumen.reset_index()
+    resumen.insert(0, 'product_id', encode_products(
+        resumen['normalized_description'],
+        attributes=partials[list(ATTRIBUTE_SOURCES)],
+    ))
+    return resumen
+
+
+def process_imports(chunksize: Optional[int] = None) -> str:
+    """
+    Summarize data/imports.csv per product. With chunksize set, the file is
+    streamed in chunks of that many rows and only running per-product
+    aggregates are kept in memory.
+    """
+    input_path = "data/imports.csv"
+    output_path = "output/processed_imports.csv"
+
+    if chunksize:
+        partials, report = None, {}
+        for chunk in iter_source_chunks(input_path, chunksize):
+            chunk, chunk_report = prepare_imports(chunk)
+            chunk_partials = _partial_aggregates(chunk)
+            partials = chunk_partials if partials is None else _merge_partials(partials, chunk_partials)
+            report = merge_reports(report, chunk_report)
+        if partials is None:
+            raise Exception("Imports file has no rows.")
+    else:
+        df, report = prepare_imports(read_source(input_path))
+        partials = _partial_aggregates(df)
 
-    resumen = df.groupby('normalized_description').agg(
-        cantidad_total_importada=('CANTIDAD', 'sum'),
-        costo_unitario_promedio_import=('COSTO UNITARIO EN MEX', 'mean'),
-        gastos_logisticos_promedio=('GASTOS LOGISTICOS MXN', 'mean'),
-        tiempo_promedio_entrega=('tiempo_entrega', 'mean'),
-        ultima_fecha_importacion=('Actual Delivery Date', 'max')
-    ).reset_index()
+    save_report('imports', report)
 
+    resumen = _finalize(partials)
     resumen.to_csv(output_path, index=False, encoding='utf-8')
     return output_path
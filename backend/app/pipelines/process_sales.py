@@ -1,51 +1,291 @@
+import glob
+import hashlib
+import io
+import logging
+import os
+import pickle
+from typing import Optional, Tuple
+
 import pandas as pd
-import csv
+from app.pipelines.ingest import iter_source_chunks, normalize_descriptions, read_source, sniff_format
+from app.pipelines.parsing import NUMBER_FORMATS, DateFormat, merge_reports, parse_columns, save_report
+from app.pipelines.product_dictionary import encode_products
 
-def normalize_description(text):
-    return str(text).strip().lower().replace('  ', ' ')
+STATE_DIR = os.path.join("output", ".state")
+STATE_PATH = os.path.join(STATE_DIR, "sales_incremental.pkl")
+# Pares (producto, día) ya vistos, un archivo por mes: una corrida incremental
+# solo lee y reescribe los meses que tocan las filas nuevas
+DAYS_DIR = os.path.join(STATE_DIR, "sales_days")
+SIGNATURE_BYTES = 64 * 1024
+STATE_VERSION = 2
 
-def detect_separator(path, encoding='latin1'):
-    with open(path, 'r', encoding=encoding) as f:
-        sample = f.read(2048)
-        dialect = csv.Sniffer().sniff(sample)
-        return dialect.delimiter
+logger = logging.getLogger(__name__)
 
-def process_sales() -> str:
-    input_path = "data/sales.csv"
-    output_path = "output/processed_sales.csv"
+# Formato declarado de las columnas que se convierten; la fecha ('Fecha elab') viene como dd/mm/yyyy
+SALES_DATE_FORMAT = DateFormat('%d/%m/%Y')
+SALES_NUMERIC_COLUMNS = ['Piezas', 'Precio', 'Costo']
+SALES_NUMBER_FORMAT = NUMBER_FORMATS['es_MX']
 
-    sep = detect_separator(input_path)
-    df = pd.read_csv(input_path, encoding='latin1', sep=sep)
 
+def prepare_sales(df: pd.DataFrame) -> Tuple[pd.DataFrame, str, dict]:
+    """
+    Normalize descriptions, parse dates and numbers and add revenue/cost
+    columns. Returns the frame, the date column name and the parse report.
+    """
     col_fecha = next((c for c in df.columns if 'fecha' in c.lower()), None)
     col_desc = next((c for c in df.columns if 'descrip' in c.lower()), None)
 
     if not col_fecha or not col_desc:
         raise Exception("Missing valid date or description column.")
 
-    df[col_desc] = df[col_desc].apply(normalize_description)
+    df[col_desc] = normalize_descriptions(df[col_desc])
     df['normalized_description'] = df[col_desc]
 
-    df[col_fecha] = pd.to_datetime(df[col_fecha], errors='coerce')
-
-    for col in ['Piezas', 'Precio', 'Costo']:
-        if col not in df.columns:
-            raise Exception(f"Missing required column: {col}")
-        df[col] = df[col].astype(str).str.replace(',', '').str.replace(' ', '')
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    schema = {col_fecha: SALES_DATE_FORMAT}
+    schema.update({col: SALES_NUMBER_FORMAT for col in SALES_NUMERIC_COLUMNS})
+    report = parse_columns(df, schema)
 
     df['ingreso'] = df['Piezas'] * df['Precio']
     df['costo'] = df['Piezas'] * df['Costo']
     df['margen'] = df['ingreso'] - df['costo']
+    return df, col_fecha, report
+
+
+def _partial_aggregates(df: pd.DataFrame, col_fecha: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Per-product partial sums that can be added together, plus the distinct
+    (product, day) pairs needed for sale_frequency_days.
+    """
+    partials = df.groupby('normalized_description').agg(
+        units=('Piezas', 'sum'),
+        income=('ingreso', 'sum'),
+        cost=('costo', 'sum'),
+        margin=('margen', 'sum'),
+        price_sum=('Precio', 'sum'),
+        price_count=('Precio', 'count'),
+    )
+    days = pd.DataFrame({
+        'normalized_description': df['normalized_description'],
+        'day': df[col_fecha].dt.normalize(),
+    }).dropna(subset=['day']).drop_duplicates()
+    return partials, days
+
+
+def _merge_partials(current: Tuple[pd.DataFrame, pd.DataFrame],
+                    new: Tuple[pd.DataFrame, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    partials = pd.concat([current[0], new[0]]).groupby(level=0).sum()
+    days = pd.concat([current[1], new[1]], ignore_index=True).drop_duplicates()
+    return partials, days
+
+
+def _finalize(partials: pd.DataFrame, frequency: pd.Series) -> pd.DataFrame:
+    """Per-product summary; O(products), independent of how many sales rows the history has."""
+    partials = partials.sort_index()
+    resumen = pd.DataFrame({
+        'total_units_sold': partials['units'],
+        'total_income': partials['income'],
+        'total_cost': partials['cost'],
+        'total_margin': partials['margin'],
+        'avg_ticket_price': partials['price_sum'] / partials['price_count'].where(partials['price_count'] > 0),
+        'sale_frequency_days': frequency.reindex(partials.index, fill_value=0).astype(int),
+    })
+    resumen.index.name = 'normalized_description'
+    resumen = resumen.reset_index()
+    resumen.insert(0, 'product_id', encode_products(resumen['normalized_description']))
+    return resumen
+
+
+def _append_signature(path: str, offset: int) -> str:
+    """Hash of the first and last SIGNATURE_BYTES before offset (O(1) in file size)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read(min(SIGNATURE_BYTES, offset)))
+        f.seek(max(0, offset - SIGNATURE_BYTES))
+        digest.update(f.read(min(SIGNATURE_BYTES, offset)))
+    return digest.hexdigest()
+
+
+def _day_frequency(days: pd.DataFrame) -> pd.Series:
+    """Number of distinct sale days per product from distinct (product, day) pairs."""
+    return days.groupby('normalized_description').size()
+
+
+def _month_path(month: pd.Period) -> str:
+    return os.path.join(DAYS_DIR, f"{month}.pkl")
+
+
+def _write_month(month: pd.Period, days: pd.DataFrame) -> None:
+    path = _month_path(month)
+    tmp_path = f"{path}.tmp"
+    days.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_day_partitions(days: pd.DataFrame) -> None:
+    """Replace every month partition with the given distinct (product, day) pairs."""
+    os.makedirs(DAYS_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(DAYS_DIR, "*.pkl")):
+        os.remove(path)
+    for month, group in days.groupby(days['day'].dt.to_period('M')):
+        _write_month(month, group.reset_index(drop=True))
+
+
+def _add_day_partitions(new_days: pd.DataFrame) -> pd.Series:
+    """
+    Fold new (product, day) pairs into the month partitions they belong to and
+    return, per product, how many of them had not been seen before. Only the
+    months touched by the new rows are read and rewritten.
+    """
+    added = []
+    os.makedirs(DAYS_DIR, exist_ok=True)
+    for month, group in new_days.groupby(new_days['day'].dt.to_period('M')):
+        path = _month_path(month)
+        existing = pd.read_pickle(path) if os.path.exists(path) else group.iloc[:0]
+        merged = group.merge(existing, on=['normalized_description', 'day'], how='left', indicator=True)
+        fresh = merged.loc[merged['_merge'] == 'left_only', ['normalized_description', 'day']]
+        if len(fresh):
+            _write_month(month, pd.concat([existing, fresh], ignore_index=True))
+            added.append(fresh)
+    if not added:
+        return pd.Series(dtype='int64')
+    return _day_frequency(pd.concat(added, ignore_index=True))
+
+
+def _load_state(input_path: str) -> Optional[dict]:
+    if not os.path.exists(STATE_PATH):
+        return None
+    try:
+        with open(STATE_PATH, 'rb') as f:
+            state = pickle.load(f)
+    except Exception:
+        return None
+    if state.get('version') != STATE_VERSION or state.get('source') != os.path.abspath(input_path):
+        return None
+    return state
+
+
+def _save_state(input_path: str, partials: pd.DataFrame, frequency: pd.Series,
+                watermark, columns, encoding: str, sep: str) -> None:
+    offset = os.path.getsize(input_path)
+    state = {
+        'version': STATE_VERSION,
+        'source': os.path.abspath(input_path),
+        'offset': offset,
+        'signature': _append_signature(input_path, offset),
+        'watermark': watermark,
+        'columns': list(columns),
+        'encoding': encoding,
+        'sep': sep,
+        'partials': partials,
+        'frequency': frequency,
+    }
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp_path = f"{STATE_PATH}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def _invalidate_state() -> None:
+    """Drop the state while the day partitions are being updated, so a crash forces a full run."""
+    if os.path.exists(STATE_PATH):
+        os.remove(STATE_PATH)
+
+
+def _is_append_of(input_path: str, state: dict) -> bool:
+    offset = state['offset']
+    # Un estado guardado sobre un archivo vacío no tiene encabezado del cual partir
+    if offset <= 0 or os.path.getsize(input_path) < offset:
+        return False
+    if _append_signature(input_path, offset) != state['signature']:
+        return False
+    with open(input_path, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+
+def _process_sales_full(input_path: str, chunksize: Optional[int] = None) -> pd.DataFrame:
+    if chunksize:
+        aggregates, watermark, columns, report = None, pd.NaT, None, {}
+        for chunk in iter_source_chunks(input_path, chunksize):
+            columns = chunk.columns
+            chunk, col_fecha, chunk_report = prepare_sales(chunk)
+            report = merge_reports(report, chunk_report)
+            chunk_aggregates = _partial_aggregates(chunk, col_fecha)
+            aggregates = chunk_aggregates if aggregates is None else _merge_partials(aggregates, chunk_aggregates)
+            chunk_max = chunk[col_fecha].max()
+            if pd.isna(watermark) or (pd.notna(chunk_max) and chunk_max > watermark):
+                watermark = chunk_max
+        if aggregates is None:
+            raise Exception("Sales file has no rows.")
+        partials, days = aggregates
+    else:
+        df = read_source(input_path)
+        columns = df.columns
+        df, col_fecha, report = prepare_sales(df)
+        partials, days = _partial_aggregates(df, col_fecha)
+        watermark = df[col_fecha].max()
+
+    save_report('sales', report)
+    encoding, sep = sniff_format(input_path)
+    frequency = _day_frequency(days)
+    _invalidate_state()
+    _save_day_partitions(days)
+    _save_state(input_path, partials, frequency, watermark, columns, encoding, sep)
+    return _finalize(partials, frequency)
+
+
+def _process_sales_incremental(input_path: str, chunksize: Optional[int] = None) -> pd.DataFrame:
+    state = _load_state(input_path)
+    if state is None or not _is_append_of(input_path, state):
+        logger.info("No valid incremental sales state; reprocessing the full history.")
+        return _process_sales_full(input_path, chunksize)
+
+    with open(input_path, 'rb') as f:
+        f.seek(state['offset'])
+        tail = f.read()
+
+    partials, frequency = state['partials'], state['frequency']
+    watermark = state['watermark']
+
+    if tail.strip():
+        new_rows = pd.read_csv(
+            io.BytesIO(tail), header=None, names=state['columns'],
+            encoding=state['encoding'], sep=state['sep'],
+        )
+        new_rows, col_fecha, report = prepare_sales(new_rows)
+        save_report('sales', report)
+        late_rows = int((new_rows[col_fecha] < watermark).sum()) if pd.notna(watermark) else 0
+        if late_rows:
+            logger.info("%d new sales rows are dated before %s; folding them in anyway.",
+                        late_rows, f"{watermark:%Y-%m-%d}")
+        new_partials, new_days = _partial_aggregates(new_rows, col_fecha)
+        partials = pd.concat([partials, new_partials]).groupby(level=0).sum()
+        _invalidate_state()
+        added = _add_day_partitions(new_days)
+        frequency = frequency.add(added, fill_value=0).astype('int64')
+        watermark = max(watermark, new_rows[col_fecha].max()) if pd.notna(watermark) else new_rows[col_fecha].max()
+
+    _save_state(input_path, partials, frequency, watermark, state['columns'], state['encoding'], state['sep'])
+    return _finalize(partials, frequency)
+
+
+def process_sales(incremental: bool = False, chunksize: Optional[int] = None) -> str:
+    """
+    Summarize data/sales.csv per product. With incremental=True only the rows
+    appended since the last run (tracked by byte offset and the 'Fecha elab'
+    watermark) are parsed and folded into the stored per-product aggregates
+    and the month partitions of (product, day) pairs they touch; if the file
+    was rewritten instead of appended, it falls back to a full run.
+    With chunksize set, full runs stream the file in chunks of that many rows.
+    """
+    input_path = "data/sales.csv"
+    output_path = "output/processed_sales.csv"
 
-    resumen = df.groupby('normalized_description').agg(
-        total_units_sold=('Piezas', 'sum'),
-        total_income=('ingreso', 'sum'),
-        total_cost=('costo', 'sum'),
-        total_margin=('margen', 'sum'),
-        avg_ticket_price=('Precio', 'mean'),
-        sale_frequency_days=(col_fecha, lambda x: x.dt.date.nunique())
-    ).reset_index()
+    if incremental:
+        resumen = _process_sales_incremental(input_path, chunksize)
+    else:
+        resumen = _process_sales_full(input_path, chunksize)
 
     resumen.to_csv(output_path, index=False, encoding='utf-8')
     return output_path
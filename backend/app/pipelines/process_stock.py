@@ -1,46 +1,76 @@
-import pandas as pd
-import csv
+import os
+from typing import Optional, Tuple
 
-def normalize_description(text):
-    return str(text).strip().lower().replace('  ', ' ')
+import pandas as pd
+from app.pipelines.ingest import iter_source_chunks, normalize_descriptions, read_source
+from app.pipelines.parsing import NUMBER_FORMATS, merge_reports, parse_columns, save_report
+from app.pipelines.product_dictionary import encode_products
 
-def detect_separator(path, encoding='latin1'):
-    with open(path, 'r', encoding=encoding) as f:
-        sample = f.read(2048)
-        dialect = csv.Sniffer().sniff(sample)
-        return dialect.delimiter
+OUTPUT_COLUMNS = ['product_id', 'normalized_description', 'Existencias', 'coverage_days', 'low_stock_flag', 'stock_rotation']
+STOCK_SCHEMA = {'Existencias': NUMBER_FORMATS['es_MX']}
 
-def process_stock(daily_demand: int = 5, low_stock_threshold: int = 15) -> str:
-    input_path = "data/stock.csv"
-    output_path = "output/processed_stock.csv"
 
-    sep = detect_separator(input_path)
-    df = pd.read_csv(input_path, encoding='latin1', sep=sep)
+def _summarize_stock(df: pd.DataFrame, daily_demand: int, low_stock_threshold: int) -> Tuple[pd.DataFrame, dict]:
     df.columns = df.columns.str.strip()
 
     col_desc = next((c for c in df.columns if 'descrip' in c.lower()), None)
     if not col_desc:
         raise Exception("Description column not found.")
 
-    df[col_desc] = df[col_desc].apply(normalize_description)
+    df[col_desc] = normalize_descriptions(df[col_desc])
     df['normalized_description'] = df[col_desc]
 
     if 'Existencias' not in df.columns:
         raise Exception("Missing 'Existencias' column.")
 
-    df['Existencias'] = (
-        df['Existencias']
-        .astype(str)
-        .str.replace(',', '')
-        .str.replace(' ', '')
-    )
-    df['Existencias'] = pd.to_numeric(df['Existencias'], errors='coerce')
+    report = parse_columns(df, STOCK_SCHEMA)
 
     df['coverage_days'] = df['Existencias'] / daily_demand
     df['low_stock_flag'] = (df['coverage_days'] < low_stock_threshold).astype(int)
     df['stock_rotation'] = None  # Placeholder
 
-    resumen = df[['normalized_description', 'Existencias', 'coverage_days', 'low_stock_flag', 'stock_rotation']]
+    # Marca y línea del inventario se registran como atributos del producto
+    attributes = pd.DataFrame(index=df['normalized_description'])
+    col_marca = next((c for c in df.columns if 'marca' in c.lower()), None)
+    col_linea = next((c for c in df.columns if c.lower() in ('línea', 'linea')), None)
+    if col_marca:
+        attributes['brand'] = df[col_marca].astype('string').str.strip().to_numpy()
+    if col_linea:
+        attributes['line'] = df[col_linea].astype('string').str.strip().to_numpy()
+    df['product_id'] = encode_products(df['normalized_description'], attributes=attributes)
+
+    return df[OUTPUT_COLUMNS], report
+
+
+def process_stock(daily_demand: int = 5, low_stock_threshold: int = 15,
+                  chunksize: Optional[int] = None) -> str:
+    """
+    Summarize data/stock.csv per row. With chunksize set, the file is streamed
+    and each processed chunk is appended to the output as soon as it is ready.
+    """
+    input_path = "data/stock.csv"
+    output_path = "output/processed_stock.csv"
+
+    if chunksize:
+        report = {}
+        # Los bloques van a un temporal que solo reemplaza la salida al terminar:
+        # un error a mitad de camino no deja un CSV truncado que parezca válido
+        tmp_path = f"{output_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as out:
+                for i, chunk in enumerate(iter_source_chunks(input_path, chunksize)):
+                    resumen, chunk_report = _summarize_stock(chunk, daily_demand, low_stock_threshold)
+                    resumen.to_csv(out, index=False, header=(i == 0))
+                    report = merge_reports(report, chunk_report)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        save_report('stock', report)
+        return output_path
+
+    resumen, report = _summarize_stock(read_source(input_path), daily_demand, low_stock_threshold)
+    save_report('stock', report)
     resumen.to_csv(output_path, index=False, encoding='utf-8')
 
     return output_path
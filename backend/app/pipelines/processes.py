@@ -0,0 +1,12 @@
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+# The API process runs request, job and warm-up threads; forking it could copy a
+# lock held by another thread into the child, so process pools start from a clean
+# fork server (or with spawn where that is not available).
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def process_context() -> BaseContext:
+    """Multiprocessing context shared by every process pool of the app."""
+    return multiprocessing.get_context(START_METHOD)
@@ -0,0 +1,144 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+import pandas as pd
+
+DICTIONARY_PATH = os.path.join("output", "product_dictionary.csv")
+LOCK_PATH = f"{DICTIONARY_PATH}.lock"
+LOCK_TIMEOUT_SECONDS = 30.0
+LOCK_STALE_SECONDS = 120.0
+
+ATTRIBUTE_COLUMNS = ['brand', 'category', 'line']
+DICTIONARY_COLUMNS = ['product_id', 'normalized_description'] + ATTRIBUTE_COLUMNS
+CATEGORICAL_COLUMNS = ['normalized_description'] + ATTRIBUTE_COLUMNS
+
+# (size, mtime_ns) del archivo -> diccionario cargado
+_cached: Optional[Tuple[Tuple[int, int], pd.DataFrame]] = None
+
+
+@contextmanager
+def _dictionary_lock():
+    """
+    Cross-process lock (lock file created with O_EXCL) so processors running
+    in parallel never hand out the same ID twice.
+    """
+    start = time.monotonic()
+    while True:
+        try:
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(LOCK_PATH) > LOCK_STALE_SECONDS:
+                    os.remove(LOCK_PATH)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() - start > LOCK_TIMEOUT_SECONDS:
+                raise TimeoutError("Timed out waiting for the product dictionary lock.")
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(LOCK_PATH)
+
+
+def _empty_dictionary() -> pd.DataFrame:
+    return pd.DataFrame({
+        'product_id': pd.Series(dtype='int32'),
+        'normalized_description': pd.Series(dtype=object),
+        **{col: pd.Series(dtype=object) for col in ATTRIBUTE_COLUMNS},
+    })
+
+
+def _read_dictionary() -> pd.DataFrame:
+    global _cached
+    if not os.path.exists(DICTIONARY_PATH):
+        return _empty_dictionary()
+    stat = os.stat(DICTIONARY_PATH)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    if _cached is None or _cached[0] != signature:
+        df = pd.read_csv(DICTIONARY_PATH, dtype={'normalized_description': str}, keep_default_na=False,
+                         na_values={col: [''] for col in ATTRIBUTE_COLUMNS})
+        df['product_id'] = df['product_id'].astype('int32')
+        _cached = (signature, df)
+    return _cached[1].copy()
+
+
+def _write_dictionary(df: pd.DataFrame) -> None:
+    os.makedirs(os.path.dirname(DICTIONARY_PATH), exist_ok=True)
+    tmp_path = f"{DICTIONARY_PATH}.tmp"
+    df[DICTIONARY_COLUMNS].to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, DICTIONARY_PATH)
+
+
+def encode_products(descriptions: pd.Series, attributes: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    Map normalized descriptions to dense integer product IDs, registering the
+    unseen ones. `attributes` (indexed by normalized description, with any of
+    brand/category/line) fills in attributes the dictionary does not have yet.
+    """
+    unique = pd.Index(descriptions.unique())
+
+    with _dictionary_lock():
+        dictionary = _read_dictionary()
+        changed = False
+
+        new = unique[~unique.isin(dictionary['normalized_description'])]
+        if len(new):
+            next_id = int(dictionary['product_id'].max()) + 1 if len(dictionary) else 1
+            additions = pd.DataFrame({
+                'product_id': pd.RangeIndex(next_id, next_id + len(new)).astype('int32'),
+                'normalized_description': new,
+            })
+            dictionary = pd.concat([dictionary, additions], ignore_index=True)
+            changed = True
+
+        if attributes is not None:
+            for col in ATTRIBUTE_COLUMNS:
+                if col not in attributes.columns:
+                    continue
+                known = attributes[col].dropna()
+                known = known[~known.index.duplicated()]
+                filled = dictionary[col].fillna(dictionary['normalized_description'].map(known))
+                if filled.isna().sum() < dictionary[col].isna().sum():
+                    dictionary[col] = filled
+                    changed = True
+
+        if changed:
+            _write_dictionary(dictionary)
+
+    positions = pd.Index(dictionary['normalized_description']).get_indexer(descriptions)
+    ids = dictionary['product_id'].to_numpy()[positions]
+    return pd.Series(ids, index=descriptions.index, name='product_id', dtype='int32')
+
+
+def load_product_dictionary() -> pd.DataFrame:
+    """The dictionary with categorical descriptions and attributes."""
+    return optimize_dtypes(_read_dictionary())
+
+
+def lookup_product_id(description: str) -> Optional[int]:
+    dictionary = _read_dictionary()
+    match = dictionary.loc[dictionary['normalized_description'] == description, 'product_id']
+    return int(match.iloc[0]) if len(match) else None
+
+
+def ensure_product_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Add product_id to frames written before the dictionary existed."""
+    if 'product_id' not in df.columns:
+        df.insert(0, 'product_id', encode_products(df['normalized_description'].astype(str)))
+    return df
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Integer IDs and categorical text columns for in-memory tables."""
+    if 'product_id' in df.columns:
+        df['product_id'] = df['product_id'].astype('int32')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
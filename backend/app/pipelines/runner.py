@@ -0,0 +1,208 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.pipelines.ingest import file_fingerprint
+from app.pipelines.processes import process_context
+
+STATE_PATH = os.path.join("output", ".state", "pipeline.json")
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable
+    inputs: List[str]
+    outputs: List[str]
+    depends_on: List[str] = field(default_factory=list)
+    # Las etapas paralelas corren en el pool de procesos; el resto en el proceso actual
+    parallel: bool = True
+
+
+def _process_imports():
+    from app.pipelines.process_imports import process_imports
+    return process_imports()
+
+
+def _process_sales():
+    from app.pipelines.process_sales import process_sales
+    return process_sales()
+
+
+def _process_stock():
+    from app.pipelines.process_stock import process_stock
+    return process_stock()
+
+
+def _forecast_demand():
+    from app.pipelines.forecast_demand import forecast_demand
+    return forecast_demand()
+
+
+def _simulate_stock():
+    from app.pipelines.simulate_stock import simulate_stock
+    return simulate_stock()
+
+
+def _build_master_dataset():
+    from app.pipelines.build_master_dataset import build_master_dataset
+    build_master_dataset()
+    return "output/master_dataset.csv"
+
+
+def _run_model():
+    from app.models.predictor import run_model
+    result = run_model()
+    return result["csv"]
+
+
+PIPELINE: List[Stage] = [
+    Stage("process_imports", _process_imports,
+          inputs=["data/imports.csv"], outputs=["output/processed_imports.csv"]),
+    Stage("process_sales", _process_sales,
+          inputs=["data/sales.csv"], outputs=["output/processed_sales.csv"]),
+    Stage("process_stock", _process_stock,
+          inputs=["data/stock.csv"], outputs=["output/processed_stock.csv"]),
+    Stage("forecast_demand", _forecast_demand,
+          inputs=["data/sales.csv"], outputs=["output/demand_forecast.csv"]),
+    Stage("simulate_stock", _simulate_stock,
+          inputs=["data/sales.csv", "data/imports.csv", "output/processed_stock.csv"],
+          outputs=["output/stock_simulation.csv"],
+          depends_on=["process_stock"]),
+    Stage("build_master_dataset", _build_master_dataset,
+          inputs=["output/processed_sales.csv", "output/processed_imports.csv", "output/processed_stock.csv",
+                  "output/demand_forecast.csv"],
+          outputs=["output/master_dataset.csv"],
+          depends_on=["process_imports", "process_sales", "process_stock", "forecast_demand"],
+          parallel=False),
+    Stage("run_model", _run_model,
+          inputs=["output/master_dataset.csv"],
+          outputs=["output/productos_recomendados.csv", "output/prediction_plot.png"],
+          depends_on=["build_master_dataset"],
+          parallel=False),
+]
+
+
+def _load_state() -> Dict[str, Dict[str, str]]:
+    if not os.path.exists(STATE_PATH):
+        return {}
+    try:
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state: Dict[str, Dict[str, str]]) -> None:
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp_path = f"{STATE_PATH}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def _input_fingerprints(stage: Stage) -> Optional[Dict[str, str]]:
+    if not all(os.path.exists(path) for path in stage.inputs):
+        return None
+    return {path: file_fingerprint(path) for path in stage.inputs}
+
+
+def _is_up_to_date(stage: Stage, state: Dict[str, Dict[str, str]]) -> bool:
+    fingerprints = _input_fingerprints(stage)
+    return (
+        fingerprints is not None
+        and state.get(stage.name) == fingerprints
+        and all(os.path.exists(path) for path in stage.outputs)
+    )
+
+
+def _timed_call(func: Callable):
+    start = time.perf_counter()
+    output = func()
+    return output, time.perf_counter() - start
+
+
+def _validate(stages: List[Stage]) -> None:
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in names]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+
+def run_pipeline(force: bool = False, max_workers: Optional[int] = None,
+                 stages: Optional[List[Stage]] = None,
+                 progress: Optional[Callable[[float, str], None]] = None) -> Dict:
+    """
+    Run the pipeline as a dependency graph. Independent parallel stages run
+    at the same time in a process pool; a stage is skipped when the content
+    hashes of its inputs match the last successful run and its outputs exist.
+    `progress(fraction, message)` is called every time a stage finishes.
+    """
+    stages = stages or PIPELINE
+    _validate(stages)
+    state = {} if force else _load_state()
+    results: Dict[str, Dict] = {}
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+    started = time.perf_counter()
+
+    def finish(stage: Stage, status: str, seconds: float = 0.0, output=None, error=None):
+        results[stage.name] = {"status": status, "seconds": round(seconds, 4)}
+        if output is not None:
+            results[stage.name]["output"] = output
+        if error is not None:
+            results[stage.name]["error"] = error
+        if status == "ran":
+            state[stage.name] = _input_fingerprints(stage)
+            _save_state(state)
+        if progress is not None:
+            progress(len(results) / len(stages), f"{stage.name}: {status}")
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=process_context()) as pool:
+        while pending or running:
+            scheduled = len(results) + len(running)
+            for name, stage in list(pending.items()):
+                deps = [results.get(dep, {}).get("status") for dep in stage.depends_on]
+                if any(status is None for status in deps):
+                    continue
+                del pending[name]
+                if any(status in ("failed", "blocked") for status in deps):
+                    finish(stage, "blocked", error="An upstream stage failed.")
+                elif not force and _is_up_to_date(stage, state):
+                    finish(stage, "skipped")
+                elif stage.parallel:
+                    running[pool.submit(_timed_call, stage.func)] = stage
+                elif not running:
+                    # Las etapas en proceso esperan a que el pool quede libre
+                    try:
+                        output, seconds = _timed_call(stage.func)
+                        finish(stage, "ran", seconds, output)
+                    except Exception as e:
+                        finish(stage, "failed", error=str(e))
+                else:
+                    pending[name] = stage
+
+            if not running:
+                if len(results) + len(running) == scheduled:
+                    # Sin nada en ejecución y sin progreso posible: dependencia circular
+                    for name, stage in list(pending.items()):
+                        del pending[name]
+                        finish(stage, "blocked", error="Circular dependency between stages.")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    output, seconds = future.result()
+                    finish(stage, "ran", seconds, output)
+                except Exception as e:
+                    finish(stage, "failed", error=str(e))
+
+    return {
+        "stages": results,
+        "total_seconds": round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,150 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from app.pipelines.ingest import read_source
+from app.pipelines.process_imports import prepare_imports
+from app.pipelines.process_sales import prepare_sales
+from app.pipelines.product_dictionary import encode_products
+
+OUTPUT_PATH = "output/stock_simulation.csv"
+STOCK_PATH = "output/processed_stock.csv"
+N_SCENARIOS = 5000
+SERVICE_LEVEL = 0.95
+# SKUs con menos entregas registradas usan la distribución global de tiempos de entrega
+MIN_LEAD_TIME_SAMPLES = 3
+# Celdas SKU x escenario por bloque; acota la memoria sin importar cuántos SKUs haya
+CHUNK_CELLS = 1_000_000
+
+
+def daily_sales(dates: pd.Series, product_ids: pd.Series, units: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Sales rows as (product_id, day, units) arrays sorted by product, plus the
+    number of days in the history, so any block of SKUs can be turned into a
+    dense daily matrix with one bincount.
+    """
+    valid = dates.notna() & units.notna() & product_ids.notna()
+    if not valid.any():
+        raise ValueError("No sales with a valid date and units to simulate demand from.")
+    days = (dates[valid] - dates[valid].min()).dt.days.to_numpy()
+    ids = product_ids[valid].to_numpy(dtype='int64')
+    order = np.argsort(ids, kind='stable')
+    return ids[order], days[order], units[valid].to_numpy(dtype='float64')[order], int(days.max()) + 1
+
+
+def lead_time_table(product_ids: pd.Series, lead_times: pd.Series, skus: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Observed lead times grouped by SKU (values, offsets, counts) so one
+    random draw per scenario can be mapped to each SKU's own distribution,
+    plus all observed lead times as the global fallback.
+    """
+    valid = lead_times.notna() & (lead_times >= 0) & product_ids.notna()
+    positions = pd.Index(skus).get_indexer(product_ids[valid].astype('int64'))
+    values = lead_times[valid].to_numpy(dtype='float64')
+    known = positions >= 0
+    order = np.argsort(positions[known], kind='stable')
+    counts = np.bincount(positions[known], minlength=len(skus))
+    offsets = np.cumsum(counts) - counts
+    return values[known][order], offsets, counts, values
+
+
+def _sample_lead_times(rng: np.random.Generator, table: tuple, rows: slice, n_scenarios: int) -> np.ndarray:
+    values, offsets, counts, global_values = table
+    if len(global_values) == 0:
+        raise ValueError("No valid lead times found in imports.")
+    counts, offsets = counts[rows], offsets[rows]
+    u = rng.random((len(counts), n_scenarios))
+
+    sampled = global_values[(u * len(global_values)).astype('int64')]
+    own = counts >= MIN_LEAD_TIME_SAMPLES
+    if own.any():
+        index = offsets[own, None] + (u[own] * counts[own, None]).astype('int64')
+        sampled[own] = values[index]
+    return np.rint(sampled).astype('int64')
+
+
+def simulate_block(prefix: np.ndarray, lead_times: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Lead-time demand for a block of SKUs x scenarios. Each scenario sums the
+    SKU's sales over a random window of the history as long as its lead
+    time (block bootstrap, which keeps runs of zero-sale days and bursts
+    together); `prefix` holds cumulative daily sales per SKU.
+    """
+    n_days = prefix.shape[1] - 1
+    window = np.minimum(lead_times, n_days)
+    start = (rng.random(lead_times.shape) * (n_days - window + 1)).astype('int64')
+    demand = np.take_along_axis(prefix, start + window, axis=1) - np.take_along_axis(prefix, start, axis=1)
+    # Tiempos de entrega más largos que la historia: se escala la ventana completa
+    demand *= np.where(lead_times > n_days, lead_times / n_days, 1.0)
+    return np.clip(demand, 0, None)
+
+
+def simulate_matrix(sales: tuple, lead_table: tuple, skus: np.ndarray, stock: np.ndarray,
+                    n_scenarios: int = N_SCENARIOS, service_level: float = SERVICE_LEVEL,
+                    seed: int = 42) -> pd.DataFrame:
+    """Simulate every SKU in blocks and summarize the lead-time demand distribution per SKU."""
+    ids, days, units, n_days = sales
+    rng = np.random.default_rng(seed)
+    chunk = max(1, CHUNK_CELLS // n_scenarios)
+    frames = []
+    for start in range(0, len(skus), chunk):
+        rows = slice(start, start + chunk)
+        block_skus = skus[rows]
+
+        lo = np.searchsorted(ids, block_skus[0], side='left')
+        hi = np.searchsorted(ids, block_skus[-1], side='right')
+        positions = np.searchsorted(block_skus, ids[lo:hi])
+        daily = np.bincount(positions * n_days + days[lo:hi], weights=units[lo:hi],
+                            minlength=len(block_skus) * n_days).reshape(len(block_skus), n_days)
+        prefix = np.zeros((len(block_skus), n_days + 1))
+        np.cumsum(daily, axis=1, out=prefix[:, 1:])
+
+        lead_times = _sample_lead_times(rng, lead_table, rows, n_scenarios)
+        demand = simulate_block(prefix, lead_times, rng)
+        on_hand = stock[rows]
+        reorder_point = np.ceil(np.quantile(demand, service_level, axis=1))
+        mean_demand = demand.mean(axis=1)
+
+        frames.append(pd.DataFrame({
+            'product_id': block_skus,
+            'Existencias': on_hand,
+            'mean_lead_time_days': lead_times.mean(axis=1),
+            'mean_lead_time_demand': mean_demand,
+            'stockout_probability': (demand > on_hand[:, None]).mean(axis=1),
+            'reorder_point': reorder_point,
+            'safety_stock': np.clip(reorder_point - mean_demand, 0, None),
+            'reorder_now': (on_hand <= reorder_point) & (reorder_point > 0),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def simulate_stock(n_scenarios: int = N_SCENARIOS, service_level: float = SERVICE_LEVEL, seed: int = 42) -> str:
+    """
+    Monte Carlo stock-out simulation per product: demand is resampled from
+    the dated sales in data/sales.csv and lead times from the deliveries in
+    data/imports.csv, and the result is compared with the on-hand units in
+    output/processed_stock.csv. Writes output/stock_simulation.csv.
+    """
+    if n_scenarios < 1:
+        raise ValueError("n_scenarios must be at least 1.")
+    if not 0 < service_level < 1:
+        raise ValueError("service_level must be between 0 and 1.")
+
+    df, col_fecha, _ = prepare_sales(read_source("data/sales.csv"))
+    sales = daily_sales(df[col_fecha], encode_products(df['normalized_description']), df['Piezas'])
+
+    stock = pd.read_csv(STOCK_PATH, usecols=['product_id', 'Existencias'])
+    stock = stock.groupby('product_id')['Existencias'].sum()
+    skus = np.union1d(np.unique(sales[0]), stock.index.to_numpy(dtype='int64'))
+    on_hand = stock.reindex(skus, fill_value=0).to_numpy(dtype='float64')
+
+    imports, _ = prepare_imports(read_source("data/imports.csv"))
+    lead_table = lead_time_table(encode_products(imports['normalized_description']),
+                                 imports['tiempo_entrega'], skus)
+
+    result = simulate_matrix(sales, lead_table, skus, on_hand,
+                             n_scenarios=n_scenarios, service_level=service_level, seed=seed)
+    result['service_level'] = service_level
+    result['n_scenarios'] = n_scenarios
+    result.to_csv(OUTPUT_PATH, index=False, encoding='utf-8')
+    return OUTPUT_PATH
@@ -0,0 +1,126 @@
+import os
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import descriptive_analysis as da
+from app.pipelines import ingest
+
+IMPORTS = pd.DataFrame({
+    'Descripcion producto': ['Playera negra', 'Bota táctica, talla 9', 'Playera negra', 'Gorra'],
+    'CANTIDAD': [5, 2, 3, 4],
+    'GASTOS LOGISTICOS MXN': [100.0, 50.0, 60.0, 10.0],
+    'COSTO TOTAL EN MEX': [1000.0, 800.0, 600.0, 200.0],
+    'MARCA': ['5.11', 'Bates', '5.11', None],
+    'CATEGORIA': ['PLAYERAS', 'CALZADO', 'PLAYERAS', None],
+    'Date': ['01/15/2025', '01/20/2025', '02/10/2025', '03/05/2025'],
+})
+SALES = pd.DataFrame({
+    # Descripciones con otro formato que en importaciones; "Cinturón" solo está en inventario
+    'Fecha elab': ['10/02/2025', '12/02/2025', '15/03/2025', '20/03/2025'],
+    'Descripcion producto': ['  playera NEGRA ', 'BOTA TÁCTICA, TALLA 9', 'Cinturón', 'Lente'],
+    'Piezas': [2, 1, 1, 1],
+    'Precio': [300.0, 1500.0, 400.0, 250.0],
+    'Costo': [200.0, 900.0, 250.0, 100.0],
+})
+STOCK = pd.DataFrame({
+    'Descripcion producto': ['Cinturón'],
+    'Existencias ': [3],
+    'Marca ': ['Condor'],
+})
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # La caché de ingest (output/.cache) es relativa al directorio de trabajo
+    monkeypatch.chdir(tmp_path)
+    data = tmp_path / 'data'
+    data.mkdir()
+    IMPORTS.to_csv(data / 'imports.csv', index=False)
+    SALES.to_csv(data / 'sales.csv', index=False)
+    STOCK.to_csv(data / 'stock.csv', index=False)
+    monkeypatch.setattr(da, 'DATA_DIR', str(data))
+    monkeypatch.setattr(da, 'CUBE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(da, '_cube', None)
+    return data
+
+
+def test_query_filters_groups_and_limits(data_dir):
+    by_product = da.query_cube(['quantity_imported'], ['product'], sort='quantity_imported', top=1)
+    assert by_product.to_dict(orient='records') == [{'product': 'Playera negra', 'quantity_imported': 8.0}]
+
+    window = da.query_cube(['quantity_imported', 'import_lines'], start='2025-02', end='2025-03')
+    assert window.iloc[0].tolist() == [7.0, 2.0]
+
+    quarter = da.query_cube(['quantity_imported'], ['month'], granularity='quarter')
+    assert quarter['month'].astype(str).tolist() == ['2025Q1']
+
+    comma = da.query_cube(['quantity_imported'], filters={'product': ['Bota táctica, talla 9']})
+    assert comma.iloc[0, 0] == 2.0
+
+    for kwargs in ({'measures': ['nope']}, {'group_by': ['nope']}, {'granularity': 'week'},
+                   {'measures': ['revenue'], 'sort': 'margin'}, {'top': 0}, {'start': '2025-13'}):
+        with pytest.raises(ValueError):
+            da.query_cube(**kwargs)
+
+
+def test_sales_take_category_and_brand_from_imports_and_stock(data_dir):
+    sales = da.query_cube(['units_sold', 'revenue'], ['category', 'brand'])
+    rows = {(r['category'], r['brand']): (r['units_sold'], r['revenue'])
+            for r in sales.to_dict(orient='records') if r['units_sold']}
+    assert rows == {
+        ('PLAYERAS', '5.11'): (2.0, 600.0),
+        ('CALZADO', 'Bates'): (1.0, 1500.0),
+        # Sin importación: la marca viene del inventario y la categoría queda vacía
+        (da.NO_CATEGORY, 'Condor'): (1.0, 400.0),
+        (da.NO_CATEGORY, da.NO_BRAND): (1.0, 250.0),
+    }
+
+
+def test_cube_is_rebuilt_when_inputs_change(data_dir, monkeypatch):
+    first_version = da.cube_data_version()
+    assert da.load_cube() is da.load_cube()
+    assert os.listdir(da.CUBE_DIR) == [f'descriptive_cube-{first_version}.pkl']
+
+    changed = IMPORTS.copy()
+    changed.loc[0, 'CANTIDAD'] = 50
+    changed.to_csv(data_dir / 'imports.csv', index=False)
+    assert da.cube_data_version() != first_version
+    assert da.query_cube(['quantity_imported']).iloc[0, 0] == 59.0
+    # Solo queda la versión nueva en disco
+    assert os.listdir(da.CUBE_DIR) == [f'descriptive_cube-{da.cube_data_version()}.pkl']
+
+    # Otro worker con la misma versión lee el cubo guardado en lugar de reconstruirlo
+    monkeypatch.setattr(da, '_cube', None)
+    monkeypatch.setattr(da, '_build_cube', None)
+    assert da.query_cube(['quantity_imported']).iloc[0, 0] == 59.0
+
+
+def test_query_route_repeats_list_params_and_validates_top(data_dir):
+    client = TestClient(app)
+    response = client.get('/descriptive/query', params={
+        'measures': 'quantity_imported', 'group_by': 'product',
+        'product': ['Bota táctica, talla 9', 'Gorra'],
+    })
+    assert response.status_code == 200
+    rows = response.json()['rows']
+    assert sorted(r['product'] for r in rows) == ['Bota táctica, talla 9', 'Gorra']
+
+    assert client.get('/descriptive/query', params={'top': -1}).status_code == 422
+    assert client.get('/descriptive/query', params={'group_by': 'nope'}).status_code == 400
+
+
+def test_frames_go_through_ingest_sniffing_and_cache(data_dir):
+    # Separador ';' y latin1, como los exportes de Excel en español
+    IMPORTS.to_csv(data_dir / 'imports.csv', index=False, sep=';', encoding='latin1')
+    frame = da.load_frame('imports.csv')
+    assert frame.col('producto') == 'Descripcion producto'
+    assert frame.df[frame.col('cantidad')].sum() == 14
+    assert da.load_frame('imports.csv') is frame
+
+    fingerprint = ingest.file_fingerprint(str(data_dir / 'imports.csv'))
+    assert ingest._cached(f'{fingerprint}:descriptive:imports.csv') is frame
+    # El DataFrame crudo queda en la misma caché para los pipelines
+    assert ingest._cached(fingerprint) is not None
@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.models import descriptive_analysis as da
+from app.models.graph_cache import GraphCache, graph_key
+
+CATALOG = [graph['id'] for graph in da.DESCRIPTIVE_GRAPHS]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = GraphCache(str(tmp_path))
+    monkeypatch.setattr(da, 'graph_cache', cache)
+    return cache
+
+
+def _key(graph):
+    return graph_key(graph['id'], [os.path.join(da.DATA_DIR, f) for f in graph['inputs']], graph['version'])
+
+
+def _fake_render(graph_id):
+    # Las últimas del catálogo terminan primero
+    time.sleep(0.02 * (len(CATALOG) - CATALOG.index(graph_id)))
+    return graph_id.encode('utf-8'), 0.01, None
+
+
+def test_cached_graphs_first_and_catalog_order_in_results(cache, monkeypatch):
+    first = da.DESCRIPTIVE_GRAPHS[0]
+    cache.put(first['id'], _key(first), b'png')
+    pool = ThreadPoolExecutor(max_workers=len(CATALOG))
+    monkeypatch.setattr(da, '_get_render_pool', lambda: pool)
+    monkeypatch.setattr(da, '_render_worker', _fake_render)
+
+    statuses = list(da.iter_descriptive_analysis())
+    assert statuses[0]['id'] == first['id'] and statuses[0]['cache'] in ('memory', 'disk')
+    # El resto sale en cuanto termina, no en el orden del catálogo
+    assert [s['id'] for s in statuses[1:]] == CATALOG[:0:-1]
+    assert all(s['status'] == 'success' for s in statuses)
+
+    results = da.run_descriptive_analysis()
+    assert [r['id'] for r in results] == CATALOG
+    pool.shutdown()
+
+
+def test_broken_pool_reports_errors_and_resets(cache, monkeypatch):
+    class BrokenPool:
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_exception(BrokenProcessPool('worker killed'))
+            return future
+
+    class OldPool:
+        shut_down = False
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    old = OldPool()
+    monkeypatch.setattr(da, '_render_pool', old)
+    monkeypatch.setattr(da, '_get_render_pool', BrokenPool)
+
+    statuses = list(da.iter_descriptive_analysis())
+    assert sorted(s['id'] for s in statuses) == sorted(CATALOG)
+    assert all(s['status'] == 'error' and 'terminó inesperadamente' in s['error'] for s in statuses)
+    assert all(s['render_seconds'] is None for s in statuses)
+    # El pool roto se descarta para que la próxima corrida cree uno nuevo
+    assert old.shut_down and da._render_pool is None
+    assert all(cache.get(graph['id'], _key(graph))[0] is None for graph in da.DESCRIPTIVE_GRAPHS)
+
+
+def test_render_pool_does_not_fork_the_server(monkeypatch):
+    monkeypatch.setattr(da, '_render_pool', None)
+    pool = da._get_render_pool()
+    try:
+        assert pool._mp_context.get_start_method() in ('forkserver', 'spawn')
+    finally:
+        da._reset_render_pool()
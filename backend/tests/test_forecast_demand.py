@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.pipelines.forecast_demand import weekly_demand_matrix
+
+
+def test_weekly_matrix_per_sku():
+    dates = pd.to_datetime(pd.Series(['2025-01-01', '2025-01-03', '2025-01-08', '2025-01-14']))
+    matrix, skus = weekly_demand_matrix(dates, pd.Series([2, 1, 2, 1]), pd.Series([1.0, 2.0, 3.0, 4.0]))
+    assert skus.tolist() == [1, 2]
+    np.testing.assert_allclose(matrix, [[2.0, 4.0], [1.0, 3.0]])
+
+
+@pytest.mark.parametrize('dates, units', [
+    (pd.Series([], dtype='datetime64[ns]'), pd.Series([], dtype='float64')),
+    (pd.Series([pd.NaT, pd.NaT]), pd.Series([1.0, 2.0])),
+    (pd.to_datetime(pd.Series(['2025-01-01'])), pd.Series([np.nan])),
+])
+def test_no_valid_sales_is_a_clear_error(dates, units):
+    with pytest.raises(ValueError, match='No sales with a valid date and units'):
+        weekly_demand_matrix(dates, pd.Series([1] * len(dates), dtype='int64'), units)
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import descriptive_analysis as da
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _failing(error):
+    def get_graph_series(graph_id):
+        raise error
+    return get_graph_series
+
+
+def test_unknown_graph_is_404(client):
+    response = client.get('/descriptive/graph/no_existe/data')
+    assert response.status_code == 404
+    assert 'detail' in response.json()
+
+
+def test_missing_data_file_is_404(client, monkeypatch):
+    monkeypatch.setattr(da, 'get_graph_series', _failing(FileNotFoundError('imports.csv')))
+    response = client.get('/descriptive/graph/trend_imports/data')
+    assert response.status_code == 404
+    assert 'imports.csv' in response.json()['detail']
+
+
+def test_unexpected_error_is_500(client, monkeypatch):
+    monkeypatch.setattr(da, 'get_graph_series', _failing(RuntimeError('boom')))
+    response = client.get('/descriptive/graph/trend_imports/data')
+    assert response.status_code == 500
+    assert response.json() == {'detail': 'boom'}
+
+
+def _png_route(monkeypatch, render):
+    monkeypatch.setattr(da, 'graph_version', lambda graph_id: 'v1')
+    monkeypatch.setattr(da, 'render_graph', render)
+
+
+def test_png_is_served_with_etag_and_304(client, monkeypatch, tmp_path):
+    png = tmp_path / 'graph.png'
+    png.write_bytes(b'\x89PNG')
+    _png_route(monkeypatch, lambda graph_id: (None, None, str(png)))
+
+    response = client.get('/descriptive/graph/trend_imports/png')
+    assert response.status_code == 200 and response.content == b'\x89PNG'
+    assert response.headers['etag'] == '"v1"'
+    cached = client.get('/descriptive/graph/trend_imports/png', headers={'If-None-Match': '"v1"'})
+    assert cached.status_code == 304
+
+
+@pytest.mark.parametrize('error, status, detail', [
+    (FileNotFoundError('sales.csv'), 404, 'Faltan datos para la gráfica: sales.csv'),
+    (ValueError('No se encontró ninguna de las columnas'), 404, 'No se encontró ninguna de las columnas'),
+    (RuntimeError('boom'), 500, 'Error al generar la gráfica: boom'),
+])
+def test_png_render_errors_are_http_errors(client, monkeypatch, error, status, detail):
+    _png_route(monkeypatch, _failing(error))
+    response = client.get('/descriptive/graph/trend_imports/png')
+    assert response.status_code == status
+    assert response.json() == {'detail': detail}
+
+
+def test_png_missing_on_disk_is_404(client, monkeypatch, tmp_path):
+    _png_route(monkeypatch, lambda graph_id: (None, None, str(tmp_path / 'gone.png')))
+    assert client.get('/descriptive/graph/trend_imports/png').status_code == 404
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models import artifacts, predictor
+from app.models.predictor import FEATURES, TARGET_CANT, TARGET_DIAS, UPDATE_ROUNDS, run_model
+from app.models.training import row_keys
+
+
+TODAY = pd.Timestamp('2025-06-02')
+
+
+def _master_dataset(n_rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.gamma(2.0, 10.0, size=(n_rows, len(FEATURES))), columns=FEATURES)
+    # Algunos productos con varias filas, como las de inventario del dataset real
+    df.insert(0, 'product_id', np.arange(n_rows) // 2 + 1)
+    df['normalized_description'] = 'producto ' + df['product_id'].astype(str)
+    df[TARGET_CANT] = 0.5 * df['total_units_sold'] + rng.normal(0, 1, n_rows)
+    # Los días hasta la próxima importación los calcula run_model desde esta fecha
+    days = np.rint(2.0 * df['tiempo_promedio_entrega'] + rng.normal(0, 1, n_rows))
+    df['ultima_fecha_importacion'] = TODAY - pd.to_timedelta(days, unit='D')
+    return df
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Corre run_model en un directorio vacío con un dataset maestro sintético."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(artifacts, '_loaded', None)
+    dataset = {'df': _master_dataset(), 'today': TODAY}
+    monkeypatch.setattr(predictor, 'build_master_dataset', lambda: dataset['df'].copy())
+    monkeypatch.setattr(predictor, '_today', lambda: dataset['today'])
+    return dataset
+
+
+def _rounds(model):
+    return model.get_booster().num_boosted_rounds()
+
+
+def _training_positions(df, split_keys, count):
+    held_out = np.concatenate([split_keys['test'], split_keys['calibration']])
+    return np.flatnonzero(~row_keys(df).isin(held_out).to_numpy())[:count]
+
+
+def test_incremental_update_refreshes_both_models(workspace):
+    run_model(conformal_strategy='prefit', nthread=1)
+    base = artifacts.get_active_artifacts()
+    base_rounds = {name: _rounds(base[name]) for name in ('modelo_cant', 'modelo_dias')}
+
+    # Filas de entrenamiento distintas cambian en cada target
+    df = workspace['df']
+    rows = _training_positions(df, base['split_keys'], 20)
+    df.loc[df.index[rows[:10]], TARGET_CANT] += 0.5
+    df.loc[df.index[rows[10:]], 'ultima_fecha_importacion'] -= pd.Timedelta(days=1)
+
+    result = run_model(incremental=True, nthread=1)
+    assert result['mode'] == 'incremental', result['fallback_reason']
+    assert result['update']['changed_rows'] == {TARGET_CANT: 10, TARGET_DIAS: 10}
+
+    updated = artifacts.get_active_artifacts()
+    for name in ('modelo_cant', 'modelo_dias'):
+        assert _rounds(updated[name]) == base_rounds[name] + UPDATE_ROUNDS
+
+    # El mismo split del entrenamiento completo, y los intervalos salen del modelo actualizado
+    np.testing.assert_array_equal(updated['split_keys']['test'], base['split_keys']['test'])
+    X = df[FEATURES].astype('float32')
+    point, _ = updated['mapie'].predict(X, alpha=0.1)
+    np.testing.assert_allclose(point, updated['modelo_cant'].predict(X), rtol=1e-6)
+    assert set(updated['metadata']['base_rmse']) == {TARGET_CANT, TARGET_DIAS}
+
+
+def test_day_rollover_without_new_data_stays_incremental(workspace):
+    run_model(conformal_strategy='prefit', nthread=1)
+    before = pd.read_csv('output/productos_recomendados.csv')
+
+    # Al día siguiente, sin datos nuevos, ninguna fila cambió para ninguno de los dos modelos
+    workspace['today'] = TODAY + pd.Timedelta(days=1)
+    result = run_model(incremental=True, nthread=1)
+    assert result['mode'] == 'incremental', result['fallback_reason']
+    assert result['update']['changed_rows'] == {TARGET_CANT: 0, TARGET_DIAS: 0}
+    assert artifacts.get_active_artifacts()['metadata']['reference_date'] == TODAY.date().isoformat()
+
+    # Las predicciones de días se expresan respecto a hoy
+    after = pd.read_csv('output/productos_recomendados.csv')
+    np.testing.assert_allclose(after['pred_dias'], before['pred_dias'] + 1, rtol=1e-6)
+
+
+def test_incremental_requires_a_calibration_set(workspace):
+    run_model(conformal_strategy='cv_plus', nthread=1)
+    result = run_model(incremental=True, nthread=1)
+    assert result['mode'] == 'full'
+    assert 'calibración' in result['fallback_reason']
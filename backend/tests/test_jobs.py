@@ -0,0 +1,39 @@
+import os
+import time
+
+from app.pipelines.jobs import JobManager
+from app.pipelines.processes import START_METHOD
+
+
+def _pid_job(progress=None, value=0):
+    if progress is not None:
+        progress(0.5, 'mitad')
+    return {'pid': os.getpid(), 'value': value}
+
+
+def _wait(job, timeout=60):
+    deadline = time.monotonic() + timeout
+    while job.status in ('queued', 'running') and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return job
+
+
+def test_process_jobs_run_in_a_forkserver_pool():
+    manager = JobManager(process_workers=1)
+    manager.register('pid', _pid_job, process_capable=True)
+    try:
+        job, deduplicated = manager.submit('pid', {'value': 3}, backend='process')
+        assert not deduplicated
+        assert _wait(job).status == 'succeeded', job.error
+        assert job.result['value'] == 3 and job.result['pid'] != os.getpid()
+        assert manager._process_pool._mp_context.get_start_method() == START_METHOD
+    finally:
+        manager._process_pool.shutdown()
+
+
+def test_thread_jobs_report_progress():
+    manager = JobManager()
+    manager.register('pid', _pid_job)
+    job, _ = manager.submit('pid', {'value': 1})
+    assert _wait(job).status == 'succeeded'
+    assert job.result['pid'] == os.getpid() and job.message == 'mitad'
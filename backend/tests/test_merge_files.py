@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.pipelines.merge_files import merge_excel_files
+
+
+@pytest.fixture
+def workbooks(tmp_path):
+    frames = [
+        pd.DataFrame({'sku': ['A', 'B'], 'qty': [1, 2]}),
+        pd.DataFrame({'sku': ['C'], 'qty': [3], 'brand': ['5.11']}),
+        pd.DataFrame({'brand': ['Bates'], 'sku': ['D']}),
+    ]
+    paths = []
+    for i, frame in enumerate(frames):
+        path = tmp_path / f'month_{i}.xlsx'
+        frame.to_excel(path, index=False)
+        paths.append(str(path))
+    return paths
+
+
+def test_csv_has_the_union_of_columns_in_input_order(workbooks, tmp_path):
+    output = str(tmp_path / 'merged.csv')
+    assert merge_excel_files(workbooks, output, max_workers=2) == output
+    merged = pd.read_csv(output)
+    assert list(merged.columns) == ['sku', 'qty', 'brand']
+    assert merged['sku'].tolist() == ['A', 'B', 'C', 'D']
+    assert merged['brand'].fillna('').tolist() == ['', '', '5.11', 'Bates']
+    # Solo queda la salida: ni el temporal ni los frames intermedios
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(p) for p in workbooks] + ['merged.csv'])
+
+
+def test_failed_merge_keeps_the_previous_output(workbooks, tmp_path):
+    output = tmp_path / 'merged.csv'
+    output.write_text('previous\n')
+    with pytest.raises(RuntimeError, match='Error merging files'):
+        merge_excel_files(workbooks + [str(tmp_path / 'missing.xlsx')], str(output), max_workers=2)
+    assert output.read_text() == 'previous\n'
+    assert not os.path.exists(f'{output}.tmp')
+
+
+def test_parquet_output(workbooks, tmp_path):
+    pytest.importorskip('pyarrow')
+    output = str(tmp_path / 'merged.parquet')
+    merge_excel_files(workbooks, output, output_format='parquet', max_workers=2)
+    assert pd.read_parquet(output)['sku'].tolist() == ['A', 'B', 'C', 'D']
@@ -0,0 +1,47 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.models import inference
+
+FEATURES = ['a', 'b']
+
+
+class Model:
+    def predict(self, X):
+        return X.sum(axis=1)
+
+
+class Mapie:
+    def predict(self, X, alpha):
+        if alpha == [0.2]:
+            raise RuntimeError('falla solo alpha 0.2')
+        pred = X.sum(axis=1)
+        return pred, np.stack([pred - 1, pred + 1], axis=1)[:, :, None].repeat(len(alpha), axis=2)
+
+
+@pytest.fixture(autouse=True)
+def active_model(monkeypatch):
+    artifacts = {'modelo_cant': Model(), 'modelo_dias': Model(), 'mapie': Mapie(),
+                 'metadata': {'features': FEATURES, 'alpha': 0.1, 'version': 'v1'}}
+    monkeypatch.setattr(inference, 'get_active_artifacts', lambda: artifacts)
+
+
+@pytest.mark.parametrize('alpha', [0, 1, 1.5, -0.1])
+def test_invalid_alpha_is_rejected_before_batching(alpha):
+    with pytest.raises(ValueError, match='alpha'):
+        inference.MicroBatcher().submit(rows=[{'a': 1.0, 'b': 2.0}], alpha=alpha)
+
+
+def test_failing_alpha_group_only_fails_its_own_requests():
+    batch = [([], [{'a': 1.0, 'b': 2.0}], None, Future()),
+             ([], [{'a': 3.0, 'b': 4.0}], 0.2, Future()),
+             ([], [{'a': 5.0, 'b': 6.0}], 0.1, Future())]
+    inference.MicroBatcher()._score_batch(batch)
+
+    default, failing, explicit = (future for *_, future in batch)
+    assert isinstance(failing.exception(), RuntimeError)
+    assert default.result()['alpha'] == 0.1
+    assert [p['pred_cantidad'] for p in default.result()['predictions']] == [3.0]
+    assert [(p['pred_cantidad_lower'], p['pred_cantidad_upper']) for p in explicit.result()['predictions']] == [(10.0, 12.0)]
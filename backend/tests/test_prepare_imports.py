@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from app.pipelines.process_imports import prepare_imports
+
+
+def _imports(**dates):
+    return pd.DataFrame({
+        'Descripcion producto': ['Playera negra'],
+        'CANTIDAD': ['5'],
+        'COSTO UNITARIO EN MEX': ['730.69'],
+        'GASTOS LOGISTICOS MXN': ['341.06'],
+        'Actual Delivery Date': ['12/30/2024'],
+        **{col: [value] for col, value in dates.items()},
+    })
+
+
+def test_lead_time_uses_pickup_date():
+    df, _ = prepare_imports(_imports(**{'Actual Pickup Date': '12/20/2024', 'Date': '12/16/2024'}))
+    assert df['tiempo_entrega'].tolist() == [10]
+
+
+def test_lead_time_falls_back_to_order_date():
+    df, report = prepare_imports(_imports(Date='12/16/2024'))
+    assert df['tiempo_entrega'].tolist() == [14]
+    assert report['Date'] == {'total': 1, 'failed': 0}
+
+
+def test_missing_lead_time_start_is_reported():
+    with pytest.raises(Exception, match="Actual Pickup Date, Date"):
+        prepare_imports(_imports())
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from app.models import inference
+from app.pipelines.product_dictionary import optimize_dtypes
+
+
+@pytest.fixture(autouse=True)
+def dictionary(monkeypatch):
+    df = optimize_dtypes(pd.DataFrame({
+        'product_id': [7, 8, 9],
+        'normalized_description': ['1.5in low pro tdu belt black m', '1911', 'playera negra'],
+    }))
+    monkeypatch.setattr(inference, 'load_product_dictionary', lambda: df.copy())
+
+
+def test_descriptions_are_normalized_like_dictionary_keys():
+    ids = inference._resolve_products(['1.5in low  pro tdu belt black m', '  Playera NEGRA ', 'no existe'])
+    assert ids.tolist() == [7, 9, pd.NA]
+
+
+def test_digit_text_is_a_description_before_an_id():
+    # "1911" es el nombre de un producto; "42" no, así que se toma como ID
+    ids = inference._resolve_products(['1911', '42', 8, 9])
+    assert ids.tolist() == [8, 42, 8, 9]
@@ -0,0 +1,51 @@
+import os
+
+from app.pipelines.runner import Stage, run_pipeline
+
+
+def _write(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(str(os.getpid()))
+    return path
+
+
+def _source():
+    return _write('source.txt')
+
+
+def _parallel():
+    return _write('parallel.txt')
+
+
+def _in_process():
+    return _write('in_process.txt')
+
+
+def _failing():
+    raise RuntimeError('boom')
+
+
+def test_stages_run_in_the_process_pool_and_in_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'input.txt').write_text('x')
+    stages = [
+        Stage('source', _source, inputs=['input.txt'], outputs=['source.txt']),
+        Stage('parallel', _parallel, inputs=['source.txt'], outputs=['parallel.txt'], depends_on=['source']),
+        Stage('in_process', _in_process, inputs=['source.txt'], outputs=['in_process.txt'],
+              depends_on=['parallel'], parallel=False),
+        Stage('failing', _failing, inputs=[], outputs=['never.txt']),
+        Stage('blocked', _in_process, inputs=[], outputs=[], depends_on=['failing']),
+    ]
+
+    result = run_pipeline(max_workers=2, stages=stages)['stages']
+    assert {name: stage['status'] for name, stage in result.items()} == {
+        'source': 'ran', 'parallel': 'ran', 'in_process': 'ran', 'failing': 'failed', 'blocked': 'blocked',
+    }
+    assert result['failing']['error'] == 'boom'
+    # Las etapas paralelas corren en otro proceso (ya en el directorio de trabajo del servidor)
+    assert (tmp_path / 'parallel.txt').read_text() != str(os.getpid())
+    assert (tmp_path / 'in_process.txt').read_text() == str(os.getpid())
+
+    # Sin cambios en las entradas, la segunda corrida no vuelve a ejecutar nada
+    again = run_pipeline(max_workers=2, stages=stages[:3])['stages']
+    assert {stage['status'] for stage in again.values()} == {'skipped'}
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.pipelines.simulate_stock import daily_sales, lead_time_table, simulate_matrix
+
+
+def test_simulation_flags_products_below_lead_time_demand():
+    dates = pd.to_datetime(pd.Series(pd.date_range('2025-01-01', periods=60).repeat(2)))
+    ids = pd.Series([1, 2] * 60)
+    units = pd.Series([5.0, 0.1] * 60)
+    sales = daily_sales(dates, ids, units)
+    assert sales[3] == 60
+
+    skus = np.array([1, 2])
+    lead = lead_time_table(pd.Series([1, 1, 1, 2, 2, 2]), pd.Series([10.0] * 6), skus)
+    result = simulate_matrix(sales, lead, skus, np.array([20.0, 20.0]), n_scenarios=200)
+    assert result['reorder_now'].tolist() == [True, False]
+    assert result.loc[0, 'mean_lead_time_demand'] == pytest.approx(50.0)
+
+
+@pytest.mark.parametrize('dates, units', [
+    (pd.Series([], dtype='datetime64[ns]'), pd.Series([], dtype='float64')),
+    (pd.Series([pd.NaT, pd.NaT]), pd.Series([1.0, 2.0])),
+])
+def test_no_valid_sales_is_a_clear_error(dates, units):
+    with pytest.raises(ValueError, match='No sales with a valid date and units'):
+        daily_sales(dates, pd.Series([1] * len(dates), dtype='int64'), units)
+
+
+def test_no_lead_times_is_a_clear_error():
+    sales = daily_sales(pd.to_datetime(pd.Series(['2025-01-01'])), pd.Series([1]), pd.Series([1.0]))
+    lead = lead_time_table(pd.Series([], dtype='int64'), pd.Series([], dtype='float64'), np.array([1]))
+    with pytest.raises(ValueError, match='No valid lead times'):
+        simulate_matrix(sales, lead, np.array([1]), np.array([0.0]), n_scenarios=10)
+
+
+def test_route_reports_missing_sales_as_400(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.pipelines import simulate_stock
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'output').mkdir()
+    sales = pd.DataFrame({'Fecha elab': ['sin fecha'], 'Descripcion producto': ['Playera'],
+                          'Piezas': ['1'], 'Precio': ['10'], 'Costo': ['5']})
+    monkeypatch.setattr(simulate_stock, 'read_source', lambda path: sales.copy())
+
+    response = TestClient(app).get('/stock/simulate', params={'n_scenarios': 10})
+    assert response.status_code == 400
+    assert 'No sales with a valid date' in response.json()['detail']
@@ -0,0 +1,25 @@
+import builtins
+import sys
+
+import pytest
+
+from app.api import startup
+
+
+def test_report_without_resource_module(monkeypatch):
+    real_import = builtins.__import__
+
+    def no_resource(name, *args, **kwargs):
+        if name == 'resource':
+            raise ImportError("No module named 'resource'")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', no_resource)
+    report = startup.startup_report()
+    assert report['max_rss_mb'] is None
+    assert report['pid'] > 0
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='resource solo existe en POSIX')
+def test_report_with_resource_module():
+    assert startup.startup_report()['max_rss_mb'] > 0
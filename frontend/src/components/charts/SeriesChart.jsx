@@ -0,0 +1,127 @@
+import React, { useState } from "react";
+
+// Dimensiones del lienzo SVG; el navegador lo escala al ancho del contenedor
+const WIDTH = 640;
+const HEIGHT = 320;
+const MARGIN = { top: 16, right: 24, bottom: 40, left: 72 };
+const BAR_LABEL_WIDTH = 200;
+const TICKS = 4;
+
+const formatNumber = (value) =>
+  value === null || value === undefined
+    ? "—"
+    : Number(value).toLocaleString("es-MX", { maximumFractionDigits: 2 });
+
+const truncate = (text, max = 28) => (text.length > max ? `${text.slice(0, max - 1)}…` : text);
+
+const niceTicks = (max) => {
+  if (max <= 0) return [0];
+  const step = max / TICKS;
+  return Array.from({ length: TICKS + 1 }, (_, i) => step * i);
+};
+
+// Serie en el tiempo: línea con puntos y tooltip por punto
+const LineChart = ({ labels, values, chart }) => {
+  const [hover, setHover] = useState(null);
+  const innerWidth = WIDTH - MARGIN.left - MARGIN.right;
+  const innerHeight = HEIGHT - MARGIN.top - MARGIN.bottom;
+  const finite = values.filter((v) => v !== null);
+  const max = Math.max(0, ...finite);
+  const min = Math.min(0, ...finite);
+  const range = max - min || 1;
+
+  const x = (i) => MARGIN.left + (labels.length > 1 ? (i / (labels.length - 1)) * innerWidth : innerWidth / 2);
+  const y = (v) => MARGIN.top + innerHeight - ((v - min) / range) * innerHeight;
+  const points = values
+    .map((v, i) => (v === null ? null : `${x(i)},${y(v)}`))
+    .filter(Boolean)
+    .join(" ");
+  const labelEvery = Math.max(1, Math.ceil(labels.length / 8));
+
+  return (
+    <svg viewBox={`0 0 ${WIDTH} ${HEIGHT}`} className="w-full h-full">
+      {niceTicks(max - min).map((tick) => (
+        <g key={tick}>
+          <line x1={MARGIN.left} x2={WIDTH - MARGIN.right} y1={y(min + tick)} y2={y(min + tick)} stroke="#e5e7eb" />
+          <text x={MARGIN.left - 6} y={y(min + tick)} textAnchor="end" dominantBaseline="middle" fontSize="10" fill="#6b7280">
+            {formatNumber(min + tick)}
+          </text>
+        </g>
+      ))}
+      {labels.map((label, i) =>
+        i % labelEvery === 0 ? (
+          <text key={label} x={x(i)} y={HEIGHT - MARGIN.bottom + 16} textAnchor="middle" fontSize="10" fill="#6b7280">
+            {label}
+          </text>
+        ) : null
+      )}
+      <text x={MARGIN.left + innerWidth / 2} y={HEIGHT - 6} textAnchor="middle" fontSize="11" fill="#374151">
+        {chart.label_axis}
+      </text>
+      <polyline points={points} fill="none" stroke="#2563eb" strokeWidth="2" />
+      {values.map((v, i) =>
+        v === null ? null : (
+          <circle
+            key={labels[i]}
+            cx={x(i)}
+            cy={y(v)}
+            r={hover === i ? 5 : 3}
+            fill="#2563eb"
+            onMouseEnter={() => setHover(i)}
+            onMouseLeave={() => setHover(null)}
+          >
+            <title>{`${labels[i]}: ${formatNumber(v)}`}</title>
+          </circle>
+        )
+      )}
+    </svg>
+  );
+};
+
+// Ranking: barras horizontales con el nombre del producto a la izquierda
+const BarChart = ({ labels, values, chart }) => {
+  const rowHeight = 24;
+  const height = Math.max(HEIGHT, MARGIN.top + MARGIN.bottom + labels.length * rowHeight);
+  const innerWidth = WIDTH - BAR_LABEL_WIDTH - MARGIN.right;
+  const max = Math.max(0, ...values.filter((v) => v !== null)) || 1;
+
+  return (
+    <svg viewBox={`0 0 ${WIDTH} ${height}`} className="w-full h-full">
+      {labels.map((label, i) => {
+        const value = values[i];
+        const width = value === null ? 0 : (Math.max(value, 0) / max) * innerWidth;
+        const top = MARGIN.top + i * rowHeight;
+        return (
+          <g key={label}>
+            <text x={BAR_LABEL_WIDTH - 6} y={top + rowHeight / 2} textAnchor="end" dominantBaseline="middle" fontSize="10" fill="#374151">
+              {truncate(label)}
+            </text>
+            <rect x={BAR_LABEL_WIDTH} y={top + 3} width={width} height={rowHeight - 6} fill="#0d9488">
+              <title>{`${label}: ${formatNumber(value)}`}</title>
+            </rect>
+            <text x={BAR_LABEL_WIDTH + width + 4} y={top + rowHeight / 2} dominantBaseline="middle" fontSize="10" fill="#6b7280">
+              {formatNumber(value)}
+            </text>
+          </g>
+        );
+      })}
+      <text x={BAR_LABEL_WIDTH + innerWidth / 2} y={height - 6} textAnchor="middle" fontSize="11" fill="#374151">
+        {chart.value_axis}
+      </text>
+    </svg>
+  );
+};
+
+// Dibuja en el navegador la serie que devuelve /descriptive/graph/{id}/data
+const SeriesChart = ({ series }) => {
+  if (series?.error) {
+    return <span className="text-red-500">{String(series.error)}</span>;
+  }
+  if (!series || !Array.isArray(series.labels) || !Array.isArray(series.values) || series.labels.length === 0) {
+    return <span className="text-gray-400">Sin datos</span>;
+  }
+  const Chart = series.chart?.type === "bar" ? BarChart : LineChart;
+  return <Chart labels={series.labels} values={series.values} chart={series.chart || {}} />;
+};
+
+export default SeriesChart;
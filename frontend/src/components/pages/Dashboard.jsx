@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import { agentService, graphService, modelService, descriptiveService } from "../../services/api";
+import SeriesChart from "../charts/SeriesChart";
 
 const Dashboard = () => {
   const [messages, setMessages] = useState([
@@ -13,13 +14,15 @@ const Dashboard = () => {
   const [inputMessage, setInputMessage] = useState("");
   const [isLoading, setIsLoading] = useState(false);
   const [graphData, setGraphData] = useState(null);
-  const [graphLoading, setGraphLoading] = useState(true);
+  const [graphLoading, setGraphLoading] = useState(false);
   const [graphError, setGraphError] = useState(null);
   
   // Estados para gráficas descriptivas
   const [descriptiveGraphs, setDescriptiveGraphs] = useState([]);
   const [selectedGraph, setSelectedGraph] = useState(null);
   const [selectedGraphData, setSelectedGraphData] = useState(null);
+  const [selectedGraphSeries, setSelectedGraphSeries] = useState(null);
+  const [showGraphImage, setShowGraphImage] = useState(false);
   const [descriptiveLoading, setDescriptiveLoading] = useState(false);
 
   // Cargar la gráfica al montar el componente
@@ -28,21 +31,14 @@ const Dashboard = () => {
     loadDescriptiveGraphs();
   }, []);
 
-  const loadGraph = async () => {
-    try {
-      setGraphLoading(true);
-      setGraphError(null);
-      const response = await graphService.getPredictionGraph();
-      setGraphData(response.graph_data_url);
-    } catch (error) {
-      console.error("Error al cargar la gráfica:", error);
-      setGraphError(
-        error.response?.data?.detail || 
-        "Error al cargar la gráfica. Asegúrate de que el modelo predictivo se haya ejecutado."
-      );
-    } finally {
-      setGraphLoading(false);
-    }
+  // El navegador descarga el PNG directamente; los errores llegan por onError de la imagen
+  const loadGraph = (refresh) => {
+    setGraphError(null);
+    setGraphData(graphService.getPredictionGraphUrl(refresh));
+  };
+
+  const handleGraphError = () => {
+    setGraphError("Error al cargar la gráfica. Asegúrate de que el modelo predictivo se haya ejecutado.");
   };
 
   const loadDescriptiveGraphs = async () => {
@@ -54,13 +50,23 @@ const Dashboard = () => {
     }
   };
 
-  const loadSelectedGraph = async (graphId) => {
+  // Por defecto solo se piden los datos agregados; el PNG se pide únicamente si se activa la imagen
+  const loadSelectedGraph = async (graphId, asImage = showGraphImage) => {
     try {
       setDescriptiveLoading(true);
-      const response = await descriptiveService.getDescriptiveGraph(graphId);
-      setSelectedGraphData(response.image_base64);
+      if (asImage) {
+        const version = selectedGraphSeries?.graph_id === graphId ? selectedGraphSeries.data_version : null;
+        setSelectedGraphData(descriptiveService.getDescriptiveGraphUrl(graphId, version));
+      } else {
+        const response = await descriptiveService.getDescriptiveGraphData(graphId);
+        setSelectedGraphSeries(response);
+      }
     } catch (error) {
       console.error("Error al cargar la gráfica descriptiva:", error);
+      // La API responde 4xx/5xx con el motivo en `detail`; se muestra en lugar de la serie anterior
+      if (!asImage) {
+        setSelectedGraphSeries({ graph_id: graphId, error: error.response?.data?.detail || error.message });
+      }
     } finally {
       setDescriptiveLoading(false);
     }
@@ -113,10 +119,10 @@ const Dashboard = () => {
       setGraphLoading(true);
       setGraphError(null);
       
-      await modelService.runModel();
+      const result = await modelService.runModel();
       
       // Recargar la gráfica después de ejecutar el modelo
-      await loadGraph();
+      loadGraph(result?.model_version || Date.now());
       
       // Agregar mensaje de confirmación
       const successMessage = {
@@ -290,7 +296,7 @@ const Dashboard = () => {
               ) : graphError ? (
                 <span className="text-red-500">{graphError}</span>
               ) : graphData ? (
-                <img src={graphData} alt="Graph" className="h-full object-contain" />
+                <img src={graphData} alt="Graph" className="h-full object-contain" onError={handleGraphError} />
               ) : (
                 <span className="text-gray-400">No disponible</span>
               )}
@@ -315,11 +321,24 @@ const Dashboard = () => {
                 </option>
               ))}
             </select>
-            <div className="h-80 bg-white rounded border border-dashed flex justify-center items-center">
+            <label className="mb-2 flex items-center gap-2 text-sm text-gray-600">
+              <input
+                type="checkbox"
+                checked={showGraphImage}
+                onChange={(e) => {
+                  setShowGraphImage(e.target.checked);
+                  if (selectedGraph) loadSelectedGraph(selectedGraph, e.target.checked);
+                }}
+              />
+              Ver como imagen
+            </label>
+            <div className="h-80 bg-white rounded border border-dashed flex justify-center items-center overflow-auto">
               {descriptiveLoading ? (
                 <span className="text-gray-500">Cargando...</span>
-              ) : selectedGraphData ? (
+              ) : showGraphImage && selectedGraphData ? (
                 <img src={selectedGraphData} alt="Graph" className="h-full object-contain" />
+              ) : !showGraphImage && selectedGraphSeries ? (
+                <SeriesChart series={selectedGraphSeries} />
               ) : (
                 <span className="text-gray-400">No disponible</span>
               )}
@@ -76,15 +76,65 @@ export const graphService = {
       throw error;
     }
   },
+
+  // URL del PNG binario; el navegador lo revalida con ETag (304 si no cambió).
+  // `refresh` cambia la URL para que una nueva corrida del modelo no reuse la imagen ya mostrada
+  getPredictionGraphUrl: (refresh) =>
+    `${API_BASE_URL}/graph/png${refresh ? `?r=${encodeURIComponent(refresh)}` : ''}`,
+};
+
+// Servicio para los trabajos en segundo plano (entrenamiento, pipeline, análisis)
+const JOB_POLL_INTERVAL = 1000;
+const JOB_ACTIVE_STATUSES = ['queued', 'running'];
+
+export const jobService = {
+  // Encolar un trabajo; responde de inmediato con su ID
+  submitJob: async (kind, params = {}, backend = null) => {
+    const response = await api.post(`/jobs/${kind}`, { params, backend });
+    return response.data;
+  },
+
+  // Consultar estado, avance y tiempos de un trabajo
+  getJob: async (jobId) => {
+    const response = await api.get(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Cancelar un trabajo
+  cancelJob: async (jobId) => {
+    const response = await api.delete(`/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Consultar el trabajo periódicamente hasta que termine; cada consulta es corta,
+  // así que el timeout de axios no limita la duración del trabajo
+  waitForJob: async (jobId, { interval = JOB_POLL_INTERVAL, onProgress } = {}) => {
+    for (;;) {
+      const job = await jobService.getJob(jobId);
+      if (onProgress) onProgress(job);
+      if (!JOB_ACTIVE_STATUSES.includes(job.status)) {
+        if (job.status !== 'succeeded') {
+          throw new Error(job.error || `El trabajo terminó con estado: ${job.status}`);
+        }
+        return job.result;
+      }
+      await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+  },
+
+  // Encolar y esperar el resultado
+  runJob: async (kind, params = {}, options = {}) => {
+    const job = await jobService.submitJob(kind, params, options.backend);
+    return jobService.waitForJob(job.job_id, options);
+  },
 };
 
 // Servicio para ejecutar el modelo
 export const modelService = {
-  // Ejecutar el modelo predictivo
-  runModel: async () => {
+  // Ejecutar el modelo predictivo como trabajo en segundo plano
+  runModel: async (options = {}) => {
     try {
-      const response = await api.get('/run-model/');
-      return response.data;
+      return await jobService.runJob('run_model', {}, options);
     } catch (error) {
       console.error('Error al ejecutar el modelo:', error);
       throw error;
@@ -92,13 +142,25 @@ export const modelService = {
   },
 };
 
+// Servicio para el pipeline completo (importaciones, ventas, stock, dataset maestro y modelo)
+export const pipelineService = {
+  // Ejecutar el pipeline; las etapas sin cambios en sus entradas se omiten
+  runPipeline: async (force = false, options = {}) => {
+    try {
+      return await jobService.runJob('pipeline', { force }, options);
+    } catch (error) {
+      console.error('Error al ejecutar el pipeline:', error);
+      throw error;
+    }
+  },
+};
+
 // Servicio para las gráficas descriptivas
 export const descriptiveService = {
   // Ejecutar el análisis descriptivo completo
-  runDescriptiveAnalysis: async () => {
+  runDescriptiveAnalysis: async (options = {}) => {
     try {
-      const response = await api.get('/descriptive/run-analysis');
-      return response.data;
+      return await jobService.runJob('descriptive_analysis', {}, options);
     } catch (error) {
       console.error('Error al ejecutar el análisis descriptivo:', error);
       throw error;
@@ -126,6 +188,21 @@ export const descriptiveService = {
       throw error;
     }
   },
+
+  // URL del PNG binario de una gráfica; con la versión de sus datos (data_version) la URL es inmutable
+  getDescriptiveGraphUrl: (graphId, version) =>
+    `${API_BASE_URL}/descriptive/graph/${graphId}/png${version ? `?v=${version}` : ''}`,
+
+  // Obtener solo los datos agregados de una gráfica (etiquetas y valores) para dibujarla en el navegador
+  getDescriptiveGraphData: async (graphId) => {
+    try {
+      const response = await api.get(`/descriptive/graph/${graphId}/data`);
+      return response.data;
+    } catch (error) {
+      console.error('Error al obtener los datos de la gráfica descriptiva:', error);
+      throw error;
+    }
+  },
 };
 
 // Función para verificar la conectividad con el backend